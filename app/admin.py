@@ -8,13 +8,20 @@ from telegram.constants import ParseMode
 from telegram.ext import CallbackContext, ConversationHandler
 
 from context import get_user_params, update_user_params
-from database import DB_LOGS
+from database import DatabaseLogs
+from database_async import DB_BOOKS_ASYNC
+from db_executor import DB_LANES, LANE_ADMIN, DatabaseBusyError
+from handlers_utils import BUSY_TEXT
+from result_cache import RESULT_CACHE, BOOK_CARD_CACHE
+from card_prefetch import CARD_PREFETCHER
 
 # Добавляем константы для пагинации
 USERS_PER_PAGE = 10
 
-# Создаем экземпляр базы данных логов
-# DB_LOGS = DatabaseLogs()
+# Отдельный экземпляр базы данных логов для аналитики админки.
+# Используется только из единственного потока очереди LANE_ADMIN:
+# соединение SQLite привязано к создавшему его потоку
+ADMIN_DB_LOGS = DatabaseLogs()
 
 # Админские кнопки: ключ - имя обработчика, значение - текст кнопки
 # Добавляем новые админские кнопки
@@ -374,6 +381,63 @@ async def admin_system(update: Update, context: CallbackContext):
 • Очищено просроченных: <code>{cleaned_sessions}</code>
 """
 
+    # Статистика пула соединений с БД библиотеки
+    pool_stats = DB_BOOKS_ASYNC.get_pool_stats()
+    if pool_stats:
+        system_text += f"""
+<b>Пул соединений MariaDB:</b>
+• Открыто / размер: <code>{pool_stats.get('open', '—')} / {pool_stats.get('size', '—')}</code>
+• Выдано: <code>{pool_stats.get('checked_out', '—')}</code>, свободно: <code>{pool_stats.get('idle', '—')}</code>
+• Ожидают соединения: <code>{pool_stats.get('waiting', '—')}</code>
+• Создано: <code>{pool_stats.get('created', '—')}</code>, пересоздано: <code>{pool_stats.get('recycled', '—')}</code>, отброшено: <code>{pool_stats.get('invalidated', '—')}</code>
+• Таймаутов ожидания: <code>{pool_stats.get('timeouts', '—')}</code>
+• Среднее ожидание: <code>{pool_stats.get('avg_wait_ms', '—')} мс</code>
+"""
+    else:
+        system_text += "\n<b>Пул соединений MariaDB:</b> отключен\n"
+
+    # Статистика очередей запросов к БД
+    system_text += "\n<b>Очереди запросов к БД:</b>\n"
+    for lane_name, lane_stats in DB_LANES.get_stats().items():
+        system_text += (
+            f"• {lane_name}: выполняется <code>{lane_stats['running']}/{lane_stats['workers']}</code>, "
+            f"в очереди <code>{lane_stats['queued']}/{lane_stats['max_queue']}</code>, "
+            f"отклонено <code>{lane_stats['rejected']}</code>\n"
+            f"  ожидание <code>{lane_stats['avg_wait_ms']}</code> мс (макс <code>{lane_stats['max_wait_ms']}</code>), "
+            f"выполнение <code>{lane_stats['avg_run_ms']}</code> мс, всего <code>{lane_stats['completed']}</code>\n"
+        )
+
+    # Статистика кеша результатов поиска
+    cache_stats = RESULT_CACHE.get_stats()
+    system_text += f"""
+<b>Кеш результатов поиска:</b>
+• Записей: <code>{cache_stats['size']} / {cache_stats['max_size']}</code>, TTL <code>{cache_stats['ttl']}</code> с
+• Попаданий: <code>{cache_stats['hits']}</code>, промахов: <code>{cache_stats['misses']}</code>, общих загрузок: <code>{cache_stats['shared']}</code>
+• Вытеснено: <code>{cache_stats['evictions']}</code>, устарело: <code>{cache_stats['expired']}</code>, сбросов: <code>{cache_stats['invalidations']}</code>
+"""
+
+    # Статистика кеша карточек книг
+    card_stats = BOOK_CARD_CACHE.get_stats()
+    system_text += f"""
+<b>Кеш карточек книг:</b>
+• Записей: <code>{card_stats['size']} / {card_stats['max_size']}</code>, TTL <code>{card_stats['ttl']}</code> с
+• Попаданий: <code>{card_stats['hits']}</code>, промахов: <code>{card_stats['misses']}</code>, общих загрузок: <code>{card_stats['shared']}</code>
+• Вытеснено: <code>{card_stats['evictions']}</code>, устарело: <code>{card_stats['expired']}</code>, сбросов: <code>{card_stats['invalidations']}</code>
+"""
+
+    # Статистика упреждающей загрузки карточек книг
+    prefetch_stats = CARD_PREFETCHER.get_stats()
+    if prefetch_stats['enabled']:
+        system_text += f"""
+<b>Упреждающая загрузка карточек:</b>
+• Записей: <code>{prefetch_stats['size']} / {prefetch_stats['max_size']}</code>, TTL <code>{prefetch_stats['ttl']}</code> с
+• Страниц: <code>{prefetch_stats['pages']}</code>, загружено карточек: <code>{prefetch_stats['prefetched']}</code>, уже были в кеше: <code>{prefetch_stats['skipped']}</code>
+• Открыто из загруженных: <code>{prefetch_stats['used']}</code> (<code>{prefetch_stats['used_rate']}%</code>), попаданий при открытии: <code>{prefetch_stats['hit_rate']}%</code> из <code>{prefetch_stats['opens']}</code>
+• Устарело: <code>{prefetch_stats['expired']}</code>, вытеснено: <code>{prefetch_stats['evictions']}</code>, отменено: <code>{prefetch_stats['cancelled']}</code>, отклонено очередью: <code>{prefetch_stats['rejected']}</code>, ошибок: <code>{prefetch_stats['errors']}</code>
+"""
+    else:
+        system_text += "\n<b>Упреждающая загрузка карточек:</b> отключена\n"
+
     await update.message.reply_text(system_text, parse_mode=ParseMode.HTML)
 
 
@@ -395,14 +459,19 @@ async def admin_user_stats(update: Update, context: CallbackContext, from_callba
             await update.message.reply_text("❌ Недостаточно прав")
         return
 
-    # Получаем общую статистику
-    stats = DB_LOGS.get_user_stats_summary()
+    try:
+        # Получаем общую статистику
+        stats = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_user_stats_summary)
 
-    # Получаем статистику по дням
-    daily_stats = DB_LOGS.get_daily_user_stats(7)
+        # Получаем статистику по дням
+        daily_stats = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_daily_user_stats, 7)
 
-    # Получаем статистику по донатам
-    payment_stats = DB_LOGS.get_payment_stats(30)
+        # Получаем статистику по донатам
+        payment_stats = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_payment_stats, 30)
+    except DatabaseBusyError:
+        # Очередь admin переполнена
+        await message_func(BUSY_TEXT)
+        return
 
     stats_text = f"""
 📈 <b>Статистика пользователей</b>
@@ -463,7 +532,7 @@ async def admin_user_stats(update: Update, context: CallbackContext, from_callba
 
 async def show_top_searches(query, context: CallbackContext):
     """Показывает топ поисковых запросов"""
-    top_searches = DB_LOGS.get_top_searches(15)
+    top_searches = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_top_searches, 15)
 
     searches_text = "🔍 <b>Топ поисковых запросов</b>\n\n"
 
@@ -488,8 +557,12 @@ async def admin_recent_activity(update: Update, context: CallbackContext):
 
     # Получаем последние действия
     activities = []
-    recent_searches = DB_LOGS.get_recent_searches(10)
-    recent_downloads = DB_LOGS.get_recent_downloads(10)
+    try:
+        recent_searches = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_recent_searches, 10)
+        recent_downloads = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_recent_downloads, 10)
+    except DatabaseBusyError:
+        await update.message.reply_text(BUSY_TEXT)
+        return
 
     activity_text = "🔍 <b>Последняя активность</b>\n\n"
 
@@ -516,8 +589,8 @@ async def admin_recent_activity(update: Update, context: CallbackContext):
 
 async def show_users_list(query, context: CallbackContext, page=0):
     """Показывает список пользователей"""
-    users = DB_LOGS.get_users_list(USERS_PER_PAGE, page * USERS_PER_PAGE)
-    total_users = DB_LOGS.get_user_stats_summary()['total_users']
+    users = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_users_list, USERS_PER_PAGE, page * USERS_PER_PAGE)
+    total_users = (await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_user_stats_summary))['total_users']
 
     users_text = f"👥 <b>Список пользователей</b>\n\n"
     users_text += f"Страница {page + 1} из {((total_users - 1) // USERS_PER_PAGE) + 1}\n\n"
@@ -554,14 +627,14 @@ async def show_users_list(query, context: CallbackContext, page=0):
 async def show_user_detail(query, context: CallbackContext, user_id):
     """Показывает детальную информацию о пользователе"""
     # Получаем информацию о пользователе напрямую по ID
-    user = DB_LOGS.get_user_by_id(user_id)
+    user = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_user_by_id, user_id)
 
     if not user:
         await query.edit_message_text("❌ Пользователь не найден")
         return
 
     # Получаем историю действий
-    activities = DB_LOGS.get_user_activity(user_id, 10)
+    activities = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_user_activity, user_id, 10)
 
     # Проверяем статус блокировки
     # user_settings = DB_SETTINGS.get_user_settings(user_id)
@@ -633,7 +706,7 @@ async def toggle_user_block(query, context: CallbackContext, user_id):
 
 async def show_recent_searches(query, context: CallbackContext):
     """Показывает последние поисковые запросы"""
-    searches = DB_LOGS.get_recent_searches(20)
+    searches = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_recent_searches, 20)
 
     searches_text = "🔍 <b>Последние поисковые запросы</b>\n\n"
 
@@ -648,7 +721,7 @@ async def show_recent_searches(query, context: CallbackContext):
 
 async def show_recent_downloads(query, context: CallbackContext):
     """Показывает последние скачивания"""
-    downloads = DB_LOGS.get_recent_downloads(20)
+    downloads = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_recent_downloads, 20)
 
     downloads_text = "📥 <b>Последние скачивания</b>\n\n"
 
@@ -663,7 +736,7 @@ async def show_recent_downloads(query, context: CallbackContext):
 
 async def show_top_downloads(query, context: CallbackContext):
     """Показывает топ скачанных книг"""
-    top_downloads = DB_LOGS.get_top_downloads(20)
+    top_downloads = await DB_LANES.run(LANE_ADMIN, ADMIN_DB_LOGS.get_top_downloads, 20)
 
     top_text = "🏆 <b>Топ скачанных книг</b>\n\n"
 
@@ -715,6 +788,9 @@ async def handle_admin_callback(update: Update, context: CallbackContext):
         elif action == "refresh_stats":
             await admin_user_stats(update, context, from_callback=True)
 
+    except DatabaseBusyError:
+        # Очередь admin переполнена (show_users_list, show_user_detail и другие просмотры логов)
+        await query.edit_message_text(BUSY_TEXT)
     except Exception as e:
         print(f"Error in admin callback: {e}")
         await query.edit_message_text("❌ Произошла ошибка при обработке запроса")
@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import os
+
+from db_executor import DatabaseBusyError
+from result_cache import ResultCache, BOOK_CARD_CACHE
+
+# Упреждающая загрузка карточек книг показанной страницы результатов (1 - включена)
+CARD_PREFETCH = os.getenv('CARD_PREFETCH', '0') == '1'
+
+
+class CardPrefetcher:
+    """
+    Упреждающая загрузка карточек книг страницы результатов поиска.
+
+    После показа страницы карточки её книг, которых ещё нет в кешах, загружаются одним запросом
+    в очереди prefetch и хранятся недолго в отдельном кеше, чтобы не вытеснять из BOOK_CARD_CACHE
+    карточки действительно открытых книг. Открытая книга забирает карточку отсюда.
+    Новая страница или новый поиск пользователя отменяют его незавершённую загрузку.
+    Уже начатый запрос к БД при отмене не прерывается, а дочитывается, и его результат отбрасывается:
+    прерванный на середине ответа запрос aiomysql оставил бы соединение пула непригодным.
+    """
+
+    def __init__(self, enabled, max_size, ttl):
+        self.enabled = enabled
+        self._cards = ResultCache(max_size, ttl)
+        self._tasks = {}  # user_id -> asyncio.Task
+
+        # Метрики
+        self._pages = 0
+        self._prefetched = 0
+        self._skipped = 0
+        self._used = 0
+        self._opens = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._errors = 0
+
+    def schedule(self, user_id, book_ids, fetch_cards):
+        """Запускает загрузку карточек book_ids через fetch_cards(недостающие BookID) -> {BookID: карточка}"""
+        if not self.enabled or not self._cards.enabled:
+            return
+        self.cancel(user_id)
+        task = asyncio.create_task(self._prefetch([int(book_id) for book_id in book_ids], fetch_cards))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda done: self._tasks.pop(user_id, None) if self._tasks.get(user_id) is done else None)
+
+    def cancel(self, user_id):
+        task = self._tasks.pop(user_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+            self._cancelled += 1
+
+    async def _prefetch(self, book_ids, fetch_cards):
+        self._pages += 1
+        missing = [book_id for book_id in book_ids
+                   if not BOOK_CARD_CACHE.contains(book_id) and not self._cards.contains(book_id)]
+        self._skipped += len(book_ids) - len(missing)
+        if not missing:
+            return
+        try:
+            cards = await self._cards.get_many_or_load(missing, functools.partial(self._fetch_shielded, fetch_cards))
+            self._prefetched += len(cards)
+        except DatabaseBusyError:
+            # Очередь упреждающей загрузки занята - обычные запросы важнее
+            self._rejected += 1
+        except Exception as e:
+            self._errors += 1
+            print(f"Card prefetch error: {e}")
+
+    @staticmethod
+    async def _fetch_shielded(fetch_cards, book_ids):
+        """fetch_cards(book_ids), который отмена ожидающего не прерывает: запрос завершается сам"""
+        task = asyncio.ensure_future(fetch_cards(book_ids))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Результат отменённой загрузки не нужен, но ошибку забираем, чтобы она не попала в лог asyncio
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            raise
+
+    def take(self, book_id):
+        """Забирает загруженную заранее карточку открытой книги (None, если её нет)"""
+        if not self.enabled:
+            return None
+        self._opens += 1
+        found, card = self._cards.pop(book_id)
+        if found:
+            self._used += 1
+        return card
+
+    def invalidate(self):
+        self._cards.invalidate()
+
+    def get_stats(self):
+        cards_stats = self._cards.get_stats()
+        return {
+            'enabled': self.enabled,
+            'size': cards_stats['size'],
+            'max_size': cards_stats['max_size'],
+            'ttl': cards_stats['ttl'],
+            'pages': self._pages,
+            'prefetched': self._prefetched,
+            'skipped': self._skipped,
+            'used': self._used,
+            'opens': self._opens,
+            # Доля загруженных заранее карточек, которые открыли
+            'used_rate': round(self._used / self._prefetched * 100, 1) if self._prefetched else 0.0,
+            # Доля открытий книг мимо BOOK_CARD_CACHE, обслуженных загруженными заранее карточками
+            'hit_rate': round(self._used / self._opens * 100, 1) if self._opens else 0.0,
+            'expired': cards_stats['expired'],
+            'evictions': cards_stats['evictions'],
+            'cancelled': self._cancelled,
+            'rejected': self._rejected,
+            'errors': self._errors,
+        }
+
+
+CARD_PREFETCHER = CardPrefetcher(
+    enabled=CARD_PREFETCH,
+    max_size=int(os.getenv('CARD_PREFETCH_SIZE', 1000)),
+    ttl=int(os.getenv('CARD_PREFETCH_TTL', 120)),
+)
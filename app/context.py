@@ -25,10 +25,12 @@ class CMConst:
     class CMC_SearchData:
         PAGES_OF_BOOKS = 'PAGES_OF_BOOKS'
         FOUND_BOOKS_COUNT = 'FOUND_BOOKS_COUNT'
+        BOOKS_CURSOR = 'BOOKS_CURSOR'  # курсор постраничной выдачи книг (SEARCH_RESULTS_MODE=lazy)
         PAGES_OF_SERIES = 'PAGES_OF_SERIES'
         FOUND_SERIES_COUNT = 'FOUND_SERIES_COUNT'
         PAGES_OF_AUTHORS = 'PAGES_OF_AUTHORS'
         FOUND_AUTHORS_COUNT = 'FOUND_AUTHORS_COUNT'
+        SUGGESTIONS = 'SUGGESTIONS'  # подсказки "Возможно, вы имели в виду" к последнему пустому поиску
 
 
 class ContextManager:
@@ -286,10 +288,20 @@ def get_found_series_count(context: CallbackContext):
 def get_found_authors_count(context: CallbackContext):
     return ContextManager.get(context, CMConst.CMC_SearchData.FOUND_AUTHORS_COUNT)
 
-def set_books(context: CallbackContext, pages_of_books, count):
+def set_books(context: CallbackContext, pages_of_books, count, cursor=None):
     # ContextManager.set(context, CMConst.CMC_SearchData.BOOKS, books)
     ContextManager.set(context, CMConst.CMC_SearchData.PAGES_OF_BOOKS, pages_of_books)
     ContextManager.set(context, CMConst.CMC_SearchData.FOUND_BOOKS_COUNT, count)
+    ContextManager.set(context, CMConst.CMC_SearchData.BOOKS_CURSOR, cursor)
+
+def get_books_cursor(context: CallbackContext):
+    return ContextManager.get(context, CMConst.CMC_SearchData.BOOKS_CURSOR)
+
+def get_suggestions(context: CallbackContext):
+    return ContextManager.get(context, CMConst.CMC_SearchData.SUGGESTIONS)
+
+def set_suggestions(context: CallbackContext, suggestions):
+    ContextManager.set(context, CMConst.CMC_SearchData.SUGGESTIONS, suggestions)
 
 def set_series(context: CallbackContext, pages_of_series, count):
     # ContextManager.set(context, CMConst.CMC_SearchData.SERIES, series)
@@ -1,3 +1,4 @@
+import math
 import os
 import sqlite3
 from collections import namedtuple
@@ -6,7 +7,13 @@ from typing import Dict, List, Any, Coroutine
 import mysql.connector
 from contextlib import contextmanager
 
-from flibusta_client import FlibustaClient, flibusta_client
+from db_pool import ConnectionPool
+from search_fuzzy import SEARCH_FUZZY, FUZZY_MIN_SIMILARITY, FUZZY_LEN_DELTA, FUZZY_MAX_TERMS, \
+    FUZZY_MAX_CANDIDATES, FUZZY_MAX_STATEMENT_TIME, FUZZY_KINDS_BOOKS, fuzzy_words, trigrams, \
+    rank_candidates, build_suggestions
+from search_query import query_terms
+
+from flibusta_client import FlibustaClient
 from constants import FLIBUSTA_DB_SETTINGS_PATH, FLIBUSTA_DB_LOGS_PATH, MAX_BOOKS_SEARCH, \
     SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA, MAX_SERIES_SEARCH, MAX_AUTHORS_SEARCH
 
@@ -19,123 +26,743 @@ UserSettingsType = namedtuple('UserSettingsType',
                                'BookFormat', 'LastNewsDate', 'IsBlocked', 'BookSize', 'SearchType', 'Rating', 'SearchArea'])
 
 # SQL-запросы
-# Базовые поля для SELECT
-BASE_FIELDS = """
-    b.BookID as FileName,
-    upper(b.Lang) as SearchLang,
-    b.Title,
-    b.FileSize as BookSize,
-    b.Year as SearchYear,
-    case 
-      when b.FileSize <= 800 * 1024 then 'less800'
-      when b.FileSize > 800 * 1024 then 'more800'
-    end as BookSizeCat,  
-    an.LastName,
-    an.FirstName, 
-    an.MiddleName,
-    an.AvtorId as AuthorID,
-    gl.GenreDesc AS Genre,
-    sn.SeqName as SeriesTitle, 
-    sn.SeqId as SeriesID, 
-    ROUND(COALESCE(r.LibRate, 0)) as LibRate
+# Поля книги из денормализованной таблицы libbook_search (одна строка на книгу,
+# заполняется при инициализации БД: db_init/zz_32_create_search.sql, zz_42_fill_search.sql)
+SEARCH_FIELDS = """
+    bs.BookID as FileName,
+    bs.Title,
+    bs.LastName,
+    bs.FirstName,
+    bs.MiddleName,
+    bs.Genre,
+    bs.BookSize,
+    bs.SearchYear,
+    bs.LibRate,
+    bs.SeriesTitle
 """
 
-# Базовые JOIN (БЕЗ FROM)
-BASE_JOINS = """
--- LEFT JOIN (select bookid, min(avtorid) as avtorid from libavtor group by bookid) a ON a.BookID = b.BookID
-LEFT JOIN libavtor a ON a.BookID = b.BookID
-LEFT JOIN libavtorname an ON an.AvtorID = a.AvtorID
-LEFT JOIN (select bookid, min(genreid) as genreid from libgenre group by bookid) g ON g.BookID = b.BookID
--- LEFT JOIN libgenre g ON g.BookID = b.BookID
-LEFT JOIN libgenrelist gl ON gl.GenreID = g.GenreID
-LEFT JOIN libseq s ON s.BookID = b.BookID
-LEFT JOIN libseqname sn on sn.SeqID = s.SeqID
-LEFT JOIN (
-    SELECT BookId, AVG(CAST(Rate AS SIGNED)) as LibRate
-    FROM librate 
-    GROUP BY BookId
-) r ON r.BookId = b.BookId
+# Полнотекстовые совпадения по области поиска: одна строка (BookID, Relevance) на книгу.
+# Фильтры пользователя (sql_filter по полям bs.*) применяются здесь же, до группировки
+# и соединений внешнего запроса
+SQL_MATCH_BOOKS = """
+    SELECT fts.BookID, MATCH(fts.FT) AGAINST(%s IN BOOLEAN MODE) as Relevance
+    FROM libbook_fts fts
+    JOIN libbook_search bs ON bs.BookID = fts.BookID
+    WHERE MATCH(fts.FT) AGAINST(%s IN BOOLEAN MODE)
+      {sql_filter}
 """
 
-# Основной полнотекстовый поиск
-SQL_QUERY_BOOKS = f"""
-select * from (
-SELECT 
-    {BASE_FIELDS},
-    MATCH(fts.FT) AGAINST(%s IN BOOLEAN MODE) as Relevance
-FROM libbook_fts fts
-JOIN libbook b ON b.BookID = fts.BookID
-{BASE_JOINS}
-WHERE b.Deleted = '0'
-  AND MATCH(fts.FT) AGAINST(%s IN BOOLEAN MODE)
-) as subq 
+SQL_MATCH_ABOOKS = """
+    SELECT ba.BookID, MAX(MATCH(ba.Body) AGAINST(%s IN BOOLEAN MODE)) as Relevance
+    FROM libbannotations ba
+    JOIN libbook_search bs ON bs.BookID = ba.BookID
+    WHERE MATCH(ba.Body) AGAINST(%s IN BOOLEAN MODE)
+      {sql_filter}
+    GROUP BY ba.BookID
 """
 
-# Поиск по аннотациям книг
-SQL_QUERY_ABOOKS = f"""
-select * from (
-SELECT 
-    {BASE_FIELDS},
-    MATCH(ba.Body) AGAINST(%s IN BOOLEAN MODE) as Relevance
-FROM libbannotations ba
-JOIN libbook b ON b.BookID = ba.BookID
-{BASE_JOINS}
-WHERE b.Deleted = '0'
-  AND MATCH(ba.Body) AGAINST(%s IN BOOLEAN MODE)
-) as subq2
+SQL_MATCH_AAUTHORS = """
+    SELECT ab.BookID, MAX(MATCH(aa.Body) AGAINST(%s IN BOOLEAN MODE)) as Relevance
+    FROM libaannotations aa
+    JOIN libavtor ab ON ab.AvtorId = aa.AvtorId
+    JOIN libbook_search bs ON bs.BookID = ab.BookID
+    WHERE MATCH(aa.Body) AGAINST(%s IN BOOLEAN MODE)
+      {sql_filter}
+    GROUP BY ab.BookID
 """
 
-# Поиск по аннотациям книг
-SQL_QUERY_AAUTHORS = f"""
-select * from (
-SELECT 
-    {BASE_FIELDS},
-    MATCH(aa.Body) AGAINST(%s IN BOOLEAN MODE) as Relevance
-FROM libaannotations aa
-JOIN libavtor ab ON ab.AvtorId = aa.AvtorId
-JOIN libbook b ON b.BookID = ab.BookID
-{BASE_JOINS}
-WHERE b.Deleted = '0'
-  AND MATCH(aa.Body) AGAINST(%s IN BOOLEAN MODE)
-) as subq2
+# Книги выбранной серии: по индексу libseq (SeqId, SeqNumb) без полнотекстового поиска.
+# Relevance = -номер в серии: при общем порядке Relevance DESC книги идут по номерам
+SQL_MATCH_SERIES_BOOKS = """
+    SELECT s.BookID, -CAST(MIN(s.SeqNumb) AS SIGNED) as Relevance
+    FROM libseq s
+    JOIN libbook_search bs ON bs.BookID = s.BookID
+    WHERE s.SeqID = %s
+      {sql_filter}
+    GROUP BY s.BookID
 """
 
-SELECT_SQL_QUERY = {
-    SETTING_SEARCH_AREA_B: SQL_QUERY_BOOKS,
-    SETTING_SEARCH_AREA_BA: SQL_QUERY_ABOOKS,
-    SETTING_SEARCH_AREA_AA: SQL_QUERY_AAUTHORS
+SELECT_SQL_MATCH = {
+    SETTING_SEARCH_AREA_B: SQL_MATCH_BOOKS,
+    SETTING_SEARCH_AREA_BA: SQL_MATCH_ABOOKS,
+    SETTING_SEARCH_AREA_AA: SQL_MATCH_AAUTHORS
 }
 
+# Счётчики книг по жанрам и языкам - готовые таблицы (db_init/zz_45_fill_facets.sql).
+# lang = '' - по всем языкам
 SQL_QUERY_PARENT_GENRES_COUNT = """
-	select coalesce(gl.GenreMeta,'Неотсортированное'), count(b.BookId)
-      from libbook b
-        left outer join libgenre g on g.BookId = b.BookId 
-        left outer join libgenrelist gl on gl.GenreId = g.GenreId 
-    where b.Deleted = '0'
-      -- AND (#s = '' OR b.Lang = #s)
-    group by coalesce(gl.GenreMeta, 'Неотсортированное')
-    order by 1
+    SELECT GenreMeta, CAST(SUM(BookCount) AS UNSIGNED)
+    FROM libgenre_stats
+    WHERE (%s = '' OR SearchLang = %s)
+    GROUP BY GenreMeta
+    ORDER BY 1
 """
 
 SQL_QUERY_CHILDREN_GENRES_COUNT = """
-	select gl.GenreDesc, count(g.BookId), 
-	  gl.GenreId
-      from libbook b
-	    left outer join libgenre g on g.BookId = b.BookId 
-        left outer join libgenrelist gl on gl.GenreId = g.GenreId 
-    Where 
-      b.Deleted = '0'
-      and gl.GenreMeta = %s
-    group by gl.GenreDesc, gl.GenreId
-    order by 1	
+    SELECT GenreDesc, CAST(SUM(BookCount) AS UNSIGNED), GenreID
+    FROM libgenre_stats
+    WHERE GenreMeta = %s AND GenreID > 0
+      AND (%s = '' OR SearchLang = %s)
+    GROUP BY GenreDesc, GenreID
+    ORDER BY 1
 """
 
 SQL_QUERY_LANGS = """
-    SELECT Lang, COUNT(Lang) AS count
+    SELECT Lang, BookCount AS count
+    FROM liblang_stats
+    ORDER BY count DESC
+"""
+
+# Снимок статистики библиотеки, записанный при импорте (db_init/zz_46_fill_library_meta.sql)
+SQL_QUERY_LIBRARY_META = """
+    SELECT LastUpdate, BooksCount, MaxBookID, AuthorsCount, GenresCount, SeriesCount, LanguagesCount
+    FROM library_meta
+    WHERE ID = 1
+"""
+
+# Версия библиотеки: из снимка, а без него - время последнего изменения книг (по индексу idx_libbook_time)
+SQL_QUERY_LIBRARY_VERSION = """
+    SELECT COALESCE(
+        (SELECT ContentVersion FROM library_meta WHERE ID = 1),
+        (SELECT MAX(Time) FROM libbook))
+"""
+
+# Подсчёт статистики по таблицам - если снимка library_meta нет
+SQL_QUERY_LIBRARY_STATS = """
+    SELECT 
+        MAX(date(time)) as max_update_date,
+        COUNT(*) as books_cnt,
+        MAX(bookid) as max_filename
     FROM libbook b
     where b.Deleted = '0'
-    GROUP BY Lang
-    ORDER BY count DESC
+"""
+
+SQL_QUERY_LIBRARY_COUNTS = """
+    SELECT
+        (SELECT COUNT(*) FROM libavtorname) as authors_cnt,
+        (SELECT COUNT(*) FROM libgenrelist) as genres_cnt,
+        (SELECT COUNT(*) FROM libseqname) as series_cnt,
+        (SELECT COUNT(DISTINCT Lang) FROM libbook WHERE Deleted = '0') as langs_cnt
+"""
+
+SQL_QUERY_BOOK_INFO = """
+    SELECT b.Title, b.Year, sn.SeqName,
+           GROUP_CONCAT(DISTINCT CONCAT(gl.GenreID, ',', gl.GenreDesc) SEPARATOR ',') as Genres,
+           GROUP_CONCAT(DISTINCT CONCAT(an.AvtorID, ',', an.LastName, ' ', an.FirstName, ' ', an.MiddleName) SEPARATOR ',') as Authors,
+           bp.File, b.FileSize, b.Pages, b.Lang, st.RateAvg, b.BookId,
+           sn.SeqID
+    FROM libbook b
+    LEFT JOIN libavtor a ON a.BookID = b.BookID
+    LEFT JOIN libavtorname an ON a.AvtorID = an.AvtorID
+    LEFT JOIN libseq s ON s.BookID = b.BookID
+    LEFT JOIN libseqname sn ON s.SeqID = sn.SeqID
+    LEFT JOIN libgenre g ON g.BookID = b.BookID
+    LEFT JOIN libgenrelist gl ON g.GenreID = gl.GenreID
+    LEFT JOIN libbpics bp ON b.BookID = bp.BookID
+    LEFT JOIN book_stats st ON st.BookID = b.BookID
+    WHERE b.BookID = %s
+    GROUP BY b.Title, b.Year, sn.SeqName, bp.File, b.FileSize, b.Pages, b.Lang
+"""
+
+# Карточка книги за один запрос: основная информация и ID авторов, по книге - только поиск по индексам BookID.
+# Первые столбцы - как в SQL_QUERY_BOOK_INFO; из нескольких серий книги берётся основная
+SQL_QUERY_BOOK_CARDS = """
+    SELECT b.Title, b.Year, sn.SeqName,
+           (SELECT GROUP_CONCAT(DISTINCT CONCAT(gl.GenreID, ',', gl.GenreDesc) SEPARATOR ',')
+            FROM libgenre g JOIN libgenrelist gl ON gl.GenreID = g.GenreID
+            WHERE g.BookID = b.BookID) as Genres,
+           (SELECT GROUP_CONCAT(DISTINCT CONCAT(an.AvtorID, ',', an.LastName, ' ', an.FirstName, ' ', an.MiddleName) SEPARATOR ',')
+            FROM libavtor a JOIN libavtorname an ON an.AvtorID = a.AvtorID
+            WHERE a.BookID = b.BookID) as Authors,
+           (SELECT bp.File FROM libbpics bp WHERE bp.BookID = b.BookID LIMIT 1) as File,
+           b.FileSize, b.Pages, b.Lang, st.RateAvg, b.BookId,
+           sn.SeqID,
+           (SELECT GROUP_CONCAT(DISTINCT a.AvtorID ORDER BY a.Pos, a.AvtorID)
+            FROM libavtor a
+            WHERE a.BookID = b.BookID) as AuthorIDs
+    FROM libbook b
+    LEFT JOIN book_stats st ON st.BookID = b.BookID
+    LEFT JOIN libseqname sn ON sn.SeqID = (
+        SELECT s.SeqID FROM libseq s WHERE s.BookID = b.BookID ORDER BY s.Level, s.SeqID LIMIT 1)
+    WHERE b.BookID IN ({placeholders})
+"""
+
+SQL_QUERY_BOOK_DETAILS = """
+    SELECT b.title, ba.Body FROM libbannotations ba 
+    INNER JOIN libbook b ON ba.BookId = b.BookId
+    WHERE ba.BookID = %s
+"""
+
+SQL_QUERY_BOOK_AUTHORS_ID = """
+    SELECT DISTINCT a.AvtorID 
+    FROM libavtor a 
+    WHERE a.BookID = %s
+"""
+
+SQL_QUERY_AUTHOR_NAME = """
+    SELECT an.AvtorID, an.LastName, an.FirstName, an.MiddleName 
+    FROM libavtorname an
+    WHERE an.AvtorID = %s
+    LIMIT 1
+"""
+
+SQL_QUERY_AUTHOR_PHOTO = "SELECT File FROM libapics WHERE AvtorID = %s"
+
+SQL_QUERY_AUTHOR_ANNOTATION = "SELECT title, Body FROM libaannotations WHERE AvtorID = %s"
+
+SQL_QUERY_BOOK_REVIEWS = """
+    SELECT Name, Time, Text 
+    FROM libreviews 
+    WHERE BookID = %s 
+    ORDER BY Time DESC
+"""
+
+# Инкрементальное обновление агрегатов book_stats (полное построение: db_init/zz_41_fill_book_stats.sql)
+SQL_QUERY_BOOK_STATS_STATE = "SELECT MaxRateID, MaxRecID, MaxReviewTime FROM book_stats_state WHERE ID = 1"
+
+SQL_QUERY_BOOK_STATS_WATERMARKS = """
+    SELECT
+        (SELECT COALESCE(MAX(ID), 0) FROM librate),
+        (SELECT COALESCE(MAX(id), 0) FROM librecs),
+        (SELECT MAX(Time) FROM libreviews)
+"""
+
+SQL_CREATE_BOOK_STATS_CHANGED = """
+    CREATE TEMPORARY TABLE book_stats_changed (
+        BookID INT(10) UNSIGNED NOT NULL PRIMARY KEY
+    ) ENGINE=MEMORY
+"""
+
+SQL_DROP_BOOK_STATS_CHANGED = "DROP TEMPORARY TABLE IF EXISTS book_stats_changed"
+
+# Книги с новыми оценками, рекомендациями или отзывами после прошлого обновления
+SQL_FILL_BOOK_STATS_CHANGED = """
+    INSERT IGNORE INTO book_stats_changed (BookID)
+    SELECT BookId FROM librate WHERE ID > %s
+    UNION SELECT bid FROM librecs WHERE id > %s
+    UNION SELECT BookId FROM libreviews WHERE Time >= %s
+"""
+
+SQL_REFRESH_BOOK_STATS = """
+    INSERT INTO book_stats (BookID, RateAvg, LibRate, RateCount, RecsCount, ReviewsCount, PopCount,
+                            LastRecTime, LastReviewTime, LastActivity)
+    SELECT
+        t.BookID,
+        t.RateAvg,
+        ROUND(COALESCE(t.RateAvg, 0)),
+        t.RateCount,
+        t.RecsCount,
+        t.ReviewsCount,
+        t.RateCount + t.RecsCount + t.ReviewsCount,
+        t.LastRecTime,
+        t.LastReviewTime,
+        case
+          when t.LastRecTime is null then t.LastReviewTime
+          when t.LastReviewTime is null then t.LastRecTime
+          else GREATEST(t.LastRecTime, t.LastReviewTime)
+        end
+    FROM (
+        SELECT
+            c.BookID,
+            (SELECT AVG(CAST(Rate AS SIGNED)) FROM librate WHERE BookId = c.BookID) as RateAvg,
+            (SELECT COUNT(DISTINCT ID) FROM librate WHERE BookId = c.BookID) as RateCount,
+            (SELECT COUNT(DISTINCT id) FROM librecs WHERE bid = c.BookID) as RecsCount,
+            (SELECT MAX(timestamp) FROM librecs WHERE bid = c.BookID) as LastRecTime,
+            (SELECT COUNT(DISTINCT Time) FROM libreviews WHERE BookId = c.BookID) as ReviewsCount,
+            (SELECT MAX(Time) FROM libreviews WHERE BookId = c.BookID) as LastReviewTime
+        FROM book_stats_changed c
+    ) t
+    ON DUPLICATE KEY UPDATE
+        RateAvg = VALUES(RateAvg),
+        LibRate = VALUES(LibRate),
+        RateCount = VALUES(RateCount),
+        RecsCount = VALUES(RecsCount),
+        ReviewsCount = VALUES(ReviewsCount),
+        PopCount = VALUES(PopCount),
+        LastRecTime = VALUES(LastRecTime),
+        LastReviewTime = VALUES(LastReviewTime),
+        LastActivity = VALUES(LastActivity)
+"""
+
+# Рейтинг в таблице поиска книг берётся из book_stats
+SQL_REFRESH_SEARCH_RATE = """
+    UPDATE libbook_search bs
+    JOIN book_stats_changed c ON c.BookID = bs.BookID
+    JOIN book_stats st ON st.BookID = bs.BookID
+    SET bs.LibRate = st.LibRate
+"""
+
+# Число книг авторов по фильтрам (libavtor_stats) пересчитывается целиком
+# для авторов книг с изменившимся рейтингом
+SQL_DELETE_AUTHOR_STATS = """
+    DELETE st FROM libavtor_stats st
+    JOIN (
+        SELECT DISTINCT a.AvtorID FROM libavtor a JOIN book_stats_changed c ON c.BookID = a.BookID
+    ) ch ON ch.AvtorID = st.AvtorID
+"""
+
+SQL_FILL_AUTHOR_STATS = """
+    INSERT INTO libavtor_stats (AvtorID, SearchLang, BookSizeCat, LibRate, BookCount)
+    SELECT a.AvtorID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate, COUNT(DISTINCT bs.BookID)
+    FROM (
+        SELECT DISTINCT a.AvtorID FROM libavtor a JOIN book_stats_changed c ON c.BookID = a.BookID
+    ) ch
+    JOIN libavtor a ON a.AvtorID = ch.AvtorID
+    JOIN libbook_search bs ON bs.BookID = a.BookID
+    GROUP BY a.AvtorID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate
+"""
+
+# То же для серий: счётчики libseq_stats и средний рейтинг в libseq_search
+SQL_DELETE_SERIES_STATS = """
+    DELETE st FROM libseq_stats st
+    JOIN (
+        SELECT DISTINCT s.SeqID FROM libseq s JOIN book_stats_changed c ON c.BookID = s.BookID
+    ) ch ON ch.SeqID = st.SeqID
+"""
+
+SQL_FILL_SERIES_STATS = """
+    INSERT INTO libseq_stats (SeqID, SearchLang, BookSizeCat, LibRate, BookCount)
+    SELECT s.SeqID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate, COUNT(DISTINCT bs.BookID)
+    FROM (
+        SELECT DISTINCT s.SeqID FROM libseq s JOIN book_stats_changed c ON c.BookID = s.BookID
+    ) ch
+    JOIN libseq s ON s.SeqID = ch.SeqID
+    JOIN libbook_search bs ON bs.BookID = s.BookID
+    GROUP BY s.SeqID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate
+"""
+
+SQL_REFRESH_SERIES_RATE = """
+    UPDATE libseq_search sq
+    JOIN (
+        SELECT s.SeqID, AVG(st.RateAvg) as RateAvg
+        FROM (
+            SELECT DISTINCT s.SeqID FROM libseq s JOIN book_stats_changed c ON c.BookID = s.BookID
+        ) ch
+        JOIN libseq s ON s.SeqID = ch.SeqID
+        JOIN libbook_search bs ON bs.BookID = s.BookID
+        LEFT JOIN book_stats st ON st.BookID = s.BookID
+        GROUP BY s.SeqID
+    ) r ON r.SeqID = sq.SeqID
+    SET sq.RateAvg = r.RateAvg
+"""
+
+SQL_UPDATE_BOOK_STATS_STATE = """
+    REPLACE INTO book_stats_state (ID, MaxRateID, MaxRecID, MaxReviewTime, UpdatedAt)
+    VALUES (1, %s, %s, %s, NOW())
+"""
+
+# Инкрементальное обновление документов полнотекстового поиска libbook_fts
+# (полное построение: db_init/zz_40_fill_FT.sql). Книги обходятся диапазонами BookID по FT_REFRESH_BATCH
+FT_REFRESH_BATCH = int(os.getenv('FT_REFRESH_BATCH', 20000))
+
+SQL_QUERY_FTS_MAX_BOOK_ID = """
+    SELECT GREATEST((SELECT COALESCE(MAX(BookID), 0) FROM libbook), (SELECT COALESCE(MAX(BookID), 0) FROM libbook_fts))
+"""
+
+SQL_CREATE_FTS_CHANGED = """
+    CREATE TEMPORARY TABLE libbook_fts_changed (
+        BookID INT(10) UNSIGNED NOT NULL PRIMARY KEY,
+        Sig INT(10) UNSIGNED NOT NULL
+    ) ENGINE=MEMORY
+"""
+
+SQL_DROP_FTS_CHANGED = """
+    DROP TEMPORARY TABLE IF EXISTS libbook_fts_changed, libbook_fts_affected, libbook_fts_authors, libbook_fts_series
+"""
+
+# Книги диапазона, строки которых в таблицах поиска меняются (изменённые и удалённые),
+# и их авторы и серии: счётчики и имена в libavtor_*/libseq_* пересчитываются для них целиком
+SQL_CREATE_FTS_AFFECTED = (
+    """
+    CREATE TEMPORARY TABLE libbook_fts_affected (
+        BookID INT(10) UNSIGNED NOT NULL PRIMARY KEY
+    ) ENGINE=MEMORY
+    """,
+    """
+    CREATE TEMPORARY TABLE libbook_fts_authors (
+        AvtorID INT(10) UNSIGNED NOT NULL PRIMARY KEY
+    ) ENGINE=MEMORY
+    """,
+    """
+    CREATE TEMPORARY TABLE libbook_fts_series (
+        SeqID INT(10) UNSIGNED NOT NULL PRIMARY KEY
+    ) ENGINE=MEMORY
+    """,
+)
+
+SQL_CLEAR_FTS_CHANGED = (
+    "DELETE FROM libbook_fts_changed",
+    "DELETE FROM libbook_fts_affected",
+    "DELETE FROM libbook_fts_authors",
+    "DELETE FROM libbook_fts_series",
+)
+
+# Новые книги диапазона и книги, у которых изменились libbook.Time, название, год, язык, размер файла,
+# авторы, серии или жанры:
+# подпись исходных данных не совпадает с запомненной в libbook_fts_sig
+SQL_FILL_FTS_CHANGED = """
+    INSERT INTO libbook_fts_changed (BookID, Sig)
+    SELECT c.BookID, c.Sig
+    FROM (
+        SELECT
+            b.BookID,
+            CRC32(CONCAT_WS('|', b.Time, b.Title, b.Year, b.Lang, b.FileSize,
+                            COALESCE(a.Sig, ''), COALESCE(s.Sig, ''), COALESCE(g.Sig, ''))) as Sig
+        FROM libbook b
+        LEFT JOIN (
+            SELECT a.BookID, BIT_XOR(CRC32(CONCAT_WS('|', a.AvtorID, an.LastName, an.FirstName, an.MiddleName))) as Sig
+            FROM libavtor a
+            LEFT JOIN libavtorname an ON an.AvtorID = a.AvtorID
+            WHERE a.BookID BETWEEN %(first)s AND %(last)s
+            GROUP BY a.BookID
+        ) a ON a.BookID = b.BookID
+        LEFT JOIN (
+            SELECT s.BookID, BIT_XOR(CRC32(CONCAT_WS('|', s.SeqID, sn.SeqName))) as Sig
+            FROM libseq s
+            LEFT JOIN libseqname sn ON sn.SeqID = s.SeqID
+            WHERE s.BookID BETWEEN %(first)s AND %(last)s
+            GROUP BY s.BookID
+        ) s ON s.BookID = b.BookID
+        LEFT JOIN (
+            SELECT g.BookID, BIT_XOR(CRC32(CONCAT_WS('|', g.GenreID, gl.GenreDesc))) as Sig
+            FROM libgenre g
+            LEFT JOIN libgenrelist gl ON gl.GenreID = g.GenreID
+            WHERE g.BookID BETWEEN %(first)s AND %(last)s
+            GROUP BY g.BookID
+        ) g ON g.BookID = b.BookID
+        WHERE b.BookID BETWEEN %(first)s AND %(last)s AND b.Deleted = '0'
+    ) c
+    LEFT JOIN libbook_fts_sig fs ON fs.BookID = c.BookID
+    WHERE fs.Sig IS NULL OR fs.Sig <> c.Sig
+"""
+
+# Документы изменённых книг - то же выражение, что в db_init/zz_40_fill_FT.sql
+SQL_REFRESH_FTS = """
+    INSERT INTO libbook_fts (BookID, FT)
+    SELECT
+        d.BookID,
+        CONCAT_WS(' ',
+            d.FT,
+            NULLIF(search_translit_lat(d.Authors), d.Authors),
+            NULLIF(search_translit_cyr(d.Authors), d.Authors)
+        ) as FT
+    FROM (
+        SELECT
+            b.BookID,
+            REPLACE(LOWER(CONCAT_WS(' ',
+                b.Title,
+                case when b.Year between 1600 and 2100 then b.`Year`
+                     else ''
+                end,
+                GROUP_CONCAT(DISTINCT CONCAT_WS(' ', an.LastName, an.FirstName, an.MiddleName)),
+                GROUP_CONCAT(DISTINCT sn.SeqName),
+                GROUP_CONCAT(DISTINCT gl.GenreDesc)
+            )), 'ё', 'е') as FT,
+            REPLACE(LOWER(GROUP_CONCAT(DISTINCT CONCAT_WS(' ', an.LastName, an.FirstName, an.MiddleName))), 'ё', 'е') as Authors
+        FROM libbook_fts_changed c
+        JOIN libbook b ON b.BookID = c.BookID
+        LEFT JOIN libavtor a ON a.BookID = b.BookID
+        LEFT JOIN libavtorname an ON a.AvtorID = an.AvtorID
+        LEFT JOIN libseq s ON s.BookID = b.BookID
+        LEFT JOIN libseqname sn ON s.SeqID = sn.SeqID
+        LEFT JOIN libgenre g ON g.BookID = b.BookID
+        LEFT JOIN libgenrelist gl ON g.GenreID = gl.GenreID
+        GROUP BY b.BookID
+    ) d
+    ON DUPLICATE KEY UPDATE FT = VALUES(FT)
+"""
+
+SQL_UPDATE_FTS_SIG = """
+    INSERT INTO libbook_fts_sig (BookID, Sig)
+    SELECT BookID, Sig FROM libbook_fts_changed
+    ON DUPLICATE KEY UPDATE Sig = VALUES(Sig)
+"""
+
+SQL_FILL_FTS_AFFECTED_CHANGED = "INSERT INTO libbook_fts_affected (BookID) SELECT BookID FROM libbook_fts_changed"
+
+# Удалённые (Deleted) и исчезнувшие из libbook книги диапазона, ещё остающиеся в поиске
+SQL_FILL_FTS_AFFECTED_DELETED = """
+    INSERT IGNORE INTO libbook_fts_affected (BookID)
+    SELECT x.BookID
+    FROM (
+        SELECT BookID FROM libbook_search WHERE BookID BETWEEN %(first)s AND %(last)s
+        UNION
+        SELECT BookID FROM libbook_fts_sig WHERE BookID BETWEEN %(first)s AND %(last)s
+    ) x
+    LEFT JOIN libbook b ON b.BookID = x.BookID
+    WHERE b.BookID IS NULL OR b.Deleted <> '0'
+"""
+
+# Авторы и серии книг до и после изменения: нынешние - по libavtor/libseq,
+# прежние (первый автор, первая серия) - по ещё не обновлённой libbook_search
+SQL_FILL_FTS_AUTHORS = (
+    """
+    INSERT IGNORE INTO libbook_fts_authors (AvtorID)
+    SELECT a.AvtorID FROM libavtor a JOIN libbook_fts_affected f ON f.BookID = a.BookID
+    """,
+    """
+    INSERT IGNORE INTO libbook_fts_authors (AvtorID)
+    SELECT bs.AuthorID FROM libbook_search bs JOIN libbook_fts_affected f ON f.BookID = bs.BookID
+    WHERE bs.AuthorID IS NOT NULL
+    """,
+)
+
+SQL_FILL_FTS_SERIES = (
+    """
+    INSERT IGNORE INTO libbook_fts_series (SeqID)
+    SELECT s.SeqID FROM libseq s JOIN libbook_fts_affected f ON f.BookID = s.BookID
+    """,
+    """
+    INSERT IGNORE INTO libbook_fts_series (SeqID)
+    SELECT bs.SeriesID FROM libbook_search bs JOIN libbook_fts_affected f ON f.BookID = bs.BookID
+    WHERE bs.SeriesID IS NOT NULL
+    """,
+)
+
+# Строки поиска книг изменённых книг - то же выражение, что в db_init/zz_42_fill_search.sql
+SQL_REFRESH_SEARCH = """
+    INSERT INTO libbook_search (BookID, SearchLang, Title, BookSize, SearchYear, BookSizeCat,
+                                AuthorID, LastName, FirstName, MiddleName, Genre, SeriesID, SeriesTitle, LibRate)
+    SELECT
+        b.BookID,
+        upper(b.Lang),
+        b.Title,
+        b.FileSize,
+        b.Year,
+        case
+          when b.FileSize <= 800 * 1024 then 'less800'
+          when b.FileSize > 800 * 1024 then 'more800'
+        end,
+        an.AvtorID,
+        an.LastName,
+        an.FirstName,
+        an.MiddleName,
+        gl.GenreDesc,
+        sn.SeqID,
+        sn.SeqName,
+        COALESCE(st.LibRate, 0)
+    FROM libbook_fts_changed c
+    JOIN libbook b ON b.BookID = c.BookID
+    LEFT JOIN (
+        SELECT BookID, MIN(AvtorID) as AvtorID FROM libavtor
+        WHERE BookID BETWEEN %(first)s AND %(last)s GROUP BY BookID
+    ) a ON a.BookID = b.BookID
+    LEFT JOIN libavtorname an ON an.AvtorID = a.AvtorID
+    LEFT JOIN (
+        SELECT BookID, MIN(GenreID) as GenreID FROM libgenre
+        WHERE BookID BETWEEN %(first)s AND %(last)s GROUP BY BookID
+    ) g ON g.BookID = b.BookID
+    LEFT JOIN libgenrelist gl ON gl.GenreID = g.GenreID
+    LEFT JOIN (
+        SELECT BookID, MIN(SeqID) as SeqID FROM libseq
+        WHERE BookID BETWEEN %(first)s AND %(last)s GROUP BY BookID
+    ) s ON s.BookID = b.BookID
+    LEFT JOIN libseqname sn ON sn.SeqID = s.SeqID
+    LEFT JOIN book_stats st ON st.BookID = b.BookID
+    ON DUPLICATE KEY UPDATE
+        SearchLang = VALUES(SearchLang),
+        Title = VALUES(Title),
+        BookSize = VALUES(BookSize),
+        SearchYear = VALUES(SearchYear),
+        BookSizeCat = VALUES(BookSizeCat),
+        AuthorID = VALUES(AuthorID),
+        LastName = VALUES(LastName),
+        FirstName = VALUES(FirstName),
+        MiddleName = VALUES(MiddleName),
+        Genre = VALUES(Genre),
+        SeriesID = VALUES(SeriesID),
+        SeriesTitle = VALUES(SeriesTitle),
+        LibRate = VALUES(LibRate)
+"""
+
+SQL_DELETE_SEARCH = """
+    DELETE bs FROM libbook_search bs
+    LEFT JOIN libbook b ON b.BookID = bs.BookID
+    WHERE bs.BookID BETWEEN %s AND %s AND (b.BookID IS NULL OR b.Deleted <> '0')
+"""
+
+# Авторы изменённых книг: счётчики, имя и имя для поиска с транслитерацией - как в db_init/zz_43_fill_author_search.sql
+SQL_REFRESH_FTS_AUTHORS = (
+    "DELETE st FROM libavtor_stats st JOIN libbook_fts_authors ch ON ch.AvtorID = st.AvtorID",
+    """
+    INSERT INTO libavtor_stats (AvtorID, SearchLang, BookSizeCat, LibRate, BookCount)
+    SELECT a.AvtorID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate, COUNT(DISTINCT bs.BookID)
+    FROM libbook_fts_authors ch
+    JOIN libavtor a ON a.AvtorID = ch.AvtorID
+    JOIN libbook_search bs ON bs.BookID = a.BookID
+    GROUP BY a.AvtorID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate
+    """,
+    "DELETE s FROM libavtor_search s JOIN libbook_fts_authors ch ON ch.AvtorID = s.AvtorID",
+    """
+    INSERT IGNORE INTO libavtor_search (AvtorID, AuthorName, SearchName)
+    SELECT
+        n.AvtorID,
+        n.AuthorName,
+        CONCAT_WS(' ',
+            n.AuthorName,
+            NULLIF(search_translit_lat(n.Authors), n.Authors),
+            NULLIF(search_translit_cyr(n.Authors), n.Authors)
+        )
+    FROM (
+        SELECT
+            an.AvtorID,
+            CONCAT(COALESCE(an.LastName, ''), ' ', COALESCE(an.FirstName, ''), ' ', COALESCE(an.MiddleName, ''))
+                as AuthorName,
+            REPLACE(LOWER(CONCAT_WS(' ', an.LastName, an.FirstName, an.MiddleName)), 'ё', 'е') as Authors
+        FROM libbook_fts_authors ch
+        JOIN libavtorname an ON an.AvtorID = ch.AvtorID
+        WHERE (an.LastName <> '' OR an.FirstName <> '' OR an.MiddleName <> '')
+          AND EXISTS (SELECT 1 FROM libavtor_stats st WHERE st.AvtorID = an.AvtorID)
+    ) n
+    """,
+)
+
+# Серии изменённых книг: счётчики, название, первый автор (с транслитерацией) и рейтинг -
+# как в db_init/zz_44_fill_series_search.sql
+SQL_REFRESH_FTS_SERIES = (
+    "DELETE st FROM libseq_stats st JOIN libbook_fts_series ch ON ch.SeqID = st.SeqID",
+    """
+    INSERT INTO libseq_stats (SeqID, SearchLang, BookSizeCat, LibRate, BookCount)
+    SELECT s.SeqID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate, COUNT(DISTINCT bs.BookID)
+    FROM libbook_fts_series ch
+    JOIN libseq s ON s.SeqID = ch.SeqID
+    JOIN libbook_search bs ON bs.BookID = s.BookID
+    GROUP BY s.SeqID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate
+    """,
+    "DELETE sq FROM libseq_search sq JOIN libbook_fts_series ch ON ch.SeqID = sq.SeqID",
+    """
+    INSERT INTO libseq_search (SeqID, SeriesTitle, AuthorName, RateAvg)
+    SELECT
+        n.SeqID,
+        n.SeriesTitle,
+        CONCAT_WS(' ',
+            n.AuthorName,
+            NULLIF(search_translit_lat(n.Authors), n.Authors),
+            NULLIF(search_translit_cyr(n.Authors), n.Authors)
+        ),
+        n.RateAvg
+    FROM (
+        SELECT
+            sn.SeqID,
+            sn.SeqName as SeriesTitle,
+            CONCAT(COALESCE(fb.LastName, ''), ' ', COALESCE(fb.FirstName, ''), ' ', COALESCE(fb.MiddleName, ''))
+                as AuthorName,
+            REPLACE(LOWER(CONCAT_WS(' ', fb.LastName, fb.FirstName, fb.MiddleName)), 'ё', 'е') as Authors,
+            r.RateAvg
+        FROM libseqname sn
+        JOIN (
+            SELECT s.SeqID, MIN(s.BookID) as FirstBookID, AVG(st.RateAvg) as RateAvg
+            FROM libbook_fts_series ch
+            JOIN libseq s ON s.SeqID = ch.SeqID
+            JOIN libbook_search bs ON bs.BookID = s.BookID
+            LEFT JOIN book_stats st ON st.BookID = s.BookID
+            GROUP BY s.SeqID
+        ) r ON r.SeqID = sn.SeqID
+        LEFT JOIN libbook_search fb ON fb.BookID = r.FirstBookID
+        WHERE sn.SeqName <> ''
+    ) n
+    """,
+)
+
+# Удалённые (Deleted) и исчезнувшие из libbook книги диапазона
+SQL_DELETE_FTS = """
+    DELETE f FROM libbook_fts f
+    LEFT JOIN libbook b ON b.BookID = f.BookID
+    WHERE f.BookID BETWEEN %s AND %s AND (b.BookID IS NULL OR b.Deleted <> '0')
+"""
+
+SQL_DELETE_FTS_SIG = """
+    DELETE fs FROM libbook_fts_sig fs
+    LEFT JOIN libbook b ON b.BookID = fs.BookID
+    WHERE fs.BookID BETWEEN %s AND %s AND (b.BookID IS NULL OR b.Deleted <> '0')
+"""
+
+# Готовые списки новинок и популярного (book_leaderboard, db_init/zz_35_create_leaderboard.sql).
+# Board - период в днях, как days_back в запросах популярного: 0 - новинки, 999 - за всё время
+LEADERBOARD_BOARDS = (0, 7, 30, 999)
+# Глубина списка на каждый язык: запас под фильтры размера и рейтинга, применяемые при чтении
+LEADERBOARD_DEPTH = int(os.getenv('LEADERBOARD_DEPTH', 5000))
+# Глубина списка раздела жанров на каждый язык: разделов несколько десятков, списки короче
+LEADERBOARD_GENRE_DEPTH = int(os.getenv('LEADERBOARD_GENRE_DEPTH', 1000))
+
+# Версия исходных данных списков: версия библиотеки и отметки обновления book_stats
+SQL_QUERY_LEADERBOARD_SOURCE = """
+    SELECT CONCAT_WS('|',
+        COALESCE(lm.ContentVersion, (SELECT MAX(Time) FROM libbook)),
+        st.MaxRateID, st.MaxRecID, st.MaxReviewTime)
+    FROM (SELECT 1) d
+    LEFT JOIN library_meta lm ON lm.ID = 1
+    LEFT JOIN book_stats_state st ON st.ID = 1
+"""
+
+SQL_QUERY_LEADERBOARD_STATE = "SELECT SourceVersion FROM book_leaderboard_state WHERE ID = 1"
+
+SQL_DELETE_LEADERBOARD = "DELETE FROM book_leaderboard WHERE Board = %s"
+
+# Список строится по всем книгам периода: по каждому языку ({partition} по SearchLang)
+# или по всем языкам сразу (SearchLang = ''), по всем разделам жанров (GenreMeta = '')
+# или по каждому разделу ({genre_join} - разделы жанров книги, {partition} и по GenreMeta)
+SQL_FILL_LEADERBOARD = """
+    INSERT INTO book_leaderboard (Board, SearchLang, GenreMeta, Position, BookID, Relevance)
+    SELECT %s, t.SearchLang, t.GenreMeta, t.Position, t.BookID, t.relevance
+    FROM (
+        SELECT
+            p.BookID,
+            p.relevance,
+            {search_lang} as SearchLang,
+            {genre_meta} as GenreMeta,
+            ROW_NUMBER() OVER ({partition} ORDER BY p.relevance DESC, p.relevance_oppos DESC, p.BookID DESC) as Position
+        FROM ( {sql_query_nested} ) p
+        JOIN libbook_search bs ON bs.BookID = p.BookID
+        {genre_join}
+    ) t
+    WHERE t.Position <= %s
+"""
+
+# Разделы жанров книги без повторов (у книги может быть несколько жанров одного раздела)
+SQL_JOIN_LEADERBOARD_GENRES = """
+        JOIN (
+            SELECT DISTINCT g.BookID, gl.GenreMeta
+            FROM libgenre g
+            JOIN libgenrelist gl ON gl.GenreID = g.GenreID
+        ) gm ON gm.BookID = p.BookID
+"""
+
+# Варианты списков: (язык, раздел, partition, JOIN разделов, глубина)
+LEADERBOARD_VARIANTS = (
+    ('bs.SearchLang', "''", 'PARTITION BY bs.SearchLang', '', LEADERBOARD_DEPTH),
+    ("''", "''", '', '', LEADERBOARD_DEPTH),
+    ('bs.SearchLang', 'gm.GenreMeta', 'PARTITION BY bs.SearchLang, gm.GenreMeta', SQL_JOIN_LEADERBOARD_GENRES,
+     LEADERBOARD_GENRE_DEPTH),
+    ("''", 'gm.GenreMeta', 'PARTITION BY gm.GenreMeta', SQL_JOIN_LEADERBOARD_GENRES, LEADERBOARD_GENRE_DEPTH),
+)
+
+SQL_UPDATE_LEADERBOARD_STATE = """
+    REPLACE INTO book_leaderboard_state (ID, SourceVersion, UpdatedAt)
+    VALUES (1, %s, NOW())
+"""
+
+# Подсказки при пустом результате поиска (lib_fuzzy_words, db_init/zz_38_create_fuzzy.sql).
+# Слово переводится в небинарную кодировку, чтобы драйвер вернул строку, а не байты
+SQL_QUERY_FUZZY_KNOWN = """
+    SELECT CONVERT(Word USING utf8mb3)
+    FROM lib_fuzzy_words
+    WHERE Word IN ({placeholders}) AND Kinds & %s
+"""
+
+# Кандидаты в исправления слова: слова близкой длины с наибольшим числом общих триграмм.
+# Время запроса ограничено (SQL_STATEMENT_TIME_LIMIT): частые триграммы (начала слов) могут дать длинный диапазон индекса
+SQL_STATEMENT_TIME_LIMIT = "SET STATEMENT max_statement_time = {max_statement_time} FOR "
+
+SQL_QUERY_FUZZY_CANDIDATES = """
+    SELECT CONVERT(w.Word USING utf8mb3), w.TrigramCount, COUNT(*) as Shared, w.Freq
+    FROM lib_fuzzy_trigrams t
+    JOIN lib_fuzzy_words w ON w.WordID = t.WordID
+    WHERE t.Trigram IN ({placeholders}) AND t.Len BETWEEN %s AND %s AND w.Kinds & %s
+    GROUP BY t.WordID
+    HAVING Shared >= %s
+    ORDER BY Shared DESC, w.Freq DESC
+    LIMIT %s
 """
 
 SQL_QUERY_USER_SETTINGS_GET = """
@@ -766,594 +1393,896 @@ class DatabaseSettings(Database):
 # Класс для работы с БД библиотеки
 class DatabaseBooks():
     _class_cached_langs = None
-    _class_cached_parent_genres = None
-    _class_cached_genres = {}  # Словарь для кеширования жанров по родительским категориям
+    _class_cached_parent_genres = {}  # Родительские жанры по языкам
+    _class_cached_genres = {}  # Словарь для кеширования жанров по (родительской категории, языку)
     _class_stats = {}  # Статистика по библиотеке
+    _class_library_version = None  # Версия библиотеки, для которой заполнены кеши выше
+    _class_leaderboard_version = None  # Версия готовых списков популярного (None - списки не построены)
 
-    def __init__(self, db_config):
+    def __init__(self, db_config, pool_config=None):
         self.db_config = db_config
         self._connection = None
+        # Пул соединений (size = 0 - без пула, соединение на каждый запрос)
+        self.pool_config = pool_config or {}
+        self._pool = ConnectionPool(db_config, **self.pool_config) if self.pool_config.get('size', 0) > 0 else None
 
     @contextmanager
     def connect(self):
-        """Устанавливает соединение с MariaDB"""
+        """Выдаёт соединение с MariaDB из пула (или открывает новое, если пул отключен)"""
+        if self._pool is not None:
+            with self._pool.connection() as conn:
+                yield conn
+            return
+
         conn = mysql.connector.connect(**self.db_config)
         try:
             yield conn
         finally:
             conn.close()
 
+    @staticmethod
+    def begin_transaction(conn):
+        """
+        Открывает явную транзакцию: соединения пула работают в autocommit, без пула транзакция
+        уже может быть открыта неявно. Незавершённую транзакцию откатывает пул при возврате соединения
+        """
+        if not conn.in_transaction:
+            conn.start_transaction()
+
+    def get_pool_stats(self):
+        """Статистика пула соединений (None, если пул отключен)"""
+        return self._pool.get_stats() if self._pool is not None else None
+
+    def _fetchall(self, sql_query, params=None):
+        """Выполняет запрос и возвращает все строки"""
+        with self.connect() as conn:
+            cursor = conn.cursor(buffered=True)
+            cursor.execute(sql_query, params)
+            return cursor.fetchall()
+
+    def _fetchone(self, sql_query, params=None):
+        """Выполняет запрос и возвращает первую строку"""
+        with self.connect() as conn:
+            cursor = conn.cursor(buffered=True)
+            cursor.execute(sql_query, params)
+            return cursor.fetchone()
+
 
     @property
     def lib_last_update(self):
         return self.get_library_stats().get('last_update')
 
+    @staticmethod
+    def make_library_stats(books_stats, counts):
+        """Собирает словарь статистики библиотеки из результатов запросов"""
+        return {
+            'last_update': books_stats[0],
+            'books_count': books_stats[1],
+            'max_filename': books_stats[2],
+            'authors_count': counts[0],
+            'genres_count': counts[1],
+            'series_count': counts[2],
+            'languages_count': counts[3]
+        }
+
+    @staticmethod
+    def empty_library_stats():
+        """Статистика-заглушка, если БД недоступна"""
+        return {
+            'last_update': None,
+            'books_count': 0,
+            'max_filename': 'N/A',
+            'authors_count': 0,
+            'genres_count': 0,
+            'series_count': 0,
+            'languages_count': 0
+        }
+
+    def _read_library_stats(self, cursor):
+        """Статистика библиотеки: снимок library_meta или, если его нет, подсчёт по таблицам"""
+        cursor.execute(SQL_QUERY_LIBRARY_META)
+        meta = cursor.fetchone()
+        if meta:
+            return self.make_library_stats(meta[:3], meta[3:])
+
+        cursor.execute(SQL_QUERY_LIBRARY_STATS)
+        books_stats = cursor.fetchone()
+        cursor.execute(SQL_QUERY_LIBRARY_COUNTS)
+        return self.make_library_stats(books_stats, cursor.fetchone())
+
     def get_library_stats(self):
         """Возвращает статистику библиотеки"""
         try:
-            if not self._class_stats:
+            if not DatabaseBooks._class_stats:
                 with self.connect() as conn:
-                    cursor = conn.cursor()
-
-                    # Статистика книг
-                    cursor.execute("""
-                        SELECT 
-                            MAX(date(time)) as max_update_date,
-                            COUNT(*) as books_cnt,
-                            MAX(bookid) as max_filename
-                        FROM libbook b
-                        where b.Deleted = '0'
-                    """)
-                    books_stats = cursor.fetchone()
-
-                    # Количество авторов
-                    cursor.execute("SELECT COUNT(*) FROM libavtorname")
-                    authors_cnt = cursor.fetchone()[0]
-
-                    # Количество жанров
-                    cursor.execute("SELECT COUNT(*) FROM libgenrelist")
-                    genres_cnt = cursor.fetchone()[0]
-
-                    # Количество серий
-                    cursor.execute("SELECT COUNT(*) FROM libseqname")
-                    series_cnt = cursor.fetchone()[0]
-
-                    # Количество языков
-                    cursor.execute("SELECT COUNT(DISTINCT Lang) FROM libbook WHERE Deleted = '0'")
-                    langs_cnt = cursor.fetchone()[0]
-
-                    self._class_stats = {
-                        'last_update': books_stats[0],
-                        'books_count': books_stats[1],
-                        'max_filename': books_stats[2],
-                        'authors_count': authors_cnt,
-                        'genres_count': genres_cnt,
-                        'series_count': series_cnt,
-                        'languages_count': langs_cnt
-                    }
-
-            return self._class_stats
+                    DatabaseBooks._class_stats = self._read_library_stats(conn.cursor(buffered=True))
+
+            return DatabaseBooks._class_stats
 
         except Exception as e:
             print(f"Error getting library stats: {e}")
-            return {
-                'last_update': None,
-                'books_count': 0,
-                'max_filename': 'N/A',
-                'authors_count': 0,
-                'genres_count': 0,
-                'series_count': 0,
-                'languages_count': 0
-            }
+            return self.empty_library_stats()
 
 
-    def get_parent_genres_with_counts(self):
+    def get_parent_genres_with_counts(self, lang=''):
         """Получает родительские жанры с кешированием"""
-        if DatabaseBooks._class_cached_parent_genres is None:
-            with self.connect() as conn:
-                cursor = conn.cursor(buffered=True)
-                cursor.execute(SQL_QUERY_PARENT_GENRES_COUNT)
-                DatabaseBooks._class_cached_parent_genres = cursor.fetchall()
-        return DatabaseBooks._class_cached_parent_genres
+        lang = (lang or '').upper()
+        if lang not in DatabaseBooks._class_cached_parent_genres:
+            DatabaseBooks._class_cached_parent_genres[lang] = self._fetchall(SQL_QUERY_PARENT_GENRES_COUNT, (lang, lang))
+        return DatabaseBooks._class_cached_parent_genres[lang]
 
 
-    def get_genres_with_counts(self, parent_genre):
-        if parent_genre not in DatabaseBooks._class_cached_genres:
-            with self.connect() as conn:
-                cursor = conn.cursor(buffered=True)
-                cursor.execute(SQL_QUERY_CHILDREN_GENRES_COUNT, (parent_genre,))
-                results = cursor.fetchall()
-                DatabaseBooks._class_cached_genres[parent_genre] = results #[(genre[0].strip(), genre[1]) for genre in results if genre[0].strip()]
-        return DatabaseBooks._class_cached_genres[parent_genre]
+    def get_genres_with_counts(self, parent_genre, lang=''):
+        lang = (lang or '').upper()
+        if (parent_genre, lang) not in DatabaseBooks._class_cached_genres:
+            results = self._fetchall(SQL_QUERY_CHILDREN_GENRES_COUNT, (parent_genre, lang, lang))
+            DatabaseBooks._class_cached_genres[(parent_genre, lang)] = results
+        return DatabaseBooks._class_cached_genres[(parent_genre, lang)]
 
 
     def get_langs(self):
         """Получает языки с кешированием"""
         if DatabaseBooks._class_cached_langs is None:
-            with self.connect() as conn:
-                cursor = conn.cursor(buffered=True)
-                cursor.execute(SQL_QUERY_LANGS)
-                DatabaseBooks._class_cached_langs = cursor.fetchall()
+            DatabaseBooks._class_cached_langs = self._fetchall(SQL_QUERY_LANGS)
         return DatabaseBooks._class_cached_langs
 
 
-    def search_books(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
-        """Ищем книги по запросу пользователя"""
-        sql_where = self.build_sql_where_ft(lang, size_limit, rating_filter, series_id, author_id)
-        # Строим запросы для поиска книг и подсчёта количества найденных книг
-        sql_query = self.build_sql_query_books(sql_where, 'desc', search_area)
+    @staticmethod
+    def reset_library_caches():
+        """Сбрасывает кеши статистики, жанров и языков: они перечитываются при следующем обращении"""
+        DatabaseBooks._class_stats = {}
+        DatabaseBooks._class_cached_langs = None
+        DatabaseBooks._class_cached_parent_genres = {}
+        DatabaseBooks._class_cached_genres = {}
 
-        params = []
+    @staticmethod
+    def apply_library_version(version):
+        """Запоминает версию библиотеки; при её смене сбрасывает кеши. Возвращает True, если версия сменилась"""
+        changed = DatabaseBooks._class_library_version is not None and version != DatabaseBooks._class_library_version
+        if changed:
+            DatabaseBooks.reset_library_caches()
+        DatabaseBooks._class_library_version = version
+        return changed
+
+    def check_library_version(self):
+        """Проверяет, обновилась ли библиотека (импорт новой базы), и сбрасывает кеши при обновлении"""
+        return self.apply_library_version(self._fetchone(SQL_QUERY_LIBRARY_VERSION)[0])
+
+
+    @classmethod
+    def build_books_match(cls, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Внутренний запрос поиска книг (BookID, Relevance) с фильтрами пользователя и его параметры"""
+        if series_id != 0:
+            # Книги выбранной серии - по индексу серий, запрос пользователя уже не нужен
+            sql_filter, filter_params = cls.build_sql_filter_search(lang, size_limit, rating_filter, author_id=author_id)
+            return SQL_MATCH_SERIES_BOOKS.format(sql_filter=sql_filter), [series_id] + filter_params
+
+        sql_filter, filter_params = cls.build_sql_filter_search(lang, size_limit, rating_filter, series_id, author_id)
         # Пара одинаковых параметров в виде полного запроса для FullText поиска
-        params.extend([query] * 2)
+        return cls.build_sql_query_match(search_area, sql_filter), [query] * 2 + filter_params
+
+    @classmethod
+    def build_search_books(cls, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Строит запрос поиска книг и его параметры"""
+        sql_query_match, params = cls.build_books_match(query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+        sql_query = cls.build_sql_query_search_books(sql_query_match, 'desc')
 
         # #DEBUG
         # print(f"DEBUG: sql_query = {sql_query}")
         # print(f"DEBUG: params = {params}")
 
-        # выполняем запросы поиска книг и подсчёта количества найденных книг
+        return sql_query, params
+
+    def search_books(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Ищем книги по запросу пользователя"""
+        sql_query, params = self.build_search_books(query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+        return [Book(*row) for row in self._fetchall(sql_query, params)]
+
+    @classmethod
+    def build_search_books_page(cls, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B,
+                                series_id=0, author_id=0, page_size=MAX_BOOKS_SEARCH, after=None, offset=0):
+        """
+        Строит запрос одной страницы поиска книг и его параметры.
+        after - ключ (Relevance, BookID) последней книги предыдущей страницы (keyset-пагинация),
+        без него страница выбирается по offset
+        """
+        sql_query_match, params = cls.build_books_match(query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+        sql_keyset = ''
+        if after is not None:
+            relevance, book_id = after
+            sql_keyset = "WHERE m.Relevance < %s OR (m.Relevance = %s AND bs.BookID < %s)"
+            params.extend([relevance, relevance, book_id])
+            offset = 0
+
+        sql_query = cls.build_sql_query_search_books(sql_query_match, 'desc', sql_keyset, page_size, offset)
+        return sql_query, params
+
+    @classmethod
+    def build_count_books(cls, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Строит запрос числа найденных книг и его параметры"""
+        sql_query_match, params = cls.build_books_match(query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+        return cls.build_sql_query_count_books(sql_query_match), params
+
+    def search_books_page(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B,
+                          series_id=0, author_id=0, page_size=MAX_BOOKS_SEARCH, after=None, offset=0, with_count=False):
+        """
+        Ищем одну страницу книг по запросу пользователя.
+        Возвращает (книги страницы, число найденных книг или None, если with_count не задан)
+        """
+        sql_query, params = self.build_search_books_page(query, lang, size_limit, rating_filter, search_area,
+                                                         series_id, author_id, page_size, after, offset)
+        books = [Book(*row) for row in self._fetchall(sql_query, params)]
+
+        found_count = None
+        if with_count and after is None and offset == 0 and len(books) < page_size:
+            # Все найденные книги поместились на первую страницу
+            found_count = len(books)
+        elif with_count:
+            sql_query, params = self.build_count_books(query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+            found_count = min(self._fetchone(sql_query, params)[0], MAX_BOOKS_SEARCH)
+        return books, found_count
+
+
+    def refresh_book_stats(self):
+        """
+        Инкрементально обновляет book_stats (и зависящие от рейтинга libbook_search, libavtor_stats,
+        libseq_stats, libseq_search) по книгам
+        с новыми оценками, рекомендациями или отзывами. Возвращает число обновлённых книг.
+        """
         with self.connect() as conn:
             cursor = conn.cursor(buffered=True)
-            cursor.execute(sql_query, params)
-            books = [Book(*row) for row in cursor.fetchall()]
 
-        return books
+            cursor.execute(SQL_QUERY_BOOK_STATS_STATE)
+            state = cursor.fetchone() or (0, 0, None)
+            # Новые отметки читаем до сбора изменений: строки, добавленные во время
+            # обновления, попадут в следующее обновление
+            cursor.execute(SQL_QUERY_BOOK_STATS_WATERMARKS)
+            watermarks = cursor.fetchone()
+
+            try:
+                cursor.execute(SQL_DROP_BOOK_STATS_CHANGED)
+                cursor.execute(SQL_CREATE_BOOK_STATS_CHANGED)
+                cursor.execute(SQL_FILL_BOOK_STATS_CHANGED, (state[0], state[1], state[2] or '1970-01-01'))
+                changed = cursor.rowcount
+
+                # Одной транзакцией: между DELETE и INSERT счётчики авторов и серий не должны быть видны пустыми
+                self.begin_transaction(conn)
+                if changed > 0:
+                    cursor.execute(SQL_REFRESH_BOOK_STATS)
+                    cursor.execute(SQL_REFRESH_SEARCH_RATE)
+                    cursor.execute(SQL_DELETE_AUTHOR_STATS)
+                    cursor.execute(SQL_FILL_AUTHOR_STATS)
+                    cursor.execute(SQL_DELETE_SERIES_STATS)
+                    cursor.execute(SQL_FILL_SERIES_STATS)
+                    cursor.execute(SQL_REFRESH_SERIES_RATE)
+                cursor.execute(SQL_UPDATE_BOOK_STATS_STATE, watermarks)
+                conn.commit()
+            finally:
+                cursor.execute(SQL_DROP_BOOK_STATS_CHANGED)
 
+        return changed
 
-    async def get_book_info(self, book_id):
-        """Получает основную информацию о книге"""
+    def refresh_fts(self):
+        """
+        Инкрементально обновляет документы полнотекстового поиска libbook_fts и строки поиска книг
+        (libbook_search), авторов (libavtor_search, libavtor_stats) и серий (libseq_search, libseq_stats):
+        пересобирает строки новых и изменённых книг, удаляет строки удалённых. Книги обходятся диапазонами
+        BookID по FT_REFRESH_BATCH, каждый диапазон - отдельная транзакция, поиск всё время остаётся доступен.
+        Возвращает (число обновлённых документов, число удалённых документов).
+        """
+        updated = deleted = 0
         with self.connect() as conn:
             cursor = conn.cursor(buffered=True)
-            cursor.execute("""
-                SELECT b.Title, b.Year, sn.SeqName,
-                       GROUP_CONCAT(DISTINCT CONCAT(gl.GenreID, ',', gl.GenreDesc) SEPARATOR ',') as Genres,
-                       GROUP_CONCAT(DISTINCT CONCAT(an.AvtorID, ',', an.LastName, ' ', an.FirstName, ' ', an.MiddleName) SEPARATOR ',') as Authors,
-                       bp.File, b.FileSize, b.Pages, b.Lang, r.LibRate, b.BookId,
-                       sn.SeqID
-                FROM libbook b
-                LEFT JOIN libavtor a ON a.BookID = b.BookID
-                LEFT JOIN libavtorname an ON a.AvtorID = an.AvtorID
-                LEFT JOIN libseq s ON s.BookID = b.BookID
-                LEFT JOIN libseqname sn ON s.SeqID = sn.SeqID
-                LEFT JOIN libgenre g ON g.BookID = b.BookID
-                LEFT JOIN libgenrelist gl ON g.GenreID = gl.GenreID
-                LEFT JOIN libbpics bp ON b.BookID = bp.BookID
-                left outer join ( 
-                    select 
-                        r.BookId, 
-                        avg(cast(r.Rate as signed)) as Librate
-                    from librate r 
-                    group by r.BookId 
-                    ) r on r.BookId = b.BookId
-                WHERE b.BookID = %s
-                GROUP BY b.Title, b.Year, sn.SeqName, bp.File, b.FileSize, b.Pages, b.Lang
-            """, (book_id,))
-            result = cursor.fetchone()
-            cover_url = FlibustaClient.get_cover_url_direct(result[5]) if result[5] else None
-            # print(f"DEBUG: cover_url = {cover_url}")
-            # Получение ссылки на обложку со страницы книги, если нет в БД
-            if cover_url is None:
-                cover_url = await flibusta_client.get_book_cover_url(book_id)
-                # print(f"DEBUG: cover_url = {cover_url}")
 
-            return {
-                'title': result[0],
-                'year': result[1],
-                'series': result[2],
-                'genres': result[3],
-                'authors': result[4],
-                'cover_url': cover_url,
-                'size': result[6],
-                'pages': result[7],
-                'lang': result[8],
-                'rate': result[9],
-                'bookid': result[10],
-                'seqid': result[11],
-            } if result else None
-
-    async def get_book_details(self, book_id):
-        """Получает детальную информацию о книге с обложкой и аннотацией"""
+            cursor.execute(SQL_QUERY_FTS_MAX_BOOK_ID)
+            max_book_id = cursor.fetchone()[0]
+
+            try:
+                cursor.execute(SQL_DROP_FTS_CHANGED)
+                cursor.execute(SQL_CREATE_FTS_CHANGED)
+                for sql in SQL_CREATE_FTS_AFFECTED:
+                    cursor.execute(sql)
+                for first in range(1, max_book_id + 1, FT_REFRESH_BATCH):
+                    last = first + FT_REFRESH_BATCH - 1
+                    book_range = {'first': first, 'last': last}
+
+                    # Документы и строки поиска диапазона меняются вместе: поиск не видит
+                    # документ без строки libbook_search и наоборот
+                    self.begin_transaction(conn)
+                    for sql in SQL_CLEAR_FTS_CHANGED:
+                        cursor.execute(sql)
+                    cursor.execute(SQL_FILL_FTS_CHANGED, book_range)
+                    changed = cursor.rowcount
+                    cursor.execute(SQL_FILL_FTS_AFFECTED_CHANGED)
+                    cursor.execute(SQL_FILL_FTS_AFFECTED_DELETED, book_range)
+                    if changed > 0 or cursor.rowcount > 0:
+                        for sql in SQL_FILL_FTS_AUTHORS + SQL_FILL_FTS_SERIES:
+                            cursor.execute(sql)
+
+                    if changed > 0:
+                        updated += changed
+                        cursor.execute(SQL_REFRESH_FTS)
+                        cursor.execute(SQL_UPDATE_FTS_SIG)
+                        cursor.execute(SQL_REFRESH_SEARCH, book_range)
+
+                    cursor.execute(SQL_DELETE_FTS, (first, last))
+                    deleted += cursor.rowcount
+                    cursor.execute(SQL_DELETE_FTS_SIG, (first, last))
+                    cursor.execute(SQL_DELETE_SEARCH, (first, last))
+
+                    for sql in SQL_REFRESH_FTS_AUTHORS + SQL_REFRESH_FTS_SERIES:
+                        cursor.execute(sql)
+                    conn.commit()
+            finally:
+                cursor.execute(SQL_DROP_FTS_CHANGED)
+
+        return updated, deleted
+
+    def refresh_leaderboards(self, force=False):
+        """
+        Перестраивает готовые списки новинок и популярного (book_leaderboard), если с прошлого
+        построения обновилась библиотека (library_meta) или book_stats. Списки перестраиваются
+        одной транзакцией: до её фиксации /pop читает прежние списки целиком.
+        Возвращает True, если списки перестроены.
+        """
         with self.connect() as conn:
             cursor = conn.cursor(buffered=True)
 
-            # Получаем аннотацию
-            cursor.execute("""
-                SELECT b.title, ba.Body FROM libbannotations ba 
-                INNER JOIN libbook b ON ba.BookId = b.BookId
-                WHERE ba.BookID = %s
-                """, (book_id,))
-            annotation_result = cursor.fetchone()
+            cursor.execute(SQL_QUERY_LEADERBOARD_SOURCE)
+            source_version = cursor.fetchone()[0]
+            cursor.execute(SQL_QUERY_LEADERBOARD_STATE)
+            state = cursor.fetchone()
+
+            if not force and state and state[0] == source_version:
+                DatabaseBooks._class_leaderboard_version = source_version
+                return False
+
+            # Дата обновления библиотеки - точка отсчёта периодов популярного
+            current_date = self._read_library_stats(cursor)['last_update']
+
+            self.begin_transaction(conn)
+            for board in LEADERBOARD_BOARDS:
+                sql_query_nested = self.build_sql_query_pop_nested(board, current_date, limit=None)
+                cursor.execute(SQL_DELETE_LEADERBOARD, (board,))
+                for search_lang, genre_meta, partition, genre_join, depth in LEADERBOARD_VARIANTS:
+                    cursor.execute(SQL_FILL_LEADERBOARD.format(
+                        search_lang=search_lang, genre_meta=genre_meta, partition=partition, genre_join=genre_join,
+                        sql_query_nested=sql_query_nested), (board, depth))
+            cursor.execute(SQL_UPDATE_LEADERBOARD_STATE, (source_version,))
+            conn.commit()
 
-            return {
-                'title': annotation_result[0],
-                'annotation': annotation_result[1]
-            } if annotation_result else None
+        DatabaseBooks._class_leaderboard_version = source_version
+        # Статистика библиотеки (и lib_last_update) перечитывается при следующем обращении
+        DatabaseBooks._class_stats = {}
+        return True
+
+    @staticmethod
+    def make_book_info(result):
+        """Преобразует строку SQL_QUERY_BOOK_INFO в словарь информации о книге"""
+        # Ссылка на обложку из БД; если её нет, она дополняется со страницы книги асинхронно
+        cover_url = FlibustaClient.get_cover_url_direct(result[5]) if result and result[5] else None
+
+        return {
+            'title': result[0],
+            'year': result[1],
+            'series': result[2],
+            'genres': result[3],
+            'authors': result[4],
+            'cover_url': cover_url,
+            'size': result[6],
+            'pages': result[7],
+            'lang': result[8],
+            'rate': result[9],
+            'bookid': result[10],
+            'seqid': result[11],
+        } if result else None
+
+    def get_book_info(self, book_id):
+        """Получает основную информацию о книге"""
+        return self.make_book_info(self._fetchone(SQL_QUERY_BOOK_INFO, (book_id,)))
+
+    @staticmethod
+    def build_book_cards(book_ids):
+        """Строит запрос карточек книг и его параметры"""
+        return SQL_QUERY_BOOK_CARDS.format(placeholders=', '.join(['%s'] * len(book_ids))), list(book_ids)
+
+    @classmethod
+    def make_book_cards(cls, rows):
+        """
+        Преобразует строки SQL_QUERY_BOOK_CARDS в {BookID: карточка}.
+        Карточка - информация о книге, как у get_book_info, и author_ids - ID авторов книги
+        """
+        cards = {}
+        for row in rows:
+            card = cls.make_book_info(row)
+            card['author_ids'] = [int(author_id) for author_id in row[12].split(',')] if row[12] else None
+            cards[card['bookid']] = card
+        return cards
+
+    def get_book_cards(self, book_ids):
+        """Получает карточки книг одним запросом: {BookID: карточка}, несуществующих книг в ответе нет"""
+        if not book_ids:
+            return {}
+        sql_query, params = self.build_book_cards(book_ids)
+        return self.make_book_cards(self._fetchall(sql_query, params))
+
+    @staticmethod
+    def make_book_details(annotation_result):
+        return {
+            'title': annotation_result[0],
+            'annotation': annotation_result[1]
+        } if annotation_result else None
+
+    def get_book_details(self, book_id):
+        """Получает детальную информацию о книге с обложкой и аннотацией"""
+        return self.make_book_details(self._fetchone(SQL_QUERY_BOOK_DETAILS, (book_id,)))
 
     @classmethod
-    def build_sql_query_series(cls, sql_query_nested, sql_where) -> str:
-        """Сбор sql запроса для поиска серий"""
+    def build_sql_query_series(cls, sql_query_books) -> str:
+        """Сбор sql запроса для поиска серий по уже отфильтрованным книгам (подзапрос с BookID)"""
         return f"""
         SELECT 
-            SeriesTitle, 
-            SeriesID,
-            COUNT(DISTINCT FileName) as book_count
-        FROM ({sql_query_nested} 
-          ORDER BY relevance DESC) as subquery
-        {sql_where}
-          and SeriesTitle IS NOT NULL
-        GROUP BY SeriesTitle, SeriesID 
+            sn.SeqName as SeriesTitle, 
+            sn.SeqID as SeriesID,
+            COUNT(DISTINCT m.BookID) as book_count
+        FROM ( {sql_query_books} ) m
+        JOIN libseq s ON s.BookID = m.BookID
+        JOIN libseqname sn ON sn.SeqID = s.SeqID
+        GROUP BY sn.SeqName, sn.SeqID 
         ORDER BY book_count DESC, SeriesTitle
         LIMIT {MAX_SERIES_SEARCH}
         """
 
-    def search_series(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
-        """Ищет серии по запросу"""
-        sql_where = self.build_sql_where_ft(lang, size_limit, rating_filter)
+    @staticmethod
+    def build_sql_query_series_index(sql_filter='') -> str:
+        """
+        Запрос поиска серий по индексу серий (название и первый автор, libseq_search).
+        Число книг серии с учётом фильтров - сумма готовых счётчиков libseq_stats;
+        у неё те же столбцы фильтров, что и у libbook_search, поэтому псевдоним bs и общий sql_filter
+        """
+        return f"""
+            SELECT
+                sq.SeriesTitle,
+                sq.SeqID as SeriesID,
+                CAST(SUM(bs.BookCount) AS UNSIGNED) as book_count
+            FROM libseq_search sq
+            JOIN libseq_stats bs ON bs.SeqID = sq.SeqID
+            WHERE MATCH(sq.SeriesTitle, sq.AuthorName) AGAINST(%s IN BOOLEAN MODE)
+              {sql_filter}
+            GROUP BY sq.SeqID, sq.SeriesTitle, sq.RateAvg
+            ORDER BY book_count DESC, sq.RateAvg DESC, sq.SeriesTitle
+            LIMIT {MAX_SERIES_SEARCH}
+        """
+
+    @classmethod
+    def build_search_series(cls, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        """Строит запрос поиска серий и его параметры"""
+        sql_filter, filter_params = cls.build_sql_filter_search(lang, size_limit, rating_filter)
+
+        # По основным данным - сразу по индексу серий
+        if search_area == SETTING_SEARCH_AREA_B:
+            return cls.build_sql_query_series_index(sql_filter), [query] + filter_params
 
         params = []
         # Пара одинаковых параметров в виде полного запроса для FullText поиска
         params.extend([query] * 2)
+        params.extend(filter_params)
 
-        # запрос для поиска серий
-        sql_query_nested = SELECT_SQL_QUERY.get(search_area)
-        sql_query = self.build_sql_query_series(sql_query_nested, sql_where)
+        # По аннотациям - серии найденных книг
+        sql_query = cls.build_sql_query_series(cls.build_sql_query_match(search_area, sql_filter))
 
         # #DEBUG
         # print(f"DEBUG: sql_query = {sql_query}")
         # print(f"DEBUG: params = {params}")
 
-        with self.connect() as conn:
-            cursor = conn.cursor(buffered=True)
-            cursor.execute(sql_query, params)
-            series = cursor.fetchall()
+        return sql_query, params
+
+    def search_series(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Ищет серии по запросу"""
+        sql_query, params = self.build_search_series(query, lang, size_limit, rating_filter, search_area)
+        return self._fetchall(sql_query, params)
 
-        return series
 
+    @staticmethod
+    def make_authors_id(author_result):
+        if not author_result:
+            return None
+        return [author_id[0] for author_id in author_result]
 
-    async def get_authors_id(self, book_id: int) -> list[ int | None | Any] | None:
+    def get_authors_id(self, book_id: int) -> list[ int | None | Any] | None:
         """Получает ID авторов книги"""
-        with self.connect() as conn:
-            cursor = conn.cursor(buffered=True)
+        return self.make_authors_id(self._fetchall(SQL_QUERY_BOOK_AUTHORS_ID, (book_id,)))
 
-            # Получаем id всех авторов книги
-            cursor.execute("""
-                SELECT DISTINCT a.AvtorID 
-                FROM libavtor a 
-                WHERE a.BookID = %s
-            """, (book_id,))
-            author_result = cursor.fetchall()
 
-            if not author_result:
-                return None
-            else:
-                return [author_id[0] for author_id in author_result]
+    @staticmethod
+    def make_author_info(author_result, photo_result, annotation_result):
+        """Собирает словарь информации об авторе из результатов запросов"""
+        if not author_result:
+            return None
 
+        photo_url = FlibustaClient.get_author_photo_url(photo_result[0]) if photo_result else None
 
-    async def get_author_info(self, author_id: int) -> dict[str, str | None | Any] | None:
+        return {
+            'name': f"{author_result[1]} {author_result[2]} {author_result[3]}",
+            'photo_url': photo_url,
+            'title': annotation_result[0],
+            'biography': annotation_result[1],
+            'author_id': author_result[0]
+        } if annotation_result else None
+
+    def get_author_info(self, author_id: int) -> dict[str, str | None | Any] | None:
         """Получает информацию об авторе книги"""
         with self.connect() as conn:
             cursor = conn.cursor(buffered=True)
 
             # Получаем первого автора книги
-            cursor.execute("""
-                SELECT an.AvtorID, an.LastName, an.FirstName, an.MiddleName 
-                -- FROM libavtor a 
-                -- JOIN libavtorname an ON a.AvtorID = an.AvtorID 
-                FROM libavtorname an
-                WHERE an.AvtorID = %s
-                LIMIT 1
-            """, (author_id,))
+            cursor.execute(SQL_QUERY_AUTHOR_NAME, (author_id,))
             author_result = cursor.fetchone()
 
             if not author_result:
                 return None
 
             # Получаем фото автора
-            cursor.execute("SELECT File FROM libapics WHERE AvtorID = %s", (author_id,))
+            cursor.execute(SQL_QUERY_AUTHOR_PHOTO, (author_id,))
             photo_result = cursor.fetchone()
-            photo_url = FlibustaClient.get_author_photo_url(photo_result[0]) if photo_result else None
 
             # Получаем аннотацию автора
-            cursor.execute("SELECT title, Body FROM libaannotations WHERE AvtorID = %s", (author_id,))
+            cursor.execute(SQL_QUERY_AUTHOR_ANNOTATION, (author_id,))
             annotation_result = cursor.fetchone()
 
-            return {
-                'name': f"{author_result[1]} {author_result[2]} {author_result[3]}",
-                'photo_url': photo_url,
-                'title': annotation_result[0],
-                'biography': annotation_result[1],
-                'author_id': author_result[0]
-            } if annotation_result else None
+        return self.make_author_info(author_result, photo_result, annotation_result)
 
 
-    async def get_book_reviews(self, book_id):
+    def get_book_reviews(self, book_id):
         """Получает отзывы о книге"""
-        with self.connect() as conn:
-            cursor = conn.cursor(buffered=True)
-            cursor.execute("""
-                SELECT Name, Time, Text 
-                FROM libreviews 
-                WHERE BookID = %s 
-                ORDER BY Time DESC
-            """, (book_id,))
-            return cursor.fetchall()
+        return self._fetchall(SQL_QUERY_BOOK_REVIEWS, (book_id,))
 
     @classmethod
-    def build_sql_query_authors(cls,sql_query_nested, sql_where) -> str:
-        """Собирает SQL запрос поиска авторов"""
+    def build_sql_query_authors(cls, sql_query_books) -> str:
+        """Собирает SQL запрос поиска авторов по уже отфильтрованным книгам (подзапрос с BookID)"""
         return f"""
         SELECT 
-            CONCAT(COALESCE(LastName, ''), ' ', COALESCE(FirstName, ''), ' ', COALESCE(MiddleName, '')) as AuthorName,
-            COUNT(DISTINCT FileName) as book_count,
-            AuthorID
-        FROM ({sql_query_nested} ) as subquery
-        {sql_where}
-          and LastName <> '' OR FirstName <> '' OR MiddleName <> ''
+            CONCAT(COALESCE(an.LastName, ''), ' ', COALESCE(an.FirstName, ''), ' ', COALESCE(an.MiddleName, '')) as AuthorName,
+            COUNT(DISTINCT m.BookID) as book_count,
+            an.AvtorID as AuthorID
+        FROM ( {sql_query_books} ) m
+        JOIN libavtor a ON a.BookID = m.BookID
+        JOIN libavtorname an ON an.AvtorID = a.AvtorID
+        WHERE (an.LastName <> '' OR an.FirstName <> '' OR an.MiddleName <> '')
         GROUP BY AuthorName, AuthorID
         ORDER BY book_count DESC, AuthorName
         LIMIT {MAX_AUTHORS_SEARCH}
         """
 
-    def search_authors(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
-        """Ищет авторов по запросу"""
-        sql_where = self.build_sql_where_ft(lang, size_limit, rating_filter)
+    @staticmethod
+    def build_sql_query_authors_index(search_area, sql_filter='') -> str:
+        """
+        Запрос поиска авторов по индексу авторов: по имени (libavtor_search) или по аннотации автора.
+        Число книг автора с учётом фильтров - сумма готовых счётчиков libavtor_stats;
+        у неё те же столбцы фильтров, что и у libbook_search, поэтому псевдоним bs и общий sql_filter
+        """
+        if search_area == SETTING_SEARCH_AREA_AA:
+            sql_match = """
+            FROM (
+                SELECT DISTINCT aa.AvtorId FROM libaannotations aa
+                WHERE MATCH(aa.Body) AGAINST(%s IN BOOLEAN MODE)
+            ) m
+            JOIN libavtor_search au ON au.AvtorID = m.AvtorId
+            JOIN libavtor_stats bs ON bs.AvtorID = au.AvtorID
+            WHERE 1 = 1
+            """
+        else:
+            sql_match = """
+            FROM libavtor_search au
+            JOIN libavtor_stats bs ON bs.AvtorID = au.AvtorID
+            WHERE MATCH(au.SearchName) AGAINST(%s IN BOOLEAN MODE)
+            """
+
+        return f"""
+            SELECT
+                au.AuthorName,
+                CAST(SUM(bs.BookCount) AS UNSIGNED) as book_count,
+                au.AvtorID as AuthorID
+            {sql_match}
+              {sql_filter}
+            GROUP BY au.AvtorID, au.AuthorName
+            ORDER BY book_count DESC, au.AuthorName
+            LIMIT {MAX_AUTHORS_SEARCH}
+        """
+
+    @classmethod
+    def build_search_authors(cls, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        """Строит запрос поиска авторов и его параметры"""
+        sql_filter, filter_params = cls.build_sql_filter_search(lang, size_limit, rating_filter)
+
+        # По имени и по аннотации автора - сразу по индексу авторов
+        if search_area != SETTING_SEARCH_AREA_BA:
+            return cls.build_sql_query_authors_index(search_area, sql_filter), [query] + filter_params
 
         params = []
         # Пара одинаковых параметров в виде полного запроса для FullText поиска
         params.extend([query] * 2)
+        params.extend(filter_params)
 
-        # Модифицируем запрос для поиска авторов
-        sql_query_nested = SELECT_SQL_QUERY.get(search_area)
-        sql_query = self.build_sql_query_authors(sql_query_nested, sql_where)
+        # По аннотации книг - авторы найденных книг
+        sql_query = cls.build_sql_query_authors(cls.build_sql_query_match(search_area, sql_filter))
 
-        with self.connect() as conn:
-            cursor = conn.cursor(buffered=True)
-            cursor.execute(sql_query, params)
-            authors = cursor.fetchall()
+        return sql_query, params
 
-        return authors
+    def search_authors(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Ищет авторов по запросу"""
+        sql_query, params = self.build_search_authors(query, lang, size_limit, rating_filter, search_area)
+        return self._fetchall(sql_query, params)
 
-    def search_pop_books(self, lang, size_limit, rating_filter=None, days_back:int=0):
-        """Поиск популярных книг за период"""
-        # assert lang.isalpha() and len(lang) <= 3, "Invalid lang"
+    def suggest_queries(self, query, kinds=FUZZY_KINDS_BOOKS):
+        """
+        Исправления опечаток в запросе по триграммному индексу слов каталога (kinds - где искать слова:
+        названия книг, имена авторов, названия серий). Возвращает тексты подсказок, лучшие первыми
+        """
+        terms = query_terms(query)
+        if not SEARCH_FUZZY or not terms:
+            return []
+        fuzzy_terms = [term for term in terms if term in fuzzy_words(term)]
+        if not fuzzy_terms:
+            return []
+
+        corrections = {}
+        try:
+            with self.connect() as conn:
+                cursor = conn.cursor(buffered=True)
+                # Слова, которые есть в каталоге, не исправляются
+                cursor.execute(SQL_QUERY_FUZZY_KNOWN.format(placeholders=', '.join(['%s'] * len(fuzzy_terms))),
+                               (*fuzzy_terms, kinds))
+                known = {row[0] for row in cursor.fetchall()}
+
+                for term in [term for term in fuzzy_terms if term not in known][:FUZZY_MAX_TERMS]:
+                    term_trigrams = sorted(trigrams(term))
+                    # Меньше общих триграмм - сходство ниже порога даже с самым коротким кандидатом
+                    min_shared = max(1, math.ceil(FUZZY_MIN_SIMILARITY * (2 * len(term_trigrams) - FUZZY_LEN_DELTA)
+                                                  / (1 + FUZZY_MIN_SIMILARITY)))
+                    cursor.execute(
+                        SQL_STATEMENT_TIME_LIMIT.format(max_statement_time=FUZZY_MAX_STATEMENT_TIME)
+                        + SQL_QUERY_FUZZY_CANDIDATES.format(placeholders=', '.join(['%s'] * len(term_trigrams))),
+                        (*term_trigrams, len(term) - FUZZY_LEN_DELTA, len(term) + FUZZY_LEN_DELTA, kinds,
+                         min_shared, FUZZY_MAX_CANDIDATES))
+                    corrections[term] = rank_candidates(term, cursor.fetchall())
+        except mysql.connector.Error as e:
+            # Нет индекса или превышено время запроса - без подсказок
+            print(f"Error suggesting queries: {e}")
+            return []
+
+        return build_suggestions(terms, corrections)
 
-        sql_where = self.build_sql_where_ft(lang, size_limit, rating_filter)
+    @classmethod
+    def build_sql_query_pop_nested(cls, days_back: int, current_date, sql_filter='', limit=MAX_BOOKS_SEARCH) -> str:
+        """Вложенный запрос новинок или популярных книг за период (BookID, relevance) с фильтрами пользователя"""
         if days_back == 0:
             # Поиск новинок
-            sql_query_nested = DatabaseBooks.build_sql_query_nov(self)
-        else:
-            # Поиск популярных
-            filter_recent = 1 if days_back < 999 else 0
-            current_date = self.lib_last_update
-            sql_query_nested = DatabaseBooks.build_sql_query_pop(self, filter_recent, current_date, days_back)
+            return cls.build_sql_query_nov(cls, sql_filter, limit)
+
+        # Поиск популярных
+        filter_recent = 1 if days_back < 999 else 0
+        return cls.build_sql_query_pop(cls, filter_recent, current_date, days_back, sql_filter, limit)
 
-        select_fields = ', '.join(Book._fields)
+    @classmethod
+    def build_pop_nested(cls, lang, size_limit, rating_filter, days_back, current_date, genre_meta=''):
+        """
+        Вложенный запрос новинок или популярных книг (genre_meta - раздела жанров) и его параметры:
+        из готовых списков book_leaderboard, если они построены (refresh_leaderboards), иначе - подсчёт
+        по исходным таблицам
+        """
+        if cls._class_leaderboard_version is None or days_back not in LEADERBOARD_BOARDS:
+            sql_filter, params = cls.build_sql_filter_search(lang, size_limit, rating_filter, genre_meta=genre_meta)
+            return cls.build_sql_query_pop_nested(days_back, current_date, sql_filter), params
+
+        sql_filter, params = cls.build_sql_filter_search(lang, size_limit, rating_filter)
+
+        sql_query_nested = f"""
+    SELECT
+        lb.BookID,
+        lb.Relevance AS relevance,
+        -CAST(lb.Position AS SIGNED) AS relevance_oppos
+    FROM book_leaderboard lb
+    JOIN libbook_search bs ON bs.BookID = lb.BookID
+    WHERE lb.Board = %s AND lb.SearchLang = %s AND lb.GenreMeta = %s
+      {sql_filter}
+    ORDER BY lb.Position
+    LIMIT {MAX_BOOKS_SEARCH}
+        """
+        return sql_query_nested, [days_back, (lang or '').upper(), genre_meta or ''] + params
+
+    @classmethod
+    def build_search_pop_books(cls, lang, size_limit, rating_filter, days_back, current_date, genre_meta='') -> str:
+        """Строит запрос поиска популярных книг и новинок и его параметры"""
+        sql_query_nested, params = cls.build_pop_nested(lang, size_limit, rating_filter, days_back, current_date, genre_meta)
 
         sql_query = f"""
-        SELECT {select_fields} FROM (
-        SELECT {BASE_FIELDS}
+        SELECT {SEARCH_FIELDS}
             , b.relevance
-            , ROW_NUMBER() OVER (PARTITION BY b.BookId ORDER BY b.BookId) AS rn 
         FROM ( {sql_query_nested} ) b
-        {BASE_JOINS} ) subq
-        {sql_where} 
-        and rn = 1
-        ORDER BY relevance DESC
+        JOIN libbook_search bs ON bs.BookID = b.BookID
+        ORDER BY b.relevance DESC, b.relevance_oppos DESC, b.BookID DESC
         LIMIT {MAX_BOOKS_SEARCH};
         """
 
         # print(f"DEBUG: {sql_query}")
 
-        with self.connect() as conn:
-            cursor = conn.cursor(buffered=True)
-            cursor.execute(sql_query)
-            books = [Book(*row) for row in cursor.fetchall()]
-
-        return books
+        return sql_query, params
 
-
-    def search_pop_series(self, lang, size_limit, rating_filter=None, days_back:int=0):
-        """Поиск популярных книг по сериям за период"""
+    def search_pop_books(self, lang, size_limit, rating_filter=None, days_back:int=0, genre_meta=''):
+        """Поиск популярных книг за период"""
         # assert lang.isalpha() and len(lang) <= 3, "Invalid lang"
+        current_date = self.lib_last_update if days_back else None
+        sql_query, params = self.build_search_pop_books(lang, size_limit, rating_filter, days_back, current_date, genre_meta)
+        return [Book(*row) for row in self._fetchall(sql_query, params)]
 
-        sql_where = self.build_sql_where_ft(lang, size_limit, rating_filter)
-        if days_back == 0:
-            # Поиск новинок
-            sql_query_nested = DatabaseBooks.build_sql_query_nov(self)
-        else:
-            # Поиск популярных
-            filter_recent = 1 if days_back < 999 else 0
-            current_date = self.lib_last_update
-            sql_query_nested = DatabaseBooks.build_sql_query_pop(self, filter_recent, current_date, days_back)
-
-        sql_query_nested2 = f"""
-        SELECT {BASE_FIELDS}
-            , b.relevance
-        FROM ( {sql_query_nested} ) b
-        {BASE_JOINS} 
-        """
-
-        sql_query = self.build_sql_query_series(sql_query_nested2, sql_where)
 
-        with self.connect() as conn:
-            cursor = conn.cursor(buffered=True)
-            cursor.execute(sql_query)
-            series = cursor.fetchall()
-
-        return series
+    @classmethod
+    def build_search_pop_series(cls, lang, size_limit, rating_filter, days_back, current_date, genre_meta='') -> str:
+        """Строит запрос поиска популярных серий и его параметры"""
+        sql_query_nested, params = cls.build_pop_nested(lang, size_limit, rating_filter, days_back, current_date, genre_meta)
 
+        return cls.build_sql_query_series(sql_query_nested), params
 
-    def search_pop_authors(self, lang, size_limit, rating_filter=None, days_back:int=0):
-        """Поиск популярных книг по авторам за период"""
+    def search_pop_series(self, lang, size_limit, rating_filter=None, days_back:int=0, genre_meta=''):
+        """Поиск популярных книг по сериям за период"""
         # assert lang.isalpha() and len(lang) <= 3, "Invalid lang"
+        current_date = self.lib_last_update if days_back else None
+        sql_query, params = self.build_search_pop_series(lang, size_limit, rating_filter, days_back, current_date, genre_meta)
+        return self._fetchall(sql_query, params)
 
-        sql_where = self.build_sql_where_ft(lang, size_limit, rating_filter)
-        if days_back == 0:
-            # Поиск новинок
-            sql_query_nested = DatabaseBooks.build_sql_query_nov(self)
-        else:
-            # Поиск популярных
-            filter_recent = 1 if days_back < 999 else 0
-            current_date = self.lib_last_update
-            sql_query_nested = DatabaseBooks.build_sql_query_pop(self, filter_recent, current_date, days_back)
-
-        sql_query_nested2 = f"""
-        SELECT {BASE_FIELDS}
-            , b.relevance
-        FROM ( {sql_query_nested} ) b
-        {BASE_JOINS}
-        """
 
-        sql_query = self.build_sql_query_authors(sql_query_nested2, sql_where)
+    @classmethod
+    def build_search_pop_authors(cls, lang, size_limit, rating_filter, days_back, current_date, genre_meta='') -> str:
+        """Строит запрос поиска популярных авторов и его параметры"""
+        sql_query_nested, params = cls.build_pop_nested(lang, size_limit, rating_filter, days_back, current_date, genre_meta)
 
-        with self.connect() as conn:
-            cursor = conn.cursor(buffered=True)
-            cursor.execute(sql_query)
-            authors = cursor.fetchall()
+        return cls.build_sql_query_authors(sql_query_nested), params
 
-        return authors
+    def search_pop_authors(self, lang, size_limit, rating_filter=None, days_back:int=0, genre_meta=''):
+        """Поиск популярных книг по авторам за период"""
+        # assert lang.isalpha() and len(lang) <= 3, "Invalid lang"
+        current_date = self.lib_last_update if days_back else None
+        sql_query, params = self.build_search_pop_authors(lang, size_limit, rating_filter, days_back, current_date, genre_meta)
+        return self._fetchall(sql_query, params)
 
 
     @staticmethod
-    def build_sql_query_pop(self, filter_recent:int, current_date:str, days_back:int):
-        """Поиск популярных книг за период"""
+    def build_sql_query_pop(self, filter_recent:int, current_date:str, days_back:int, sql_filter='', limit=MAX_BOOKS_SEARCH):
+        """Поиск популярных книг за период (limit=None - без ограничения числа книг)"""
+        sql_limit = f"LIMIT {limit}" if limit else ""
         # assert filter_recent in (0, 1), "filter_recent must be 0 or 1"
         # assert 1 <= days_back <= 999, "days_back out of range"
 
+        if not filter_recent:
+            # За всё время: готовые счётчики из book_stats
+            return f"""
+    SELECT 
+        st.BookID,
+        st.PopCount AS relevance,
+        st.RecsCount + st.ReviewsCount AS relevance_oppos
+    FROM book_stats st
+    JOIN libbook_search bs ON bs.BookID = st.BookID
+    WHERE st.PopCount > 0
+      {sql_filter}
+    ORDER BY st.PopCount DESC, relevance_oppos DESC
+    {sql_limit}
+        """
+
+        # За период: считаем рекомендации и отзывы только у книг, активных в этом периоде
         return f"""
     SELECT 
-        b.BookID,
-        b.Lang,
-        b.Title,
-        b.FileSize,
-        b.Year,
-        CASE {filter_recent}
-            WHEN 0 THEN COALESCE(ra.cnt, 0) + COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-            WHEN 1 THEN COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0) 
-        END AS relevance,
-        CASE {1 - filter_recent}
-            WHEN 0 THEN COALESCE(ra.cnt, 0) + COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-            WHEN 1 THEN COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0) 
-        END AS relevance_oppos
-    FROM libbook b
-    LEFT JOIN (
-        SELECT bookid, COUNT(DISTINCT id) AS cnt
-        FROM librate
-        GROUP BY bookid
-    ) ra ON ra.BookId = b.BookId
+        st.BookID,
+        COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0) AS relevance,
+        st.PopCount AS relevance_oppos
+    FROM book_stats st
+    JOIN libbook_search bs ON bs.BookID = st.BookID
     LEFT JOIN (
         SELECT bid AS bookid, COUNT(DISTINCT id) AS cnt
         FROM librecs
         WHERE '{current_date}' - INTERVAL {days_back} DAY <= timestamp
-           OR {filter_recent} = 0
         GROUP BY bid
-    ) re ON re.BookId = b.BookId
+    ) re ON re.BookId = st.BookID
     LEFT JOIN (
         SELECT bookid, COUNT(DISTINCT time) AS cnt
         FROM libreviews
         WHERE '{current_date}' - INTERVAL {days_back} DAY <= time
-           OR {filter_recent} = 0
         GROUP BY bookid
-    ) rv ON rv.BookId = b.BookId
-    WHERE b.Deleted = '0'
-      and (CASE {filter_recent}
-            WHEN 0 THEN COALESCE(ra.cnt, 0) + COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-            WHEN 1 THEN COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-        END) > 0
-    ORDER BY 
-        CASE {filter_recent}
-            WHEN 0 THEN COALESCE(ra.cnt, 0) + COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-            WHEN 1 THEN COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-        END DESC,
-        CASE {1 - filter_recent}
-            WHEN 0 THEN COALESCE(ra.cnt, 0) + COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-            WHEN 1 THEN COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0)
-        END DESC
-    LIMIT {MAX_BOOKS_SEARCH}
+    ) rv ON rv.BookId = st.BookID
+    WHERE st.LastActivity >= '{current_date}' - INTERVAL {days_back} DAY
+      and COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0) > 0
+      {sql_filter}
+    ORDER BY relevance DESC, relevance_oppos DESC
+    {sql_limit}
         """
 
 
     @staticmethod
-    def build_sql_query_nov(self):
-        """Поиск новинок"""
+    def build_sql_query_nov(self, sql_filter='', limit=MAX_BOOKS_SEARCH):
+        """Поиск новинок (limit=None - без ограничения числа книг)"""
+        sql_limit = f"LIMIT {limit}" if limit else ""
 
         return f"""
     SELECT 
-        b.BookID,
-        b.Lang,
-        b.Title,
-        b.FileSize,
-        b.Year,
-        b.BookID AS relevance,
+        bs.BookID,
+        bs.BookID AS relevance,
         0 AS relevance_oppos
-    FROM libbook b
-    WHERE b.Deleted = '0'
-    ORDER BY b.BookID desc 
-    LIMIT {MAX_BOOKS_SEARCH}
+    FROM libbook_search bs
+    WHERE 1=1
+      {sql_filter}
+    ORDER BY bs.BookID desc 
+    {sql_limit}
         """
 
 
     @staticmethod
-    def build_sql_where_ft(lang, size_limit, rating_filter=None, series_id=0, author_id=0):
-        """Создает SQL-условие WHERE на основе списка слов и их операторов."""
+    def build_sql_filter_search(lang, size_limit, rating_filter=None, series_id=0, author_id=0, genre_meta=''):
+        """
+        Создает условия фильтров пользователя по таблице libbook_search (bs) и их параметры.
+        Условия добавляются в самый внутренний запрос (полнотекстовый или популярного) через AND.
+        """
         conditions = []
+        params = []
 
         # Добавляем условие по языку, если задан в настройках пользователя
         if lang:
-            conditions.append(f"SearchLang = '{lang.upper()}'")
+            conditions.append("bs.SearchLang = %s")
+            params.append(lang.upper())
 
         # Добавляем ограничение по размеру книг, если задан в настройках пользователя
         if size_limit:
-            conditions.append(f"BookSizeCat = '{size_limit}'")
+            conditions.append("bs.BookSizeCat = %s")
+            params.append(size_limit)
 
-        # ДОБАВЛЯЕМ ФИЛЬТРАЦИЮ ПО РЕЙТИНГУ
-        if rating_filter and rating_filter != '':
-            rating_condition = f"LibRate IN ({rating_filter})"
-            conditions.append(rating_condition)
+        # Фильтрация по рейтингу: строка вида "4,5"
+        rates = [int(rate) for rate in str(rating_filter or '').split(',') if rate.strip()]
+        if rates:
+            conditions.append(f"bs.LibRate IN ({', '.join(['%s'] * len(rates))})")
+            params.extend(rates)
 
-        # Добавляем условие по серии в поиске книг по сериям
+        # В таблице поиска только первая серия и первый автор книги,
+        # поэтому принадлежность книги серии/автору проверяем по связующим таблицам
         if series_id != 0:
-            conditions.append(f"SeriesID = {series_id}")
+            conditions.append("EXISTS (SELECT 1 FROM libseq s WHERE s.BookID = bs.BookID AND s.SeqID = %s)")
+            params.append(series_id)
 
-        # Добавляем условие по автору в поиске книг по авторам
         if author_id != 0:
-            conditions.append(f"AuthorID = {author_id}")
+            conditions.append("EXISTS (SELECT 1 FROM libavtor a WHERE a.BookID = bs.BookID AND a.AvtorID = %s)")
+            params.append(author_id)
 
-        # в соновном sql вконце уже есть where, поэтому заменяем его на and
-        sql_where = "WHERE " + " AND ".join(conditions) if conditions else "WHERE 1=1"
-        return sql_where #, params
+        if genre_meta:
+            conditions.append("EXISTS (SELECT 1 FROM libgenre g JOIN libgenrelist gl ON gl.GenreID = g.GenreID "
+                              "WHERE g.BookID = bs.BookID AND gl.GenreMeta = %s)")
+            params.append(genre_meta)
 
+        sql_filter = "".join(f" AND {condition}" for condition in conditions)
+        return sql_filter, params
 
     @staticmethod
-    def build_sql_query_books(sql_where, sort_order='desc', search_area=SETTING_SEARCH_AREA_B):
-        fields = Book._fields
+    def build_sql_query_match(search_area, sql_filter=''):
+        """Полнотекстовый запрос по области поиска с фильтрами пользователя: (BookID, Relevance)"""
+        return SELECT_SQL_MATCH.get(search_area).format(sql_filter=sql_filter)
 
-        # Всегда используем sum для Relevance
-        processed_fields = []
-        for field in fields:
-            # processed_fields.append(f"max({field})")
-            processed_fields.append(f"{field}")
-
-        select_fields = ', '.join(processed_fields)
-
-        sql_query_nested = SELECT_SQL_QUERY.get(search_area)
-        from_clause = f"FROM ( {sql_query_nested} {sql_where} ) as subquery"
-
-        sql_query = f"""
-            select {select_fields} from (
-            SELECT {select_fields},
-              ROW_NUMBER() OVER (PARTITION BY FileName ORDER BY FileName) AS rn 
-            {from_clause}
-            -- GROUP BY {fields[0]}
-            ORDER BY Relevance DESC, FileName {sort_order}
-            LIMIT {MAX_BOOKS_SEARCH}
-            ) as ranked
-            where rn = 1
-            ORDER BY Relevance DESC, FileName {sort_order}
-            -- LIMIT {MAX_BOOKS_SEARCH}
+    @staticmethod
+    def build_sql_query_search_books(sql_query_match, sort_order='desc', sql_keyset='', limit=MAX_BOOKS_SEARCH, offset=0):
+        """
+        Запрос поиска книг: полнотекстовое совпадение + соединение с libbook_search по первичному ключу.
+        sql_keyset - условие продолжения выдачи после ключа (Relevance, BookID) предыдущей страницы
+        """
+        return f"""
+            SELECT {SEARCH_FIELDS},
+              m.Relevance
+            FROM ( {sql_query_match} ) m
+            JOIN libbook_search bs ON bs.BookID = m.BookID
+            {sql_keyset}
+            ORDER BY m.Relevance DESC, bs.BookID {sort_order}
+            LIMIT {int(limit)} OFFSET {int(offset)}
         """
 
-        return sql_query
+    @staticmethod
+    def build_sql_query_count_books(sql_query_match):
+        """Число найденных книг без выборки их полей"""
+        return f"SELECT COUNT(*) FROM ( {sql_query_match} ) m"
 
 DB_BOOKS = DatabaseBooks({
     'host': os.getenv('DB_HOST'),
@@ -1362,6 +2291,11 @@ DB_BOOKS = DatabaseBooks({
     'user': os.getenv('DB_USER'),
     'password': os.getenv('DB_PASSWORD'),
     'charset': os.getenv('DB_CHARSET', 'utf8mb4')
+}, pool_config={
+    'size': int(os.getenv('DB_POOL_SIZE', 11)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    'max_lifetime': int(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+    'pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1'
 })
 
 DB_LOGS = DatabaseLogs()
\ No newline at end of file
@@ -0,0 +1,559 @@
+import asyncio
+import functools
+import os
+import time
+
+from database import DatabaseBooks, DB_BOOKS, Book, SQL_QUERY_LIBRARY_STATS, SQL_QUERY_LIBRARY_COUNTS, \
+    SQL_QUERY_LIBRARY_META, SQL_QUERY_LIBRARY_VERSION, \
+    SQL_QUERY_PARENT_GENRES_COUNT, SQL_QUERY_CHILDREN_GENRES_COUNT, SQL_QUERY_LANGS, SQL_QUERY_BOOK_INFO, \
+    SQL_QUERY_BOOK_DETAILS, SQL_QUERY_BOOK_AUTHORS_ID, SQL_QUERY_AUTHOR_NAME, SQL_QUERY_AUTHOR_PHOTO, \
+    SQL_QUERY_AUTHOR_ANNOTATION, SQL_QUERY_BOOK_REVIEWS
+from constants import SETTING_SEARCH_AREA_B, MAX_BOOKS_SEARCH
+from db_executor import DB_LANES, LANE_SEARCH, LANE_LOOKUP, LANE_ADMIN, LANE_PREFETCH, LANE_MAINTENANCE, in_lane
+from card_prefetch import CARD_PREFETCHER
+from flibusta_client import flibusta_client
+from result_cache import RESULT_CACHE, BOOK_CARD_CACHE, cached_result
+from search_fuzzy import FUZZY_KINDS_BOOKS
+from search_sqlite import SqliteSearchBooks, SQLITE_SEARCH_PATH
+
+# Бэкенд доступа к БД библиотеки из асинхронных обработчиков:
+#   executor - синхронный DatabaseBooks в пуле потоков (по умолчанию)
+#   aiomysql - родной асинхронный драйвер со своим пулом соединений
+DB_BACKEND_EXECUTOR = 'executor'
+DB_BACKEND_AIOMYSQL = 'aiomysql'
+DB_BACKEND = os.getenv('DB_BACKEND', DB_BACKEND_EXECUTOR)
+
+# Поиск по каталогу (книги, серии, авторы):
+#   mariadb - полнотекстовые индексы MariaDB (по умолчанию)
+#   sqlite - встроенный индекс SQLite FTS5 (search_sqlite.py, tools/build_sqlite_index.py)
+SEARCH_BACKEND_MARIADB = 'mariadb'
+SEARCH_BACKEND_SQLITE = 'sqlite'
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', SEARCH_BACKEND_MARIADB)
+
+# Период инкрементального обновления агрегатов book_stats, сек (0 - не обновлять)
+BOOK_STATS_REFRESH_INTERVAL = int(os.getenv('BOOK_STATS_REFRESH_INTERVAL', 0))
+
+# Период инкрементального обновления документов полнотекстового поиска libbook_fts, сек (0 - не обновлять)
+FT_REFRESH_INTERVAL = int(os.getenv('FT_REFRESH_INTERVAL', 0))
+
+# Период проверки и перестроения готовых списков новинок и популярного, сек
+# (0 - списки не используются, популярное считается по исходным таблицам при каждом запросе)
+LEADERBOARD_REFRESH_INTERVAL = int(os.getenv('LEADERBOARD_REFRESH_INTERVAL', 0))
+
+# Период проверки обновления библиотеки (сброс кешей жанров, языков и статистики), сек (0 - не проверять)
+LIBRARY_CHECK_INTERVAL = int(os.getenv('LIBRARY_CHECK_INTERVAL', 600))
+
+
+async def fill_cover_url(book_info):
+    """Дополняет информацию о книге ссылкой на обложку со страницы книги, если её нет в БД"""
+    if book_info and book_info.get('cover_url') is None:
+        book_info['cover_url'] = await flibusta_client.get_book_cover_url(book_info['bookid'])
+    return book_info
+
+
+async def load_book_cards(fetch_cards, book_ids):
+    """Карточки книг fetch_cards(book_ids), дополненные обложками со страниц книг, если их нет в БД"""
+    cards = await fetch_cards(book_ids)
+    await asyncio.gather(*(fill_cover_url(card) for card in cards.values()))
+    return cards
+
+
+async def get_cached_book_cards(fetch_cards, book_ids):
+    """Карточки книг {BookID: карточка} из BOOK_CARD_CACHE, недостающие собираются одним запросом"""
+    book_ids = [int(book_id) for book_id in book_ids]
+    return await BOOK_CARD_CACHE.get_many_or_load(book_ids, functools.partial(load_book_cards, fetch_cards))
+
+
+async def get_cached_book_card(fetch_cards, book_id):
+    """
+    Карточка книги из BOOK_CARD_CACHE; одновременные открытия одной книги собираются одним запросом.
+    Карточка, загруженная заранее для страницы результатов, переносится в BOOK_CARD_CACHE
+    """
+    async def load():
+        card = CARD_PREFETCHER.take(book_id)
+        if card is not None:
+            return await fill_cover_url(card)
+        return (await load_book_cards(fetch_cards, [book_id])).get(book_id)
+
+    book_id = int(book_id)
+    return await BOOK_CARD_CACHE.get_or_load(book_id, load)
+
+
+class ExecutorDatabaseBooks:
+    """Асинхронный интерфейс к синхронному DatabaseBooks: запросы выполняются в потоках очередей DB_LANES"""
+
+    def __init__(self, db_books: DatabaseBooks):
+        self._db = db_books
+
+    async def _run(self, lane_name, func, *args, **kwargs):
+        return await DB_LANES.run(lane_name, func, *args, **kwargs)
+
+    async def close(self):
+        pass
+
+    def get_pool_stats(self):
+        return self._db.get_pool_stats()
+
+    async def get_library_stats(self):
+        return await self._run(LANE_ADMIN, self._db.get_library_stats)
+
+    async def refresh_book_stats(self):
+        changed = await self._run(LANE_MAINTENANCE, self._db.refresh_book_stats)
+        if changed:
+            # Изменились оценки и популярность - результаты поиска в кеше устарели
+            RESULT_CACHE.invalidate()
+        return changed
+
+    async def refresh_fts(self):
+        updated, deleted = await self._run(LANE_MAINTENANCE, self._db.refresh_fts)
+        if updated or deleted:
+            RESULT_CACHE.invalidate()
+            BOOK_CARD_CACHE.invalidate()
+            CARD_PREFETCHER.invalidate()
+        return updated, deleted
+
+    async def refresh_leaderboards(self, force=False):
+        rebuilt = await self._run(LANE_MAINTENANCE, self._db.refresh_leaderboards, force)
+        if rebuilt:
+            RESULT_CACHE.invalidate()
+        return rebuilt
+
+    async def check_library_version(self):
+        changed = await self._run(LANE_ADMIN, self._db.check_library_version)
+        if changed:
+            # Импортирована новая база библиотеки
+            RESULT_CACHE.invalidate()
+            BOOK_CARD_CACHE.invalidate()
+            CARD_PREFETCHER.invalidate()
+        return changed
+
+    async def get_parent_genres_with_counts(self, lang=''):
+        return await self._run(LANE_LOOKUP, self._db.get_parent_genres_with_counts, lang)
+
+    async def get_genres_with_counts(self, parent_genre, lang=''):
+        return await self._run(LANE_LOOKUP, self._db.get_genres_with_counts, parent_genre, lang)
+
+    async def get_langs(self):
+        return await self._run(LANE_LOOKUP, self._db.get_langs)
+
+    @cached_result
+    async def search_books(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        return await self._run(LANE_SEARCH, self._db.search_books, query, lang, size_limit, rating_filter,
+                               search_area=search_area, series_id=series_id, author_id=author_id)
+
+    @cached_result
+    async def search_books_page(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B,
+                                series_id=0, author_id=0, page_size=MAX_BOOKS_SEARCH, after=None, offset=0, with_count=False):
+        return await self._run(LANE_SEARCH, self._db.search_books_page, query, lang, size_limit, rating_filter,
+                               search_area=search_area, series_id=series_id, author_id=author_id,
+                               page_size=page_size, after=after, offset=offset, with_count=with_count)
+
+    @cached_result
+    async def search_series(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        return await self._run(LANE_SEARCH, self._db.search_series, query, lang, size_limit, rating_filter, search_area=search_area)
+
+    @cached_result
+    async def search_authors(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        return await self._run(LANE_SEARCH, self._db.search_authors, query, lang, size_limit, rating_filter, search_area=search_area)
+
+    @cached_result
+    async def suggest_queries(self, query, kinds=FUZZY_KINDS_BOOKS):
+        return await self._run(LANE_SEARCH, self._db.suggest_queries, query, kinds)
+
+    @cached_result
+    async def search_pop_books(self, lang, size_limit, rating_filter=None, days_back: int = 0, genre_meta=''):
+        return await self._run(LANE_SEARCH, self._db.search_pop_books, lang, size_limit, rating_filter, days_back, genre_meta)
+
+    @cached_result
+    async def search_pop_series(self, lang, size_limit, rating_filter=None, days_back: int = 0, genre_meta=''):
+        return await self._run(LANE_SEARCH, self._db.search_pop_series, lang, size_limit, rating_filter, days_back, genre_meta)
+
+    @cached_result
+    async def search_pop_authors(self, lang, size_limit, rating_filter=None, days_back: int = 0, genre_meta=''):
+        return await self._run(LANE_SEARCH, self._db.search_pop_authors, lang, size_limit, rating_filter, days_back, genre_meta)
+
+    async def get_book_info(self, book_id):
+        return await fill_cover_url(await self._run(LANE_LOOKUP, self._db.get_book_info, book_id))
+
+    async def get_book_details(self, book_id):
+        return await self._run(LANE_LOOKUP, self._db.get_book_details, book_id)
+
+    async def get_authors_id(self, book_id):
+        return await self._run(LANE_LOOKUP, self._db.get_authors_id, book_id)
+
+    async def _fetch_book_cards(self, book_ids):
+        return await self._run(LANE_LOOKUP, self._db.get_book_cards, book_ids)
+
+    async def get_book_card(self, book_id):
+        return await get_cached_book_card(self._fetch_book_cards, book_id)
+
+    async def get_book_cards(self, book_ids):
+        return await get_cached_book_cards(self._fetch_book_cards, book_ids)
+
+    def prefetch_book_cards(self, user_id, book_ids):
+        CARD_PREFETCHER.schedule(user_id, book_ids, functools.partial(self._run, LANE_PREFETCH, self._db.get_book_cards))
+
+    async def get_author_info(self, author_id):
+        return await self._run(LANE_LOOKUP, self._db.get_author_info, author_id)
+
+    async def get_book_reviews(self, book_id):
+        return await self._run(LANE_LOOKUP, self._db.get_book_reviews, book_id)
+
+
+class AsyncDatabaseBooks:
+    """Асинхронная реализация API DatabaseBooks на aiomysql (SQL общий с DatabaseBooks)"""
+
+    def __init__(self, db_config, pool_config=None):
+        self.db_config = db_config
+        self.pool_config = pool_config or {}
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+        # Статистика ожидания соединений
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+
+    async def _get_pool(self):
+        """Ленивое создание пула (пул привязан к работающему event loop)"""
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    import aiomysql
+
+                    self._pool = await aiomysql.create_pool(
+                        host=self.db_config.get('host'),
+                        port=self.db_config.get('port', 3306),
+                        db=self.db_config.get('database'),
+                        user=self.db_config.get('user'),
+                        password=self.db_config.get('password'),
+                        charset=self.db_config.get('charset', 'utf8mb4'),
+                        autocommit=True,
+                        minsize=0,
+                        maxsize=max(1, self.pool_config.get('size', 8)),
+                        pool_recycle=self.pool_config.get('max_lifetime', 3600),
+                    )
+        return self._pool
+
+    async def _acquire(self):
+        pool = await self._get_pool()
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), timeout=self.pool_config.get('timeout', 10))
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise
+        finally:
+            self._waiting -= 1
+
+        self._checkouts += 1
+        self._wait_time_total += time.monotonic() - started
+
+        if self.pool_config.get('pre_ping', True):
+            try:
+                await conn.ping(reconnect=True)
+            except BaseException:
+                # Без release соединение навсегда заняло бы место в пуле
+                conn.close()
+                pool.release(conn)
+                raise
+        return pool, conn
+
+    async def _execute(self, statements):
+        """Выполняет несколько запросов на одном соединении: [(sql, params, fetch_one), ...]"""
+        pool, conn = await self._acquire()
+        try:
+            results = []
+            async with conn.cursor() as cursor:
+                for sql_query, params, fetch_one in statements:
+                    await cursor.execute(sql_query, params)
+                    results.append(await cursor.fetchone() if fetch_one else await cursor.fetchall())
+            return results
+        except BaseException:
+            # Ошибка или отмена задачи посреди запроса (CancelledError): соединение в неизвестном
+            # состоянии, с недочитанным результатом - закрываем, пул откроет новое
+            conn.close()
+            raise
+        finally:
+            pool.release(conn)
+
+    async def _fetchall(self, sql_query, params=None):
+        return (await self._execute([(sql_query, params, False)]))[0]
+
+    async def _fetchone(self, sql_query, params=None):
+        return (await self._execute([(sql_query, params, True)]))[0]
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def get_pool_stats(self):
+        pool = self._pool
+        open_cnt = pool.size if pool else 0
+        idle_cnt = pool.freesize if pool else 0
+        avg_wait_ms = (self._wait_time_total / self._checkouts * 1000) if self._checkouts else 0.0
+        return {
+            'size': self.pool_config.get('size', 8),
+            'open': open_cnt,
+            'idle': idle_cnt,
+            'checked_out': open_cnt - idle_cnt,
+            'waiting': self._waiting,
+            'timeouts': self._timeouts,
+            'checkouts': self._checkouts,
+            'avg_wait_ms': round(avg_wait_ms, 2),
+        }
+
+    async def get_lib_last_update(self):
+        return (await self._load_library_stats()).get('last_update')
+
+    @in_lane(LANE_ADMIN)
+    async def get_library_stats(self):
+        return await self._load_library_stats()
+
+    async def _load_library_stats(self):
+        """Возвращает статистику библиотеки (кеш общий с DatabaseBooks)"""
+        try:
+            if not DatabaseBooks._class_stats:
+                meta = await self._fetchone(SQL_QUERY_LIBRARY_META)
+                if meta:
+                    books_stats, counts = meta[:3], meta[3:]
+                else:
+                    # Снимка library_meta нет - подсчёт по таблицам
+                    books_stats, counts = await self._execute([
+                        (SQL_QUERY_LIBRARY_STATS, None, True),
+                        (SQL_QUERY_LIBRARY_COUNTS, None, True),
+                    ])
+                DatabaseBooks._class_stats = DatabaseBooks.make_library_stats(books_stats, counts)
+            return DatabaseBooks._class_stats
+        except Exception as e:
+            print(f"Error getting library stats: {e}")
+            return DatabaseBooks.empty_library_stats()
+
+    async def refresh_book_stats(self):
+        # Обслуживающая задача: выполняется синхронным DatabaseBooks в потоке очереди maintenance
+        changed = await DB_LANES.run(LANE_MAINTENANCE, DB_BOOKS.refresh_book_stats)
+        if changed:
+            RESULT_CACHE.invalidate()
+        return changed
+
+    async def refresh_fts(self):
+        updated, deleted = await DB_LANES.run(LANE_MAINTENANCE, DB_BOOKS.refresh_fts)
+        if updated or deleted:
+            RESULT_CACHE.invalidate()
+            BOOK_CARD_CACHE.invalidate()
+            CARD_PREFETCHER.invalidate()
+        return updated, deleted
+
+    async def refresh_leaderboards(self, force=False):
+        rebuilt = await DB_LANES.run(LANE_MAINTENANCE, DB_BOOKS.refresh_leaderboards, force)
+        if rebuilt:
+            RESULT_CACHE.invalidate()
+        return rebuilt
+
+    @in_lane(LANE_ADMIN)
+    async def check_library_version(self):
+        version = (await self._fetchone(SQL_QUERY_LIBRARY_VERSION))[0]
+        changed = DatabaseBooks.apply_library_version(version)
+        if changed:
+            RESULT_CACHE.invalidate()
+            BOOK_CARD_CACHE.invalidate()
+            CARD_PREFETCHER.invalidate()
+        return changed
+
+    @in_lane(LANE_LOOKUP)
+    async def get_parent_genres_with_counts(self, lang=''):
+        lang = (lang or '').upper()
+        if lang not in DatabaseBooks._class_cached_parent_genres:
+            DatabaseBooks._class_cached_parent_genres[lang] = list(
+                await self._fetchall(SQL_QUERY_PARENT_GENRES_COUNT, (lang, lang)))
+        return DatabaseBooks._class_cached_parent_genres[lang]
+
+    @in_lane(LANE_LOOKUP)
+    async def get_genres_with_counts(self, parent_genre, lang=''):
+        lang = (lang or '').upper()
+        if (parent_genre, lang) not in DatabaseBooks._class_cached_genres:
+            DatabaseBooks._class_cached_genres[(parent_genre, lang)] = list(
+                await self._fetchall(SQL_QUERY_CHILDREN_GENRES_COUNT, (parent_genre, lang, lang)))
+        return DatabaseBooks._class_cached_genres[(parent_genre, lang)]
+
+    @in_lane(LANE_LOOKUP)
+    async def get_langs(self):
+        if DatabaseBooks._class_cached_langs is None:
+            DatabaseBooks._class_cached_langs = list(await self._fetchall(SQL_QUERY_LANGS))
+        return DatabaseBooks._class_cached_langs
+
+    @cached_result
+    @in_lane(LANE_SEARCH)
+    async def search_books(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        sql_query, params = DatabaseBooks.build_search_books(
+            query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+        return [Book(*row) for row in await self._fetchall(sql_query, params)]
+
+    @cached_result
+    @in_lane(LANE_SEARCH)
+    async def search_books_page(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B,
+                                series_id=0, author_id=0, page_size=MAX_BOOKS_SEARCH, after=None, offset=0, with_count=False):
+        sql_query, params = DatabaseBooks.build_search_books_page(
+            query, lang, size_limit, rating_filter, search_area, series_id, author_id, page_size, after, offset)
+        books = [Book(*row) for row in await self._fetchall(sql_query, params)]
+
+        found_count = None
+        if with_count and after is None and offset == 0 and len(books) < page_size:
+            found_count = len(books)
+        elif with_count:
+            sql_query, params = DatabaseBooks.build_count_books(
+                query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+            found_count = min((await self._fetchone(sql_query, params))[0], MAX_BOOKS_SEARCH)
+        return books, found_count
+
+    @cached_result
+    @in_lane(LANE_SEARCH)
+    async def search_series(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        sql_query, params = DatabaseBooks.build_search_series(query, lang, size_limit, rating_filter, search_area)
+        return list(await self._fetchall(sql_query, params))
+
+    @cached_result
+    @in_lane(LANE_SEARCH)
+    async def search_authors(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        sql_query, params = DatabaseBooks.build_search_authors(query, lang, size_limit, rating_filter, search_area)
+        return list(await self._fetchall(sql_query, params))
+
+    @cached_result
+    async def suggest_queries(self, query, kinds=FUZZY_KINDS_BOOKS):
+        # Несколько коротких запросов к триграммному индексу - синхронным DatabaseBooks в очереди поиска
+        return await DB_LANES.run(LANE_SEARCH, DB_BOOKS.suggest_queries, query, kinds)
+
+    @cached_result
+    @in_lane(LANE_SEARCH)
+    async def search_pop_books(self, lang, size_limit, rating_filter=None, days_back: int = 0, genre_meta=''):
+        current_date = await self.get_lib_last_update() if days_back else None
+        sql_query, params = DatabaseBooks.build_search_pop_books(lang, size_limit, rating_filter, days_back, current_date,
+                                                                  genre_meta)
+        return [Book(*row) for row in await self._fetchall(sql_query, params)]
+
+    @cached_result
+    @in_lane(LANE_SEARCH)
+    async def search_pop_series(self, lang, size_limit, rating_filter=None, days_back: int = 0, genre_meta=''):
+        current_date = await self.get_lib_last_update() if days_back else None
+        sql_query, params = DatabaseBooks.build_search_pop_series(lang, size_limit, rating_filter, days_back, current_date,
+                                                                  genre_meta)
+        return list(await self._fetchall(sql_query, params))
+
+    @cached_result
+    @in_lane(LANE_SEARCH)
+    async def search_pop_authors(self, lang, size_limit, rating_filter=None, days_back: int = 0, genre_meta=''):
+        current_date = await self.get_lib_last_update() if days_back else None
+        sql_query, params = DatabaseBooks.build_search_pop_authors(lang, size_limit, rating_filter, days_back, current_date,
+                                                                  genre_meta)
+        return list(await self._fetchall(sql_query, params))
+
+    async def get_book_info(self, book_id):
+        # Обложка со страницы книги загружается вне очереди, чтобы не занимать исполнителя БД
+        return await fill_cover_url(await self._get_book_info(book_id))
+
+    @in_lane(LANE_LOOKUP)
+    async def _get_book_info(self, book_id):
+        return DatabaseBooks.make_book_info(await self._fetchone(SQL_QUERY_BOOK_INFO, (book_id,)))
+
+    @in_lane(LANE_LOOKUP)
+    async def get_book_details(self, book_id):
+        return DatabaseBooks.make_book_details(await self._fetchone(SQL_QUERY_BOOK_DETAILS, (book_id,)))
+
+    @in_lane(LANE_LOOKUP)
+    async def get_authors_id(self, book_id):
+        return DatabaseBooks.make_authors_id(await self._fetchall(SQL_QUERY_BOOK_AUTHORS_ID, (book_id,)))
+
+    async def _query_book_cards(self, book_ids):
+        if not book_ids:
+            return {}
+        sql_query, params = DatabaseBooks.build_book_cards(book_ids)
+        return DatabaseBooks.make_book_cards(await self._fetchall(sql_query, params))
+
+    @in_lane(LANE_LOOKUP)
+    async def _fetch_book_cards(self, book_ids):
+        return await self._query_book_cards(book_ids)
+
+    async def get_book_card(self, book_id):
+        return await get_cached_book_card(self._fetch_book_cards, book_id)
+
+    async def get_book_cards(self, book_ids):
+        return await get_cached_book_cards(self._fetch_book_cards, book_ids)
+
+    def prefetch_book_cards(self, user_id, book_ids):
+        CARD_PREFETCHER.schedule(user_id, book_ids,
+                                 functools.partial(DB_LANES.run_async, LANE_PREFETCH, self._query_book_cards))
+
+    @in_lane(LANE_LOOKUP)
+    async def get_author_info(self, author_id):
+        author_result, photo_result, annotation_result = await self._execute([
+            (SQL_QUERY_AUTHOR_NAME, (author_id,), True),
+            (SQL_QUERY_AUTHOR_PHOTO, (author_id,), True),
+            (SQL_QUERY_AUTHOR_ANNOTATION, (author_id,), True),
+        ])
+        return DatabaseBooks.make_author_info(author_result, photo_result, annotation_result)
+
+    @in_lane(LANE_LOOKUP)
+    async def get_book_reviews(self, book_id):
+        return list(await self._fetchall(SQL_QUERY_BOOK_REVIEWS, (book_id,)))
+
+
+class SqliteSearchDatabaseBooks:
+    """
+    Поиск по каталогу из индекса SQLite FTS5 в потоках очереди поиска,
+    остальные запросы - через обёрнутый асинхронный доступ к MariaDB
+    """
+
+    def __init__(self, db_async, search_db: SqliteSearchBooks):
+        self._db = db_async
+        self._search = search_db
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    async def check_library_version(self):
+        changed = await self._db.check_library_version()
+        if changed:
+            # После импорта новой базы индекс перестраивается и заменяется - переоткрываем файл
+            self._search.reload()
+        return changed
+
+    @cached_result
+    async def search_books(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        return await DB_LANES.run(LANE_SEARCH, self._search.search_books, query, lang, size_limit, rating_filter,
+                                  search_area=search_area, series_id=series_id, author_id=author_id)
+
+    @cached_result
+    async def search_books_page(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B,
+                                series_id=0, author_id=0, page_size=MAX_BOOKS_SEARCH, after=None, offset=0, with_count=False):
+        return await DB_LANES.run(LANE_SEARCH, self._search.search_books_page, query, lang, size_limit, rating_filter,
+                                  search_area=search_area, series_id=series_id, author_id=author_id,
+                                  page_size=page_size, after=after, offset=offset, with_count=with_count)
+
+    @cached_result
+    async def search_series(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        return await DB_LANES.run(LANE_SEARCH, self._search.search_series, query, lang, size_limit, rating_filter,
+                                  search_area=search_area)
+
+    @cached_result
+    async def search_authors(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B):
+        return await DB_LANES.run(LANE_SEARCH, self._search.search_authors, query, lang, size_limit, rating_filter,
+                                  search_area=search_area)
+
+
+def create_async_db_books():
+    """Создаёт асинхронный доступ к БД библиотеки согласно DB_BACKEND и SEARCH_BACKEND"""
+    if DB_BACKEND == DB_BACKEND_AIOMYSQL:
+        db_async = AsyncDatabaseBooks(DB_BOOKS.db_config, DB_BOOKS.pool_config)
+    else:
+        db_async = ExecutorDatabaseBooks(DB_BOOKS)
+
+    if SEARCH_BACKEND == SEARCH_BACKEND_SQLITE:
+        return SqliteSearchDatabaseBooks(db_async, SqliteSearchBooks(SQLITE_SEARCH_PATH))
+    return db_async
+
+
+DB_BOOKS_ASYNC = create_async_db_books()
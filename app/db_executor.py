@@ -0,0 +1,200 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+# Очереди (полосы) запросов к БД
+LANE_SEARCH = 'search'  # тяжёлые полнотекстовые поиски
+LANE_LOOKUP = 'lookup'  # дешёвые точечные запросы (карточка книги, автор, отзывы, справочники)
+LANE_ADMIN = 'admin'  # аналитика для админки и статистика библиотеки
+LANE_PREFETCH = 'prefetch'  # упреждающая загрузка карточек книг: при занятой очереди просто пропускается
+LANE_MAINTENANCE = 'maintenance'  # обслуживающие задачи (book_stats, libbook_fts, списки популярного)
+
+# Коэффициент сглаживания средних времён ожидания и выполнения
+EWMA_ALPHA = 0.1
+
+
+class DatabaseBusyError(Exception):
+    """Очередь запросов к БД переполнена - запрос отклонён"""
+
+    def __init__(self, lane_name):
+        super().__init__(f"Очередь '{lane_name}' переполнена")
+        self.lane_name = lane_name
+
+
+class DBLane:
+    """
+    Очередь запросов к БД с ограниченным числом исполнителей и ограниченной длиной.
+
+    Синхронные вызовы выполняются в собственном пуле потоков очереди (run),
+    асинхронные - под семафором с тем же числом исполнителей (run_async).
+    Если в очереди уже max_queue ожидающих запросов, новый запрос отклоняется
+    с DatabaseBusyError.
+    """
+
+    def __init__(self, name, workers, max_queue):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"db-{name}")
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+        # Метрики
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._avg_wait = 0.0
+        self._avg_run = 0.0
+        self._max_wait = 0.0
+
+    def _admit(self):
+        """Ставит запрос в очередь или отклоняет его, если очередь переполнена"""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise DatabaseBusyError(self.name)
+            self._queued += 1
+
+    def _on_start(self, wait_time):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._avg_wait += EWMA_ALPHA * (wait_time - self._avg_wait)
+            self._max_wait = max(self._max_wait, wait_time)
+
+    def _on_finish(self, run_time):
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+            self._avg_run += EWMA_ALPHA * (run_time - self._avg_run)
+
+    def _on_cancel(self):
+        with self._lock:
+            self._queued -= 1
+
+    async def run(self, func, *args, **kwargs):
+        """Выполняет синхронную функцию в пуле потоков очереди"""
+        self._admit()
+        enqueued = time.monotonic()
+        state = {'started': False, 'cancelled': False}
+
+        def task():
+            with self._lock:
+                if state['cancelled']:
+                    return None
+                state['started'] = True
+            started = time.monotonic()
+            self._on_start(started - enqueued)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._on_finish(time.monotonic() - started)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        except asyncio.CancelledError:
+            # Запрос отменён до начала выполнения - убираем его из очереди
+            with self._lock:
+                not_started = not state['started']
+                state['cancelled'] = True
+            if not_started:
+                self._on_cancel()
+            raise
+
+    async def run_async(self, coro_func, *args, **kwargs):
+        """Выполняет корутину не более чем в workers параллельных экземплярах"""
+        self._admit()
+        enqueued = time.monotonic()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            self._on_cancel()
+            raise
+
+        started = time.monotonic()
+        self._on_start(started - enqueued)
+        try:
+            return await coro_func(*args, **kwargs)
+        finally:
+            self._on_finish(time.monotonic() - started)
+            self._semaphore.release()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'queued': self._queued,
+                'running': self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'avg_wait_ms': round(self._avg_wait * 1000, 1),
+                'max_wait_ms': round(self._max_wait * 1000, 1),
+                'avg_run_ms': round(self._avg_run * 1000, 1),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DBLanes:
+    """Набор очередей запросов к БД"""
+
+    def __init__(self, lanes):
+        self._lanes = {lane.name: lane for lane in lanes}
+
+    def __getitem__(self, name) -> DBLane:
+        return self._lanes[name]
+
+    async def run(self, lane_name, func, *args, **kwargs):
+        return await self._lanes[lane_name].run(partial(func, *args, **kwargs))
+
+    async def run_async(self, lane_name, coro_func, *args, **kwargs):
+        return await self._lanes[lane_name].run_async(coro_func, *args, **kwargs)
+
+    def get_stats(self):
+        return {name: lane.get_stats() for name, lane in self._lanes.items()}
+
+    def shutdown(self):
+        for lane in self._lanes.values():
+            lane.shutdown()
+
+
+DB_LANES = DBLanes([
+    DBLane(LANE_SEARCH,
+           workers=int(os.getenv('DB_LANE_SEARCH_WORKERS', 4)),
+           max_queue=int(os.getenv('DB_LANE_SEARCH_QUEUE', 32))),
+    DBLane(LANE_LOOKUP,
+           workers=int(os.getenv('DB_LANE_LOOKUP_WORKERS', 4)),
+           max_queue=int(os.getenv('DB_LANE_LOOKUP_QUEUE', 64))),
+    # Один исполнитель: через эту очередь идут и запросы к SQLite логов,
+    # соединение которого привязано к создавшему его потоку
+    DBLane(LANE_ADMIN,
+           workers=1,
+           max_queue=int(os.getenv('DB_LANE_ADMIN_QUEUE', 4))),
+    DBLane(LANE_PREFETCH,
+           workers=int(os.getenv('DB_LANE_PREFETCH_WORKERS', 1)),
+           max_queue=int(os.getenv('DB_LANE_PREFETCH_QUEUE', 4))),
+    # Один исполнитель: долгие обслуживающие задачи выполняются по одной и не занимают
+    # очередь admin, через которую идут /about и аналитика
+    DBLane(LANE_MAINTENANCE,
+           workers=1,
+           max_queue=int(os.getenv('DB_LANE_MAINTENANCE_QUEUE', 4))),
+])
+
+
+def in_lane(lane_name):
+    """Декоратор: асинхронный метод выполняется через очередь lane_name"""
+    def decorator(coro_func):
+        @wraps(coro_func)
+        async def wrapper(*args, **kwargs):
+            return await DB_LANES.run_async(lane_name, coro_func, *args, **kwargs)
+        return wrapper
+    return decorator
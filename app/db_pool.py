@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mysql.connector
+
+
+class PoolTimeoutError(Exception):
+    """Не удалось получить соединение из пула за отведённое время"""
+    pass
+
+
+class ConnectionPool:
+    """
+    Пул соединений с MariaDB.
+
+    Соединения открываются лениво (не больше size штук), перед выдачей проверяются
+    пингом и пересоздаются по истечении max_lifetime. Если все соединения заняты,
+    вызывающий ждёт освобождения не дольше timeout секунд.
+    """
+
+    def __init__(self, db_config, size=8, timeout=10.0, max_lifetime=3600, pre_ping=True):
+        self.db_config = db_config
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+
+        self._idle = deque()  # (conn, created_at)
+        self._created_at = {}  # id(conn) -> время создания соединения
+        self._open = 0  # открытые соединения (свободные + выданные + создаваемые)
+        self._cond = threading.Condition()
+
+        # Статистика пула
+        self._checked_out = 0
+        self._waiting = 0
+        self._created = 0
+        self._recycled = 0
+        self._invalidated = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._checkouts = 0
+
+    def _new_connection(self):
+        """Открывает новое соединение с БД"""
+        conn = mysql.connector.connect(**self.db_config)
+        # Бот только читает каталог, а снапшот транзакции не должен
+        # переживать возврат соединения в пул
+        conn.autocommit = True
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn):
+        """Проверка живости соединения перед выдачей"""
+        try:
+            conn.ping(reconnect=False, attempts=1, delay=0)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Выдаёт соединение из пула, при необходимости открывая новое"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, created_at = self._idle.popleft()
+                    break
+                if self._open < self.size:
+                    # Резервируем место под новое соединение, открываем его вне блокировки
+                    self._open += 1
+                    conn, created_at = None, None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Нет свободных соединений с БД за {self.timeout} с (размер пула {self.size})"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        # Устаревшее или разорванное соединение заменяем новым
+        if conn is not None:
+            if time.monotonic() - created_at > self.max_lifetime:
+                self._close_quietly(conn)
+                conn = None
+                with self._cond:
+                    self._recycled += 1
+            elif self.pre_ping and not self._is_alive(conn):
+                self._close_quietly(conn)
+                conn = None
+                with self._cond:
+                    self._invalidated += 1
+
+        if conn is None:
+            try:
+                conn = self._new_connection()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            created_at = time.monotonic()
+            with self._cond:
+                self._created += 1
+
+        with self._cond:
+            self._created_at[id(conn)] = created_at
+            self._checked_out += 1
+            self._checkouts += 1
+            self._wait_time_total += time.monotonic() - started
+
+        return conn
+
+    def release(self, conn, discard=False):
+        """Возвращает соединение в пул (или закрывает его, если оно больше непригодно)"""
+        with self._cond:
+            created_at = self._created_at.pop(id(conn), time.monotonic())
+            self._checked_out -= 1
+
+        if not discard:
+            try:
+                # Сбрасываем незавершённую транзакцию, если кто-то её открыл
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard:
+                self._open -= 1
+                self._invalidated += 1
+            else:
+                self._idle.append((conn, created_at))
+            self._cond.notify()
+
+        if discard:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер: взять соединение из пула и вернуть обратно"""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except mysql.connector.errors.OperationalError:
+            # Потеря связи с сервером — соединение в пул не возвращаем
+            discard = True
+            raise
+        except mysql.connector.errors.InterfaceError:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """Закрывает все свободные соединения пула"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def get_stats(self):
+        """Статистика пула для админской панели"""
+        with self._cond:
+            avg_wait_ms = (self._wait_time_total / self._checkouts * 1000) if self._checkouts else 0.0
+            return {
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'waiting': self._waiting,
+                'created': self._created,
+                'recycled': self._recycled,
+                'invalidated': self._invalidated,
+                'timeouts': self._timeouts,
+                'checkouts': self._checkouts,
+                'avg_wait_ms': round(avg_wait_ms, 2),
+            }
@@ -4,11 +4,12 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Callbac
 from telegram.ext import CallbackContext
 from telegram.constants import ParseMode
 
-from handlers_utils import add_close_button
+from handlers_utils import add_close_button, BUSY_TEXT
 from handlers_settings import show_settings_menu
 from utils import get_latest_news, get_platform_recommendations
 from constants import BOT_NEWS_FILE_PATH, SHOW_POPULAR_ALL_TIME, SHOW_POPULAR_30_DAYS, SHOW_POPULAR_7_DAYS, SHOW_NOVELTY
-from database import DB_BOOKS
+from database_async import DB_BOOKS_ASYNC
+from db_executor import DatabaseBusyError
 from logger import logger
 from health import log_stats
 
@@ -45,7 +46,7 @@ async def start_cmd(update: Update, context: CallbackContext):
 async def genres_cmd(update: Update, context: CallbackContext):
     """Показывает родительские жанры"""
     try:
-        results = DB_BOOKS.get_parent_genres_with_counts()
+        results = await DB_BOOKS_ASYNC.get_parent_genres_with_counts()
 
         # print(f"DEBUG: genres_cmd results = {results}")
         # print(f"DEBUG: Number of results = {len(results)}")
@@ -64,6 +65,8 @@ async def genres_cmd(update: Update, context: CallbackContext):
 
         await update.message.reply_text(f"Посмотреть жанры:", reply_markup=reply_markup)
         # print(f"DEBUG: Message sent successfully")
+    except DatabaseBusyError:
+        await update.message.reply_text(BUSY_TEXT)
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка при загрузке жанров")
 
@@ -88,7 +91,7 @@ async def pop_cmd(update: Update, context: CallbackContext):
 
 # async def langs_cmd(update: Update, context: CallbackContext):
 #     """Показывает доступные языки"""
-#     results = DB_BOOKS.get_langs()
+#     results = await DB_BOOKS_ASYNC.get_langs()
 #     langs = ", ".join([f"<code>{lang[0].strip()}</code>" for lang in results])
 #     await update.message.reply_text(
 #         langs,
@@ -212,7 +215,7 @@ async def help_cmd(update: Update, context: CallbackContext):
 async def about_cmd(update: Update, context: CallbackContext):
     """Команда /about - информация о боте и библиотеке"""
     try:
-        stats = DB_BOOKS.get_library_stats()
+        stats = await DB_BOOKS_ASYNC.get_library_stats()
         last_update = stats['last_update']
         last_update_str = last_update
 
@@ -260,6 +263,8 @@ async def about_cmd(update: Update, context: CallbackContext):
             disable_web_page_preview=True
         )
 
+    except DatabaseBusyError:
+        await update.message.reply_text(BUSY_TEXT)
     except Exception as e:
         print(f"Error in about command: {e}")
         await update.message.reply_text(
@@ -5,16 +5,17 @@ from telegram.constants import ParseMode
 from telegram.error import BadRequest
 from telegram.ext import CallbackContext
 
-from database import DB_BOOKS
+from database_async import DB_BOOKS_ASYNC
+from db_executor import DatabaseBusyError
 from handlers_group import handle_group_callback
 from handlers_info import handle_close_info, handle_book_reviews, handle_book_info, handle_book_details, \
     handle_author_info, add_close_button_to_message
 from handlers_search import handle_authors_page_change, handle_series_page_change, handle_books_page_change, \
-    handle_search_series_books, handle_search_author_books, handle_search_books
+    handle_search_series_books, handle_search_author_books, handle_search_books, handle_did_you_mean
 from handlers_settings import create_rating_filter_keyboard, show_settings_menu, handle_set_actions, \
     handle_set_max_books, handle_set_lang_search, handle_set_size_limit, handle_set_book_format, \
     handle_set_search_type, handle_set_rating_filter, handle_set_search_area
-from handlers_utils import create_authors_keyboard, create_series_keyboard, handle_send_file
+from handlers_utils import create_authors_keyboard, create_series_keyboard, handle_send_file, BUSY_TEXT
 from constants import SETTING_MAX_BOOKS, SETTING_LANG_SEARCH, \
     SETTING_BOOK_FORMAT, SETTING_SEARCH_TYPE, SETTING_OPTIONS, SETTING_TITLES, SETTING_RATING_FILTER, \
     SETTING_SEARCH_AREA, SEARCH_TYPE_BOOKS, SEARCH_TYPE_SERIES, SEARCH_TYPE_AUTHORS, SETTING_SIZE_LIMIT
@@ -95,6 +96,7 @@ async def handle_private_callback(update, context, action, params):
         'book_reviews': handle_book_reviews,
         'close_info': handle_close_info,
         'close_message': handle_close_message,
+        'did_you_mean': handle_did_you_mean,  # Повтор поиска по подсказке исправления опечаток
     }
 
     # Добавим обработку toggle рейтингов
@@ -145,11 +147,11 @@ async def handle_show_genres(query, context, action, params):
         genre_index = int(params[0])  # Получаем genre index
 
         # Получаем полный список жанров
-        results = DB_BOOKS.get_parent_genres_with_counts()
+        results = await DB_BOOKS_ASYNC.get_parent_genres_with_counts()
 
         parent_genre = results[genre_index][0]  # Получаем название по индексу
         # print(f"DEBUG: {genre_id}")
-        genres = DB_BOOKS.get_genres_with_counts(parent_genre)
+        genres = await DB_BOOKS_ASYNC.get_genres_with_counts(parent_genre)
         # print(f"DEBUG: {genres}")
 
         if genres:
@@ -165,6 +167,8 @@ async def handle_show_genres(query, context, action, params):
 
         logger.log_user_action(query.from_user, "show genres of parent genre", parent_genre)
 
+    except DatabaseBusyError:
+        await query.answer(BUSY_TEXT)
     except Exception as e:
         print(f"Error in handle_show_genres: {e}")
         await query.message.reply_text("❌ Ошибка при загрузке жанров")
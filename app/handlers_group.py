@@ -4,10 +4,13 @@ from telegram import Update, InlineKeyboardMarkup
 from telegram.constants import ParseMode
 from telegram.ext import CallbackContext
 
-from database import DB_BOOKS
+from database_async import DB_BOOKS_ASYNC
+from db_executor import DatabaseBusyError
 from handlers_info import handle_book_info, handle_book_details, handle_author_info, handle_book_reviews, \
     handle_close_info
 from handlers_utils import create_books_keyboard, handle_send_file
+from handlers_search import BUSY_SEARCH_TEXT, SHORT_QUERY_TEXT
+from search_query import search_compiled, compile_query
 from constants import SEARCH_TYPE_BOOKS
 from context import set_last_activity, get_pages_of_books, get_found_books_count, set_last_search_query, \
     set_last_bot_message_id, get_user_params, update_user_params, set_books, get_last_bot_message_id
@@ -83,11 +86,20 @@ async def handle_group_search(update: Update, context: CallbackContext):
 
         print(f"DEBUG: clean_query_text = {clean_query_text}")
 
+        if not compile_query(clean_query_text).terms:
+            await processing_msg.edit_text(SHORT_QUERY_TEXT)
+            return
+
         # Выполняем поиск книг
-        books = DB_BOOKS.search_books(
-            clean_query_text, user_params.Lang, user_params.BookSize, user_params.Rating,
-            search_area=user_params.SearchArea
-        )
+        try:
+            books, _ = await search_compiled(clean_query_text, lambda expression: DB_BOOKS_ASYNC.search_books(
+                expression, user_params.Lang, user_params.BookSize, user_params.Rating,
+                search_area=user_params.SearchArea
+            ))
+        except DatabaseBusyError:
+            # Очередь поисковых запросов переполнена
+            await processing_msg.edit_text(BUSY_SEARCH_TEXT)
+            return
         found_books_count = len(books)
 
         # Удаляем сообщение "Ищу книги..."
@@ -4,7 +4,9 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery
 from telegram.constants import ParseMode
 from telegram.ext import CallbackContext
 
-from database import DB_BOOKS
+from database_async import DB_BOOKS_ASYNC
+from db_executor import DatabaseBusyError
+from handlers_utils import BUSY_TEXT
 from utils import format_book_reviews, format_author_info, format_book_details, format_book_info
 
 # ===== ИНФОРМАЦИЯ О КНИГАХ И АВТОРАХ =====
@@ -20,8 +22,8 @@ async def handle_book_info(query, context, action, params):
             disable_notification=True
         )
 
-        # Получаем информацию о книге из БД
-        book_info = await DB_BOOKS.get_book_info(book_id)
+        # Карточка книги: информация и ID авторов одним запросом, повторные открытия - из кеша
+        book_info = await DB_BOOKS_ASYNC.get_book_card(book_id)
 
         if not book_info:
             await query.answer("❌ Информация о книге не найдена")
@@ -47,7 +49,7 @@ async def handle_book_info(query, context, action, params):
                 parse_mode=ParseMode.HTML
             )
 
-        author_ids = await DB_BOOKS.get_authors_id(book_id)
+        author_ids = book_info['author_ids']
 
         # print(f"DEBUG: authors_ids = {author_ids}")
 
@@ -67,6 +69,9 @@ async def handle_book_info(query, context, action, params):
         await info_message.edit_reply_markup(reply_markup)
 
 
+    except DatabaseBusyError:
+        # Очередь запросов к БД переполнена
+        await processing_msg.edit_text(BUSY_TEXT)
     except Exception as e:
         print(f"Error in handle_book_info: {e}")
         await query.answer("❌ Ошибка при загрузке информации о книге")
@@ -76,7 +81,7 @@ async def handle_book_details(query, context, action, params):
     """Показывает детальную информацию о книге с обложкой и аннотацией"""
     try:
         book_id = params[0]
-        book_details = await DB_BOOKS.get_book_details(book_id)
+        book_details = await DB_BOOKS_ASYNC.get_book_details(book_id)
 
         # print(f"DEBUG: book_details = {book_details}")
 
@@ -95,6 +100,8 @@ async def handle_book_details(query, context, action, params):
         # Добавляем кнопку закрытия с ID сообщения
         await add_close_button_to_message(info_message,[info_message.message_id])
 
+    except DatabaseBusyError:
+        await query.answer(BUSY_TEXT)
     except Exception as e:
         print(f"Error in handle_book_details: {e}")
         await query.answer("❌ Ошибка при загрузке детальной информации")
@@ -105,7 +112,7 @@ async def handle_author_info(query: CallbackQuery, context: CallbackContext, act
     try:
         author_id = int(params[0])
         # print(f"DEBUG: params = {params}")
-        author_info = await DB_BOOKS.get_author_info(author_id)
+        author_info = await DB_BOOKS_ASYNC.get_author_info(author_id)
         # print(f"DEBUG: author_info = {author_info}")
 
         if not author_info:
@@ -127,6 +134,8 @@ async def handle_author_info(query: CallbackQuery, context: CallbackContext, act
         # Кнопка закрытия с передачей всех message_id
         await add_close_button_to_message(bio_message,message_ids)
 
+    except DatabaseBusyError:
+        await query.answer(BUSY_TEXT)
     except Exception as e:
         print(f"Error in handle_author_info: {e}")
         await query.answer("❌ Ошибка при загрузке информации об авторе")
@@ -136,7 +145,7 @@ async def handle_book_reviews(query, context, action, params):
     """Показывает отзывы о книге"""
     try:
         book_id = params[0]
-        reviews = await DB_BOOKS.get_book_reviews(book_id)
+        reviews = await DB_BOOKS_ASYNC.get_book_reviews(book_id)
 
         # if not reviews:
         #     await query.message.reply_text("📝 Отзывов пока нет")
@@ -157,6 +166,8 @@ async def handle_book_reviews(query, context, action, params):
         # Добавляем кнопку закрытия с ID сообщения
         await add_close_button_to_message(info_message,[info_message.message_id])
 
+    except DatabaseBusyError:
+        await query.answer(BUSY_TEXT)
     except Exception as e:
         print(f"Error in handle_book_reviews: {e}")
         await query.answer("❌ Ошибка при загрузке отзывов")
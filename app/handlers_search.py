@@ -1,4 +1,5 @@
 import asyncio
+import os
 from datetime import datetime
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -7,18 +8,36 @@ from telegram.constants import ParseMode
 from telegram.error import Forbidden
 # from telegram._message import Message
 
-from handlers_utils import create_books_keyboard, create_series_keyboard, create_authors_keyboard
+from handlers_utils import create_books_keyboard, create_books_page_keyboard, create_series_keyboard, \
+    create_authors_keyboard
 from utils import form_header_books
-from database import DB_BOOKS
+from database_async import DB_BOOKS_ASYNC
+from db_executor import DatabaseBusyError
+from card_prefetch import CARD_PREFETCHER
 from constants import SEARCH_TYPE_BOOKS, SEARCH_TYPE_SERIES, SEARCH_TYPE_AUTHORS, SETTING_SEARCH_AREA_B, \
-    SETTING_SEARCH_AREA_BA
+    SETTING_SEARCH_AREA_BA, MAX_BOOKS_SEARCH
 from context import get_user_params, get_last_bot_message_id, set_books, set_last_activity, set_last_bot_message_id, \
     set_last_search_query, set_series, set_last_series_page, get_last_search_query, set_current_series_name, \
     set_authors, set_last_authors_page, set_current_author_id, set_current_author_name, get_pages_of_books, \
     get_current_author_id, get_found_books_count, get_current_series_name, get_current_author_name, get_pages_of_series, \
-    get_found_series_count, get_pages_of_authors, get_found_authors_count, get_switch_search, set_switch_search
+    get_found_series_count, get_pages_of_authors, get_found_authors_count, get_switch_search, set_switch_search, \
+    get_books_cursor, get_suggestions, set_suggestions
 from logger import logger
 from health import log_stats
+from search_query import search_compiled, compile_query, FT_MIN_TOKEN_SIZE
+from search_fuzzy import FUZZY_KIND_AUTHOR, FUZZY_KINDS_BOOKS
+
+# Ответ при переполненной очереди поисковых запросов к БД
+BUSY_SEARCH_TEXT = "⏳ Сейчас очень много запросов. Повторите поиск через минуту"
+# Ответ на запрос без слов для поиска: полнотекстовый индекс не хранит слова короче FT_MIN_TOKEN_SIZE
+SHORT_QUERY_TEXT = f"😞 В запросе нет слов для поиска. Нужно хотя бы одно слово из {FT_MIN_TOKEN_SIZE} и более букв."
+
+# Режим выдачи найденных книг:
+#   eager - все найденные книги (до MAX_BOOKS_SEARCH) загружаются сразу и хранятся в сессии по страницам
+#   lazy - загружается только первая страница, остальные - при перелистывании по курсору в сессии
+SEARCH_RESULTS_EAGER = 'eager'
+SEARCH_RESULTS_LAZY = 'lazy'
+SEARCH_RESULTS_MODE = os.getenv('SEARCH_RESULTS_MODE', SEARCH_RESULTS_EAGER)
 
 
 # ===== ПОИСК И НАВИГАЦИЯ =====
@@ -94,8 +113,61 @@ async def handle_search_books(update: Update, context: CallbackContext):
     )
 
 
+def make_books_cursor(expression, user_params, series_id=0, author_id=0):
+    """Курсор постраничной выдачи: параметры поиска и ключи начала уже просмотренных страниц"""
+    return {
+        'args': {
+            'query': expression,
+            'lang': user_params.Lang,
+            'size_limit': user_params.BookSize,
+            'rating_filter': user_params.Rating,
+            'search_area': user_params.SearchArea,
+            'series_id': series_id,
+            'author_id': author_id,
+        },
+        'page_size': user_params.MaxBooks,
+        # Номер страницы -> ключ (Relevance, BookID) последней книги предыдущей страницы
+        'after': {},
+        # Число найденных книг: известно, когда загружена последняя страница
+        'found_count': None,
+    }
+
+
+async def fetch_books_page(cursor, page):
+    """
+    Загружает страницу книг по курсору. Возвращает (книги страницы, число найденных книг или None,
+    если последняя страница ещё не загружена).
+    Загружается на одну книгу больше страницы: так видно, есть ли следующая, без подсчёта всех
+    найденных книг. Следующая страница за просмотренной выбирается по ключу (keyset), переход
+    на произвольную страницу (например, "В конец") - по смещению.
+    """
+    page_size = cursor['page_size']
+    after = cursor['after'].get(page)
+    books, _ = await DB_BOOKS_ASYNC.search_books_page(
+        **cursor['args'],
+        page_size=page_size + 1,
+        after=after,
+        offset=page * page_size if after is None else 0
+    )
+    has_more = len(books) > page_size and (page + 1) * page_size < MAX_BOOKS_SEARCH
+    books = books[:page_size]
+    if has_more:
+        last_book = books[-1]
+        cursor['after'][page + 1] = (last_book.Relevance, last_book.FileName)
+    else:
+        cursor['found_count'] = page * page_size + len(books)
+    return books, cursor['found_count']
+
+
+def count_pages(found_count, page_size):
+    """Число страниц (None - неизвестно)"""
+    return None if found_count is None else (found_count + page_size - 1) // page_size
+
+
 async def async_search_books(context: CallbackContext, query_text: str, processing_msg, user, series_id=0, author_id=0):
     """Асинхронная задача поиска книг"""
+    # Новый поиск - карточки книг прежней страницы больше не нужны
+    CARD_PREFETCHER.cancel(user.id)
     try:
         # Извлекаем из контекста или БД настройки пользователя
         user_params = get_user_params(context)
@@ -105,38 +177,53 @@ async def async_search_books(context: CallbackContext, query_text: str, processi
 
         # print(f"DEBUG: {switch_search}")
 
+        if not switch_search and not series_id and not compile_query(query_text).terms:
+            # MATCH по пустому выражению ничего не найдёт - не нагружаем БД
+            await processing_msg.edit_text(SHORT_QUERY_TEXT)
+            return
+
+        cursor = None
         if switch_search:
             days = int(switch_search.removeprefix('show_pop_'))
-            books = await asyncio.get_event_loop().run_in_executor(
-                None,  # Используем стандартный ThreadPoolExecutor
-                lambda: DB_BOOKS.search_pop_books(
-                    user_params.Lang, user_params.BookSize, user_params.Rating,
-                    days
-                )
+            books = await DB_BOOKS_ASYNC.search_pop_books(
+                user_params.Lang, user_params.BookSize, user_params.Rating,
+                days
             )
+            found_books_count = len(books)
+        elif SEARCH_RESULTS_MODE == SEARCH_RESULTS_LAZY:
+            # Только первая страница (число найденных книг - если все поместились на неё);
+            # курсор запоминает выражение, по которому книги нашлись
+            async def search_first_page(expression):
+                first_page_cursor = make_books_cursor(expression, user_params, series_id, author_id)
+                return *(await fetch_books_page(first_page_cursor, 0)), first_page_cursor
+
+            (books, found_books_count, cursor), _ = await search_compiled(query_text, search_first_page)
         else:
-            books = await asyncio.get_event_loop().run_in_executor(
-                None,  # Используем стандартный ThreadPoolExecutor
-                lambda: DB_BOOKS.search_books(
-                    query_text, user_params.Lang, user_params.BookSize, user_params.Rating,
-                    search_area=user_params.SearchArea,
-                    series_id=series_id,
-                    author_id=author_id
-                )
-            )
-        found_books_count = len(books)
+            books, _ = await search_compiled(query_text, lambda expression: DB_BOOKS_ASYNC.search_books(
+                expression, user_params.Lang, user_params.BookSize, user_params.Rating,
+                search_area=user_params.SearchArea,
+                series_id=series_id,
+                author_id=author_id
+            ))
+            found_books_count = len(books)
 
         # Обрабатываем результаты
-        await process_search_books(context, books, found_books_count, processing_msg, query_text, user, author_id)
+        await process_search_books(context, books, found_books_count, processing_msg, query_text, user, author_id, cursor)
 
+    except DatabaseBusyError:
+        # Очередь поисковых запросов переполнена
+        await processing_msg.edit_text(BUSY_SEARCH_TEXT)
     except Exception as e:
         # Обработка ошибок
         await processing_msg.edit_text(f"❌ Ошибка при поиске: {str(e)}")
 
 
 async def process_search_books(context: CallbackContext, books, found_books_count: int, processing_msg, query_text: str,
-                               user, author_id=0):
-    """Обработка и отображение результатов поиска"""
+                               user, author_id=0, cursor=None):
+    """
+    Обработка и отображение результатов поиска.
+    С курсором (SEARCH_RESULTS_MODE=lazy) books - только первая страница найденных книг
+    """
     series_name = None
     author_name = None
     user_params = get_user_params(context)
@@ -149,11 +236,16 @@ async def process_search_books(context: CallbackContext, books, found_books_coun
     # Проверяем, найдены ли книги
     if books:
         # Извлекаем из контекста или БД настройки пользователя
-        pages_of_result = [books[i:i + user_params.MaxBooks] for i in range(0, len(books), user_params.MaxBooks)]
         page = 0
-
-        # Собираем кнопки с книгами для настроенного вывода
-        keyboard = create_books_keyboard(page, pages_of_result, search_type)
+        if cursor is None:
+            pages_of_result = [books[i:i + user_params.MaxBooks] for i in range(0, len(books), user_params.MaxBooks)]
+            # Собираем кнопки с книгами для настроенного вывода
+            keyboard = create_books_keyboard(page, pages_of_result, search_type)
+        else:
+            # В сессии остаётся только курсор, страницы загружаются при перелистывании
+            pages_of_result = None
+            keyboard = create_books_page_keyboard(
+                page, books, count_pages(found_books_count, cursor['page_size']), search_type)
 
         if search_type == SEARCH_TYPE_SERIES:
             # Извлекаем имя серии из данных первой книги
@@ -183,17 +275,17 @@ async def process_search_books(context: CallbackContext, books, found_books_coun
             )
             # Заменяем сообщение об ожидании на результаты
             await processing_msg.edit_text(header_found_text, reply_markup=reply_markup)
+            # Карточки книг показанной страницы - заранее, пока пользователь выбирает книгу
+            page_books = pages_of_result[page] if cursor is None else books
+            DB_BOOKS_ASYNC.prefetch_book_cards(user.id, [book.FileName for book in page_books])
 
-            set_books(context, pages_of_result, found_books_count)
+            set_books(context, pages_of_result, found_books_count, cursor)
             set_last_activity(context, datetime.now())  # Сохраняем время поиска
             # СОХРАНЯЕМ ID СООБЩЕНИЯ С РЕЗУЛЬТАТАМИ И ЗАПРОС
             set_last_bot_message_id(context, processing_msg.message_id)
             set_last_search_query(context, query_text)
     else:
-        await processing_msg.edit_text(
-            "😞 Не нашёл подходящих книг. Попробуйте другие критерии поиска.",
-            parse_mode=ParseMode.HTML
-        )
+        await reply_not_found(context, processing_msg, query_text, SEARCH_TYPE_BOOKS, "Не нашёл подходящих книг.")
 
     if show_pop:
         by = ' popular'
@@ -208,7 +300,59 @@ async def process_search_books(context: CallbackContext, books, found_books_coun
     else:
         by = ''
 
-    logger.log_user_action(user, "searched for books" + by, f"{query_text}; count:{found_books_count}")
+    # Число найденных книг неизвестно (SEARCH_RESULTS_MODE=lazy) - в журнал идёт показанное с '+'
+    log_count = found_books_count if found_books_count is not None else f"{len(books)}+"
+    logger.log_user_action(user, "searched for books" + by, f"{query_text}; count:{log_count}")
+
+
+async def reply_not_found(context: CallbackContext, processing_msg, query_text: str, search_type, not_found_text):
+    """
+    Сообщает, что ничего не найдено. Если в запросе похоже на опечатку, предлагает
+    исправленные запросы кнопками "Возможно, вы имели в виду" (обработчик handle_did_you_mean)
+    """
+    suggestions = []
+    if query_text:
+        kinds = FUZZY_KIND_AUTHOR if search_type == SEARCH_TYPE_AUTHORS else FUZZY_KINDS_BOOKS
+        try:
+            suggestions = await DB_BOOKS_ASYNC.suggest_queries(query_text, kinds)
+        except Exception as e:
+            print(f"Ошибка подбора подсказок: {e}")
+    set_suggestions(context, suggestions)
+
+    if suggestions:
+        keyboard = [
+            [InlineKeyboardButton(f"🔎 {text}", callback_data=f"did_you_mean:{search_type}:{index}")]
+            for index, text in enumerate(suggestions)
+        ]
+        await processing_msg.edit_text(
+            f"😞 {not_found_text} Возможно, вы имели в виду:",
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+    else:
+        await processing_msg.edit_text(
+            f"😞 {not_found_text} Попробуйте другие критерии поиска.",
+            parse_mode=ParseMode.HTML
+        )
+
+
+async def handle_did_you_mean(query, context, action, params):
+    """Повторяет поиск книг или авторов по выбранной подсказке исправления опечаток"""
+    try:
+        search_type = params[0]
+        query_text = (get_suggestions(context) or [])[int(params[1])]
+    except (ValueError, IndexError):
+        await query.edit_message_text("❌ Подсказка устарела. Повторите поиск")
+        return
+
+    processing_msg = query.message
+    if search_type == SEARCH_TYPE_AUTHORS:
+        await processing_msg.edit_text("⏰ <i>Ищу авторов, ожидайте...</i>", parse_mode=ParseMode.HTML)
+        await async_search_authors(context, query_text, processing_msg, query.from_user)
+    else:
+        # Поиск по тексту, а не показ новинок/популярных
+        set_switch_search(context, None)
+        await processing_msg.edit_text("⏰ <i>Ищу книги, ожидайте...</i>", parse_mode=ParseMode.HTML)
+        await async_search_books(context, query_text, processing_msg, query.from_user)
 
 
 async def handle_search_series(update: Update, context: CallbackContext):
@@ -248,19 +392,23 @@ async def async_search_series(context: CallbackContext, query_text: str, process
         # Извлекаем настройки пользователя из контекста или БД
         user_params = get_user_params(context)
 
+        if not compile_query(query_text).terms:
+            await processing_msg.edit_text(SHORT_QUERY_TEXT)
+            return
+
         # Ищем серии
-        series = await asyncio.get_event_loop().run_in_executor(
-            None,  # Используем стандартный ThreadPoolExecutor
-            lambda: DB_BOOKS.search_series(
-                query_text, user_params.Lang, user_params.BookSize, user_params.Rating,
-                search_area=user_params.SearchArea
-            )
-        )
+        series, _ = await search_compiled(query_text, lambda expression: DB_BOOKS_ASYNC.search_series(
+            expression, user_params.Lang, user_params.BookSize, user_params.Rating,
+            search_area=user_params.SearchArea
+        ))
         found_series_count = len(series)
 
         # Обрабатываем результаты
         await process_search_series(context, series, found_series_count, processing_msg, query_text, user)
 
+    except DatabaseBusyError:
+        # Очередь поисковых запросов переполнена
+        await processing_msg.edit_text(BUSY_SEARCH_TEXT)
     except Exception as e:
         # Обработка ошибок
         await processing_msg.edit_text(f"❌ Ошибка при поиске: {str(e)}")
@@ -312,7 +460,7 @@ async def handle_search_series_books(query, context, action, params):
     try:
         series_id = int(params[0])
         user = query.from_user
-        # Ищем книги серии в комбинации с предыдущим запросом
+        # Книги серии ищутся по индексу серий (с фильтрами пользователя), запрос нужен для поиска без серии
         query_text = get_last_search_query(context)
 
         # Запускаем асинхронный поиск
@@ -395,19 +543,23 @@ async def async_search_authors(context: CallbackContext, query_text: str, proces
         # Извлекаем настройки пользователя из контекста или БД
         user_params = get_user_params(context)
 
+        if not compile_query(query_text).terms:
+            await processing_msg.edit_text(SHORT_QUERY_TEXT)
+            return
+
         # Ищем авторов
-        authors = await asyncio.get_event_loop().run_in_executor(
-            None,  # Используем стандартный ThreadPoolExecutor
-            lambda: DB_BOOKS.search_authors(
-                query_text, user_params.Lang, user_params.BookSize, user_params.Rating,
-                search_area=user_params.SearchArea
-            )
-        )
+        authors, _ = await search_compiled(query_text, lambda expression: DB_BOOKS_ASYNC.search_authors(
+            expression, user_params.Lang, user_params.BookSize, user_params.Rating,
+            search_area=user_params.SearchArea
+        ))
         found_authors_count = len(authors)
 
         # Обрабатываем результаты
         await process_search_authors(context, authors, found_authors_count, processing_msg, query_text, user)
 
+    except DatabaseBusyError:
+        # Очередь поисковых запросов переполнена
+        await processing_msg.edit_text(BUSY_SEARCH_TEXT)
     except Exception as e:
         # Обработка ошибок
         await processing_msg.edit_text(f"❌ Ошибка при поиске: {str(e)}")
@@ -439,10 +591,7 @@ async def process_search_authors(context: CallbackContext, authors, found_author
             set_last_bot_message_id(context, processing_msg.message_id)
             set_last_search_query(context, query_text)
     else:
-        await processing_msg.edit_text(
-            "😞 Не нашёл подходящих авторов. Попробуйте другие критерии поиска.",
-            parse_mode=ParseMode.HTML
-        )
+        await reply_not_found(context, processing_msg, query_text, SEARCH_TYPE_AUTHORS, "Не нашёл подходящих авторов.")
 
     if search_area == SETTING_SEARCH_AREA_B:
         by = ' by book info'
@@ -514,7 +663,8 @@ async def handle_books_page_change(query, context, action, params):
     try:
         # Проверяем, что данные поиска еще существуют
         pages_of_books = get_pages_of_books(context)
-        if not pages_of_books:
+        cursor = get_books_cursor(context)
+        if not pages_of_books and not cursor:
             await query.edit_message_text("❌ Сессия поиска истекла. Начните поиск заново.")
             return
 
@@ -525,7 +675,16 @@ async def handle_books_page_change(query, context, action, params):
         show_pop = get_switch_search(context)
         search_context = user_params.SearchType if not show_pop else SEARCH_TYPE_BOOKS
         # print(f"DEBUG: {show_pop}, {search_context}")
-        keyboard = create_books_keyboard(page, pages_of_books, search_context)
+        found_books_count = get_found_books_count(context)
+        if cursor:
+            page_size = cursor['page_size']
+            books_in_page, found_books_count = await fetch_books_page(cursor, page)
+            keyboard = create_books_page_keyboard(
+                page, books_in_page, count_pages(found_books_count, page_size), search_context)
+        else:
+            page_size = user_params.MaxBooks
+            books_in_page = pages_of_books[page]
+            keyboard = create_books_keyboard(page, pages_of_books, search_context)
         if search_context == SEARCH_TYPE_AUTHORS:
             author_id = get_current_author_id(context)
             keyboard.append([InlineKeyboardButton("👤 Об авторе", callback_data=f"author_info:{author_id}")])
@@ -533,7 +692,6 @@ async def handle_books_page_change(query, context, action, params):
         reply_markup = InlineKeyboardMarkup(keyboard)
 
         if reply_markup:
-            found_books_count = get_found_books_count(context)
             # Формируем заголовок в зависимости от контекста
             series_name = None
             author_name = None
@@ -543,14 +701,17 @@ async def handle_books_page_change(query, context, action, params):
                 author_name = get_current_author_name(context)
             show_pop = get_switch_search(context)
             header_text = form_header_books(
-                page, user_params.MaxBooks, found_books_count, SEARCH_TYPE_BOOKS,
+                page, page_size, found_books_count, SEARCH_TYPE_BOOKS,
                 series_name=series_name,
                 author_name=author_name,
                 search_area=user_params.SearchArea,
                 show_pop=show_pop
             )
             await query.edit_message_text(header_text, reply_markup=reply_markup)
+            DB_BOOKS_ASYNC.prefetch_book_cards(query.from_user.id, [book.FileName for book in books_in_page])
 
+    except DatabaseBusyError:
+        await query.answer(BUSY_SEARCH_TEXT)
     except ValueError:
         await query.answer("❌ Ошибка в номере страницы")
     except Exception as e:
@@ -3,7 +3,7 @@ from telegram.error import BadRequest
 from telegram.ext import CallbackContext
 
 from handlers_utils import add_close_button, edit_or_reply_message, create_back_button
-from database import DB_BOOKS
+from database_async import DB_BOOKS_ASYNC
 from constants import  SETTING_MAX_BOOKS, SETTING_LANG_SEARCH, SETTING_SIZE_LIMIT, \
     SETTING_BOOK_FORMAT, SETTING_SEARCH_TYPE, SETTING_OPTIONS, SETTING_TITLES, SETTING_RATING_FILTER, BOOK_RATINGS, \
     SETTING_SEARCH_AREA
@@ -49,7 +49,7 @@ async def handle_set_lang_search(query, context, action, params):
     current_value = user_params.Lang
 
     # Получаем языки из БД и преобразуем в нужный формат
-    langs = DB_BOOKS.get_langs()
+    langs = await DB_BOOKS_ASYNC.get_langs()
     options = [(lang[0], lang[0]) for lang in langs if lang[0]]
 
     reply_markup = create_settings_keyboard(SETTING_LANG_SEARCH, current_value, options)
@@ -166,7 +166,7 @@ async def handle_set_actions(query, context, action, params):
 
     # Создаем обновленную клавиатуру
     if setting_type == 'lang_search':
-        langs = DB_BOOKS.get_langs()
+        langs = await DB_BOOKS_ASYNC.get_langs()
         options = [(lang[0], lang[0]) for lang in langs if lang[0]]
     else:
         options = SETTING_OPTIONS[setting_type]
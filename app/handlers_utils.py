@@ -9,6 +9,9 @@ from utils import format_size, upload_to_tmpfiles,  get_short_donation_notice
 from logger import logger
 from flibusta_client import flibusta_client, FlibustaClient
 
+# Ответ при переполненной очереди запросов к БД (карточки книг, авторы, жанры, статистика)
+BUSY_TEXT = "⏳ Сервер занят, попробуйте позже"
+
 # ===== УТИЛИТЫ И ХЕЛПЕРЫ =====
 async def handle_send_file(query, context, action, params, for_user = None):
     """Обрабатывает отправку файла"""
@@ -131,50 +134,61 @@ def add_close_button(keyboard):
 
 
 # ===== КЛАВИАТУРЫ И ИНТЕРФЕЙС =====
-def add_navigation_buttons(keyboard, search_type, page, pages):
+def add_navigation_buttons(keyboard, search_type, page, pages_count):
+    """Кнопки навигации по страницам; pages_count = None - число страниц неизвестно, но следующая есть"""
     navigation_buttons = []
     if page > 0:
         navigation_buttons.append(InlineKeyboardButton("⬆ В начало", callback_data=f"{search_type}_page_0"))
         navigation_buttons.append(
             InlineKeyboardButton("⬅️ Назад", callback_data=f"{search_type}_page_{page - 1}"))
-    if page < len(pages) - 1:
+    if pages_count is None:
+        navigation_buttons.append(
+            InlineKeyboardButton("Вперёд ➡️", callback_data=f"{search_type}_page_{page + 1}"))
+    elif page < pages_count - 1:
         navigation_buttons.append(
             InlineKeyboardButton("Вперёд ➡️", callback_data=f"{search_type}_page_{page + 1}"))
         navigation_buttons.append(
-            InlineKeyboardButton("В конец ⬇️️️", callback_data=f"{search_type}_page_{len(pages) - 1}"))
+            InlineKeyboardButton("В конец ⬇️️️", callback_data=f"{search_type}_page_{pages_count - 1}"))
     if navigation_buttons:
         keyboard.append(navigation_buttons)
 
 
 def create_books_keyboard(page, pages_of_books, search_context=SEARCH_TYPE_BOOKS):
     """Создание клавиатуры с кнопками книг и кнопками навигации"""
-    keyboard = []
+    if not pages_of_books:
+        return []
+    return create_books_page_keyboard(page, pages_of_books[page], len(pages_of_books), search_context)
 
-    if pages_of_books:
-        books_in_page = pages_of_books[page]
 
-        if books_in_page:
-            for book in books_in_page:
-                # ДОБАВЛЯЕМ ЭМОДЗИ РЕЙТИНГА
-                rating_emoji = get_rating_emoji(book.LibRate)
-                text = f"{rating_emoji} {book.Title} ({book.LastName} {book.FirstName}) {format_size(book.BookSize)}/{book.Genre}"
-                if book.SearchYear != 0:
-                    text += f"/{str(book.SearchYear)}"
-                keyboard.append([InlineKeyboardButton(
-                    text,
-                    callback_data = f"book_info:{book.FileName}"
-                )])
-
-            # Добавляем кнопки для навигации
-            add_navigation_buttons(keyboard, SEARCH_TYPE_BOOKS, page, pages_of_books)
-
-            # Добавляем кнопку "Назад к сериям" только при поиске по сериям
-            if search_context == SEARCH_TYPE_SERIES:
-                keyboard.append([InlineKeyboardButton("⤴️ Назад к сериям", callback_data="back_to_series")])
+def create_books_page_keyboard(page, books_in_page, pages_count, search_context=SEARCH_TYPE_BOOKS):
+    """
+    Клавиатура одной страницы книг: остальные страницы не загружены, известно только их число
+    (pages_count = None - неизвестно, есть ли страницы дальше следующей)
+    """
+    keyboard = []
 
-            # Добавляем кнопку "Назад к авторам" при поиске по авторам
-            elif search_context == SEARCH_TYPE_AUTHORS:
-                keyboard.append([InlineKeyboardButton("⤴️ Назад к авторам", callback_data="back_to_authors")])
+    if books_in_page:
+        for book in books_in_page:
+            # ДОБАВЛЯЕМ ЭМОДЗИ РЕЙТИНГА
+            rating_emoji = get_rating_emoji(book.LibRate)
+            text = f"{rating_emoji} {book.Title} ({book.LastName} {book.FirstName}) {format_size(book.BookSize)}/{book.Genre}"
+            if book.SearchYear != 0:
+                text += f"/{str(book.SearchYear)}"
+            keyboard.append([InlineKeyboardButton(
+                text,
+                callback_data = f"book_info:{book.FileName}"
+            )])
+
+        # Добавляем кнопки для навигации
+        add_navigation_buttons(keyboard, SEARCH_TYPE_BOOKS, page, pages_count)
+
+        # Добавляем кнопку "Назад к сериям" только при поиске по сериям
+        if search_context == SEARCH_TYPE_SERIES:
+            keyboard.append([InlineKeyboardButton("⤴️ Назад к сериям", callback_data="back_to_series")])
+
+        # Добавляем кнопку "Назад к авторам" при поиске по авторам
+        elif search_context == SEARCH_TYPE_AUTHORS:
+            keyboard.append([InlineKeyboardButton("⤴️ Назад к авторам", callback_data="back_to_authors")])
 
     return keyboard
 
@@ -195,7 +209,7 @@ def create_series_keyboard(page, pages_of_series):
                 )])
 
             # Добавляем кнопки для навигации
-            add_navigation_buttons(keyboard, SEARCH_TYPE_SERIES, page, pages_of_series)
+            add_navigation_buttons(keyboard, SEARCH_TYPE_SERIES, page, len(pages_of_series))
 
     return keyboard
 
@@ -216,6 +230,6 @@ def create_authors_keyboard(page, pages_of_authors):
                 )])
 
             # Добавляем кнопки для навигации
-            add_navigation_buttons(keyboard, SEARCH_TYPE_AUTHORS, page, pages_of_authors)
+            add_navigation_buttons(keyboard, SEARCH_TYPE_AUTHORS, page, len(pages_of_authors))
 
     return keyboard
\ No newline at end of file
@@ -1,11 +1,13 @@
 import psutil
 import gc
+import time
 from datetime import datetime
 
 from telegram.ext import CallbackContext
 
 from context import ContextManager
 from constants import CLEANUP_INTERVAL
+from database_async import DB_BOOKS_ASYNC
 from logger import logger
 
 def get_memory_usage():
@@ -138,4 +140,44 @@ async def cleanup_old_sessions(context: CallbackContext):
             await log_stats(context)
 
     except Exception as e:
-        print(f"❌ Cleanup error: {e}")
\ No newline at end of file
+        print(f"❌ Cleanup error: {e}")
+
+
+async def refresh_book_stats(context: CallbackContext):
+    """Инкрементальное обновление агрегатов оценок, рекомендаций и отзывов (book_stats)"""
+    try:
+        changed = await DB_BOOKS_ASYNC.refresh_book_stats()
+        if changed > 0:
+            print(f"📊 Refreshed book stats of {changed} book(s)")
+    except Exception as e:
+        print(f"❌ Book stats refresh error: {e}")
+
+
+async def refresh_fts(context: CallbackContext):
+    """Инкрементальное обновление документов полнотекстового поиска книг (libbook_fts)"""
+    try:
+        started = time.monotonic()
+        updated, deleted = await DB_BOOKS_ASYNC.refresh_fts()
+        if updated > 0 or deleted > 0:
+            print(f"🔎 Refreshed full-text documents: {updated} updated, {deleted} deleted "
+                  f"in {time.monotonic() - started:.1f}s")
+    except Exception as e:
+        print(f"❌ Full-text refresh error: {e}")
+
+
+async def check_library_version(context: CallbackContext):
+    """Проверка обновления библиотеки: при импорте новой базы сбрасываются кеши счётчиков и статистики"""
+    try:
+        if await DB_BOOKS_ASYNC.check_library_version():
+            print("📚 Library updated, cached genres, languages and stats reset")
+    except Exception as e:
+        print(f"❌ Library version check error: {e}")
+
+
+async def refresh_leaderboards(context: CallbackContext):
+    """Перестроение готовых списков новинок и популярного при обновлении библиотеки или book_stats"""
+    try:
+        if await DB_BOOKS_ASYNC.refresh_leaderboards():
+            print("🏆 Rebuilt popularity and novelty leaderboards")
+    except Exception as e:
+        print(f"❌ Leaderboards refresh error: {e}")
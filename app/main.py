@@ -12,8 +12,11 @@ from handlers_callback import button_callback
 from handlers_group import handle_group_message
 from admin import admin_cmd, cancel_auth, auth_password, AUTH_PASSWORD, handle_admin_buttons, ADMIN_BUTTONS
 from constants import CLEANUP_INTERVAL
-from health import cleanup_old_sessions
+from health import cleanup_old_sessions, refresh_book_stats, refresh_fts, refresh_leaderboards, check_library_version
 from flibusta_client import flibusta_client
+from database_async import DB_BOOKS_ASYNC, BOOK_STATS_REFRESH_INTERVAL, FT_REFRESH_INTERVAL, \
+    LEADERBOARD_REFRESH_INTERVAL, LIBRARY_CHECK_INTERVAL
+from db_executor import DB_LANES
 from handlers_payments import pre_checkout, successful_payment
 
 
@@ -21,6 +24,10 @@ async def post_stop(app: Application) -> None:
     """Вызывается после остановки бота"""
     # Закрываем открытые сессии с сайтом Флибусты
     await flibusta_client.close()
+    # Закрываем пул асинхронных соединений с БД библиотеки
+    await DB_BOOKS_ASYNC.close()
+    # Останавливаем потоки очередей запросов к БД
+    DB_LANES.shutdown()
 
 async def error_handler(update: Update, context: CallbackContext):
     """Глобальный обработчик ошибок"""
@@ -122,6 +129,19 @@ def main():
         # job_queue.run_repeating(log_stats, interval=MONITORING_INTERVAL, first=10)
         # Периодическая очистка старых пользовательских сессий
         job_queue.run_repeating(cleanup_old_sessions, interval=CLEANUP_INTERVAL, first=CLEANUP_INTERVAL)
+        # Инкрементальное обновление агрегатов book_stats
+        if BOOK_STATS_REFRESH_INTERVAL > 0:
+            job_queue.run_repeating(refresh_book_stats, interval=BOOK_STATS_REFRESH_INTERVAL,
+                                    first=BOOK_STATS_REFRESH_INTERVAL)
+        # Инкрементальное обновление документов полнотекстового поиска libbook_fts
+        if FT_REFRESH_INTERVAL > 0:
+            job_queue.run_repeating(refresh_fts, interval=FT_REFRESH_INTERVAL, first=FT_REFRESH_INTERVAL)
+        # Проверка обновления библиотеки: первая проверка запоминает текущую версию
+        if LIBRARY_CHECK_INTERVAL > 0:
+            job_queue.run_repeating(check_library_version, interval=LIBRARY_CHECK_INTERVAL, first=5)
+        # Готовые списки новинок и популярного: первое построение вскоре после запуска
+        if LEADERBOARD_REFRESH_INTERVAL > 0:
+            job_queue.run_repeating(refresh_leaderboards, interval=LEADERBOARD_REFRESH_INTERVAL, first=10)
 
     application.add_handler(PreCheckoutQueryHandler(pre_checkout))
     application.add_handler(MessageHandler(filters.SUCCESSFUL_PAYMENT, successful_payment))
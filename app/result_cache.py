@@ -0,0 +1,188 @@
+import asyncio
+import inspect
+import os
+import time
+from collections import OrderedDict
+from functools import wraps
+
+
+class ResultCache:
+    """
+    Общий для процесса кеш результатов поиска с TTL и вытеснением давно не использованных (LRU).
+
+    Одинаковые одновременные промахи выполняются одним запросом к БД (single-flight):
+    первый вызов запускает загрузку, остальные ждут её результат.
+    Ошибки загрузки не кешируются.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> asyncio.Task
+        self._generation = 0  # меняется при сбросе: загрузки, начатые до сброса, в кеш не попадают
+
+        # Метрики
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._evictions = 0
+        self._expired = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._expired += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def contains(self, key):
+        """Есть ли в кеше действующее значение (без учёта в метриках и порядке вытеснения)"""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def pop(self, key):
+        """Забирает значение из кеша: (найдено, значение)"""
+        found, value = self._get(key)
+        if found:
+            del self._entries[key]
+            self._hits += 1
+        else:
+            self._misses += 1
+        return found, value
+
+    async def get_or_load(self, key, coro_func, *args, **kwargs):
+        """Возвращает результат из кеша или загружает его coro_func(*args, **kwargs)"""
+        if not self.enabled:
+            return await coro_func(*args, **kwargs)
+
+        found, value = self._get(key)
+        if found:
+            self._hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._shared += 1
+        else:
+            self._misses += 1
+            task = asyncio.ensure_future(coro_func(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, generation=self._generation: self._on_loaded(key, done, generation))
+
+        # Отмена одного из ожидающих не отменяет общую загрузку
+        return await asyncio.shield(task)
+
+    async def get_many_or_load(self, keys, coro_func):
+        """
+        Возвращает {key: значение} для keys: найденные - из кеша, остальные загружает
+        одним вызовом coro_func(недостающие keys), который возвращает {key: значение}.
+        Ключей, которых нет в результате загрузки, нет и в ответе
+        """
+        if not self.enabled:
+            return await coro_func(list(keys))
+
+        result, missing = {}, []
+        for key in dict.fromkeys(keys):
+            found, value = self._get(key)
+            if found:
+                self._hits += 1
+                result[key] = value
+            else:
+                missing.append(key)
+
+        if missing:
+            self._misses += len(missing)
+            generation = self._generation
+            loaded = await coro_func(missing)
+            if generation == self._generation:
+                for key, value in loaded.items():
+                    self._put(key, value)
+            result.update(loaded)
+        return result
+
+    def _on_loaded(self, key, task, generation):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if generation == self._generation:
+            self._put(key, task.result())
+
+    def invalidate(self):
+        """Сбрасывает кеш (после обновления данных библиотеки)"""
+        self._entries.clear()
+        self._inflight.clear()
+        self._generation += 1
+        self._invalidations += 1
+
+    def get_stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self._hits,
+            'misses': self._misses,
+            'shared': self._shared,
+            'evictions': self._evictions,
+            'expired': self._expired,
+            'invalidations': self._invalidations,
+        }
+
+
+def normalize_cache_arg(name, value):
+    """Приводит параметр поиска к каноническому виду, чтобы равные запросы давали один ключ"""
+    if name == 'query':
+        # Полнотекстовый поиск MariaDB не различает регистр и число пробелов
+        return ' '.join(str(value or '').split()).casefold()
+    if name == 'lang':
+        return (value or '').upper()
+    if name == 'rating_filter':
+        return ','.join(sorted({rate.strip() for rate in str(value or '').split(',') if rate.strip()}))
+    if name == 'size_limit':
+        return value or ''
+    return value
+
+
+def cached_result(coro_func):
+    """Декоратор: результат асинхронного метода поиска берётся из RESULT_CACHE"""
+    signature = inspect.signature(coro_func)
+
+    @wraps(coro_func)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (coro_func.__name__,) + tuple(
+            normalize_cache_arg(name, value) for name, value in bound.arguments.items() if name != 'self'
+        )
+        return await RESULT_CACHE.get_or_load(key, coro_func, *args, **kwargs)
+    return wrapper
+
+
+RESULT_CACHE = ResultCache(
+    max_size=int(os.getenv('RESULT_CACHE_SIZE', 256)),
+    ttl=int(os.getenv('RESULT_CACHE_TTL', 600)),
+)
+
+# Кеш собранных карточек книг (BookID -> карточка, см. DatabaseBooks.get_book_cards)
+BOOK_CARD_CACHE = ResultCache(
+    max_size=int(os.getenv('BOOK_CARD_CACHE_SIZE', 2048)),
+    ttl=int(os.getenv('BOOK_CARD_CACHE_TTL', 3600)),
+)
@@ -0,0 +1,84 @@
+import itertools
+import os
+
+from search_query import TOKEN_RE, normalize_token
+
+# Подсказки "Возможно, вы имели в виду" при пустом результате поиска книг и авторов
+# по триграммному индексу слов (db_init/zz_38_create_fuzzy.sql, tools/build_fuzzy_index.py)
+SEARCH_FUZZY = os.getenv('SEARCH_FUZZY', '1') == '1'
+# Минимальное сходство слова с исправлением (доля общих триграмм, как similarity в pg_trgm)
+FUZZY_MIN_SIMILARITY = float(os.getenv('FUZZY_MIN_SIMILARITY', 0.3))
+# Число подсказок в ответе
+FUZZY_MAX_SUGGESTIONS = int(os.getenv('FUZZY_MAX_SUGGESTIONS', 5))
+# Предел времени запроса кандидатов одного слова, сек: при превышении подсказок нет
+FUZZY_MAX_STATEMENT_TIME = float(os.getenv('FUZZY_MAX_STATEMENT_TIME', 0.2))
+
+# Слова короче не исправляются: у них слишком мало триграмм
+FUZZY_MIN_WORD_LEN = 4
+# Длиннее в словарь не попадают (Word VARCHAR(40))
+FUZZY_MAX_WORD_LEN = 40
+# Кандидаты ищутся среди слов, длина которых отличается не больше чем на столько
+FUZZY_LEN_DELTA = 2
+# Исправляется не больше стольких слов запроса: каждое - отдельный запрос к индексу
+FUZZY_MAX_TERMS = 3
+# Вариантов исправления одного слова в комбинациях подсказок
+FUZZY_MAX_ALTERNATIVES = 3
+# Кандидатов одного слова из индекса (по числу общих триграмм) для точного расчёта сходства
+FUZZY_MAX_CANDIDATES = 50
+
+# Где встречается слово (lib_fuzzy_words.Kinds)
+FUZZY_KIND_TITLE = 1
+FUZZY_KIND_AUTHOR = 2
+FUZZY_KIND_SERIES = 4
+FUZZY_KINDS_BOOKS = FUZZY_KIND_TITLE | FUZZY_KIND_AUTHOR | FUZZY_KIND_SERIES
+
+
+def fuzzy_words(text):
+    """Нормализованные слова текста для словаря (от FUZZY_MIN_WORD_LEN до FUZZY_MAX_WORD_LEN букв)"""
+    return [
+        word for word in (normalize_token(raw) for raw in TOKEN_RE.findall(text or ''))
+        if FUZZY_MIN_WORD_LEN <= len(word) <= FUZZY_MAX_WORD_LEN and not word.isdigit()
+    ]
+
+
+def trigrams(word):
+    """Множество триграмм слова, дополненного двумя пробелами слева и одним справа"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(shared, count_a, count_b):
+    """Доля общих триграмм от их объединения"""
+    return shared / (count_a + count_b - shared)
+
+
+def rank_candidates(term, candidates):
+    """
+    Отбирает исправления слова term из кандидатов индекса [(слово, число триграмм, общих триграмм, частота)]:
+    [(слово, сходство)] по убыванию сходства, затем частоты
+    """
+    term_count = len(trigrams(term))
+    ranked = sorted(
+        ((similarity(shared, term_count, count), freq, word) for word, count, shared, freq in candidates
+         if word != term),
+        reverse=True
+    )
+    return [(word, sim) for sim, freq, word in ranked if sim >= FUZZY_MIN_SIMILARITY][:FUZZY_MAX_ALTERNATIVES]
+
+
+def build_suggestions(terms, corrections, limit=FUZZY_MAX_SUGGESTIONS):
+    """
+    Тексты подсказок из слов запроса terms и исправлений {слово: [(исправление, сходство)]}:
+    комбинации исправлений по убыванию произведения сходств
+    """
+    if not any(corrections.values()):
+        return []
+    variants = [corrections.get(term) or [(term, 1.0)] for term in terms]
+    scored = []
+    for combination in itertools.product(*variants):
+        score = 1.0
+        for _, sim in combination:
+            score *= sim
+        scored.append((score, ' '.join(word for word, _ in combination)))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [text for _, text in scored[:limit]]
@@ -0,0 +1,103 @@
+import os
+import re
+from typing import NamedTuple
+
+# Минимальная длина слова в полнотекстовом индексе (innodb_ft_min_token_size в config/my.cnf):
+# более короткие слова не индексируются и в запросе бесполезны
+FT_MIN_TOKEN_SIZE = int(os.getenv('FT_MIN_TOKEN_SIZE', 3))
+
+# Если строгий запрос (все слова обязательны) ничего не нашёл, искать любое из слов
+SEARCH_QUERY_FALLBACK = os.getenv('SEARCH_QUERY_FALLBACK', '1') == '1'
+
+# Стоп-слова сервера: слова стоп-списка InnoDB по умолчанию (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+# не короче FT_MIN_TOKEN_SIZE. Их нет в индексе, и обязательными (+слово) их делать нельзя.
+# Свой стоп-список в config/my.cnf не задан, поэтому русские слова ("кто", "оно") индексируются
+# и из запроса не выбрасываются
+STOPWORDS = frozenset("""
+    about are com for from how that the this was what when where who will with und www
+""".split())
+
+# Слово - последовательность букв, цифр и "_", как у токенизатора InnoDB.
+# Всё остальное, включая операторы + - * " ( ) < > ~ @, - разделители
+TOKEN_RE = re.compile(r'\w+')
+
+
+class CompiledQuery(NamedTuple):
+    terms: tuple  # нормализованные слова запроса без повторов, по алфавиту
+    strict: str  # все слова обязательны: "+война* +мир*"
+    loose: str  # любое из слов: "война* мир*"
+    key: str  # канонический вид запроса: равные по смыслу запросы дают один ключ
+
+
+# Одинаково выглядящие строчные буквы латиницы и кириллицы: "тoлстой" с латинской "o"
+# в документах не встречается и без исправления ничего не находит
+HOMOGLYPHS_LAT = 'aceopxyk'
+HOMOGLYPHS_CYR = 'асеорхук'
+TO_CYRILLIC = str.maketrans(HOMOGLYPHS_LAT, HOMOGLYPHS_CYR)
+TO_LATIN = str.maketrans(HOMOGLYPHS_CYR, HOMOGLYPHS_LAT)
+
+
+def is_cyrillic(char):
+    return 'а' <= char <= 'я' or char == 'ё'
+
+
+def fold_mixed_script(token):
+    """Слово из букв обоих алфавитов приводит к алфавиту большинства букв, заменяя похожие буквы"""
+    cyrillic = sum(1 for char in token if is_cyrillic(char))
+    latin = sum(1 for char in token if 'a' <= char <= 'z')
+    if not cyrillic or not latin:
+        return token
+    return token.translate(TO_CYRILLIC if cyrillic >= latin else TO_LATIN)
+
+
+def normalize_token(token):
+    """
+    Слово запроса в том виде, в каком оно в полнотекстовом документе (db_init/zz_40_fill_FT.sql):
+    нижний регистр, "ё" как "е", один алфавит. Транслитерация имён авторов - в самом документе
+    """
+    return fold_mixed_script(token.casefold().replace('ё', 'е'))
+
+
+def query_terms(text):
+    """
+    Значимые слова запроса без повторов в порядке ввода: не короче FT_MIN_TOKEN_SIZE и без стоп-слов.
+    Запрос из одних стоп-слов ("The Who") сохраняется целиком - иначе искать было бы нечего
+    """
+    terms = []
+    for token in (normalize_token(raw) for raw in TOKEN_RE.findall(text or '')):
+        if len(token) >= FT_MIN_TOKEN_SIZE and token not in terms:
+            terms.append(token)
+    significant = [term for term in terms if term not in STOPWORDS]
+    return significant or terms
+
+
+def compile_query(text):
+    """
+    Компилирует текст пользователя в выражение MATCH ... AGAINST (... IN BOOLEAN MODE).
+    Пустой terms - в запросе нет слов для поиска, выполнять MATCH по пустому выражению не нужно
+    """
+    terms = sorted(query_terms(text))
+    return CompiledQuery(
+        terms=tuple(terms),
+        strict=' '.join(f"+{term}*" for term in terms),
+        loose=' '.join(f"{term}*" for term in terms),
+        key=' '.join(terms),
+    )
+
+
+def is_found(result):
+    """Непустой ли результат поиска (список или кортеж (список, число найденных))"""
+    return bool(result[0] if isinstance(result, tuple) else result)
+
+
+async def search_compiled(query_text, search_func):
+    """
+    Выполняет search_func(выражение) по скомпилированному запросу пользователя:
+    сначала строгое выражение, при пустом результате - нестрогое (SEARCH_QUERY_FALLBACK).
+    Возвращает (результат, выражение, по которому он получен)
+    """
+    compiled = compile_query(query_text)
+    result = await search_func(compiled.strict)
+    if not is_found(result) and SEARCH_QUERY_FALLBACK and len(compiled.terms) > 1:
+        return await search_func(compiled.loose), compiled.loose
+    return result, compiled.strict
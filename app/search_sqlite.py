@@ -0,0 +1,326 @@
+import os
+import re
+import sqlite3
+import threading
+
+from constants import PREFIX_FILE_PATH, MAX_BOOKS_SEARCH, MAX_SERIES_SEARCH, MAX_AUTHORS_SEARCH, \
+    SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA
+from database import DatabaseBooks, Book, SQL_MATCH_SERIES_BOOKS
+from search_query import FT_MIN_TOKEN_SIZE, normalize_token
+
+# Поиск по каталогу из встроенного индекса SQLite FTS5 вместо полнотекстовых индексов MariaDB.
+# Индекс строится из таблиц MariaDB (tools/build_sqlite_index.py) после импорта базы
+# и открывается только на чтение: файл отображается в память и общий для всех процессов бота
+SQLITE_SEARCH_PATH = os.getenv('SQLITE_SEARCH_PATH', f"{PREFIX_FILE_PATH}/FlibustaSearch.sqlite")
+# Размер отображения файла индекса в память, байт
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 2 * 1024 ** 3))
+
+# Токенизатор FTS5: буквы, цифры и "_", без учёта регистра и диакритики латиницы.
+# "ё" заменяется на "е" при построении индекса и в запросе (search_query.normalize_token)
+SQLITE_TOKENIZE = "unicode61 remove_diacritics 2 tokenchars '_'"
+
+# Таблицы с теми же именами и столбцами, что и в MariaDB: общие части запросов
+# (фильтры build_sql_filter_search, книги серии, выборка страницы книг) подходят без изменений.
+# Полнотекстовые таблицы без хранения текста (content='') - только индекс, rowid - ID книги, автора или серии
+SQLITE_SCHEMA = f"""
+    CREATE TABLE libbook_search (
+        BookID INTEGER PRIMARY KEY,
+        SearchLang TEXT NOT NULL DEFAULT '',
+        Title TEXT NOT NULL DEFAULT '',
+        BookSize INTEGER,
+        SearchYear INTEGER,
+        BookSizeCat TEXT,
+        AuthorID INTEGER,
+        LastName TEXT,
+        FirstName TEXT,
+        MiddleName TEXT,
+        Genre TEXT,
+        SeriesID INTEGER,
+        SeriesTitle TEXT,
+        LibRate INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE libavtor (BookID INTEGER NOT NULL, AvtorID INTEGER NOT NULL);
+    CREATE TABLE libseq (BookID INTEGER NOT NULL, SeqID INTEGER NOT NULL, SeqNumb INTEGER);
+    CREATE TABLE libseqname (SeqID INTEGER PRIMARY KEY, SeqName TEXT);
+    CREATE TABLE libavtor_search (AvtorID INTEGER PRIMARY KEY, AuthorName TEXT NOT NULL DEFAULT '');
+    CREATE TABLE libavtor_stats (
+        AvtorID INTEGER NOT NULL,
+        SearchLang TEXT NOT NULL DEFAULT '',
+        BookSizeCat TEXT NOT NULL DEFAULT '',
+        LibRate INTEGER NOT NULL DEFAULT 0,
+        BookCount INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (AvtorID, SearchLang, BookSizeCat, LibRate)
+    ) WITHOUT ROWID;
+    CREATE TABLE libseq_search (
+        SeqID INTEGER PRIMARY KEY,
+        SeriesTitle TEXT NOT NULL DEFAULT '',
+        AuthorName TEXT NOT NULL DEFAULT '',
+        RateAvg REAL
+    );
+    CREATE TABLE libseq_stats (
+        SeqID INTEGER NOT NULL,
+        SearchLang TEXT NOT NULL DEFAULT '',
+        BookSizeCat TEXT NOT NULL DEFAULT '',
+        LibRate INTEGER NOT NULL DEFAULT 0,
+        BookCount INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (SeqID, SearchLang, BookSizeCat, LibRate)
+    ) WITHOUT ROWID;
+    CREATE TABLE search_index_meta (Key TEXT PRIMARY KEY, Value TEXT);
+
+    CREATE VIRTUAL TABLE libbook_fts USING fts5(FT, content='', tokenize="{SQLITE_TOKENIZE}");
+    CREATE VIRTUAL TABLE libbannotations_fts USING fts5(Body, content='', tokenize="{SQLITE_TOKENIZE}");
+    CREATE VIRTUAL TABLE libaannotations_fts USING fts5(Body, content='', tokenize="{SQLITE_TOKENIZE}");
+    CREATE VIRTUAL TABLE libavtor_search_fts USING fts5(AuthorName, content='', tokenize="{SQLITE_TOKENIZE}");
+    CREATE VIRTUAL TABLE libseq_search_fts USING fts5(SeriesText, content='', tokenize="{SQLITE_TOKENIZE}");
+"""
+
+# Индексы создаются после заполнения таблиц
+SQLITE_INDEXES = """
+    CREATE INDEX idx_search_filters ON libbook_search (SearchLang, BookSizeCat, LibRate);
+    CREATE INDEX idx_libavtor_book ON libavtor (BookID, AvtorID);
+    CREATE INDEX idx_libavtor_avtor ON libavtor (AvtorID, BookID);
+    CREATE INDEX idx_libseq_book ON libseq (BookID, SeqID);
+    CREATE INDEX idx_libseq_seqid_numb ON libseq (SeqID, SeqNumb);
+"""
+
+# Полнотекстовые совпадения по области поиска: (BookID, Relevance), как SELECT_SQL_MATCH в database.py.
+# Relevance = -rank (bm25): чем больше, тем лучше совпадение
+SQLITE_MATCH_BOOKS = """
+    SELECT f.rowid as BookID, -f.rank as Relevance
+    FROM libbook_fts f
+    JOIN libbook_search bs ON bs.BookID = f.rowid
+    WHERE libbook_fts MATCH %s
+      {sql_filter}
+"""
+
+# Аннотации книги объединены в одну строку индекса (rowid = BookID)
+SQLITE_MATCH_ABOOKS = """
+    SELECT f.rowid as BookID, -f.rank as Relevance
+    FROM libbannotations_fts f
+    JOIN libbook_search bs ON bs.BookID = f.rowid
+    WHERE libbannotations_fts MATCH %s
+      {sql_filter}
+"""
+
+# Аннотации автора - одна строка индекса на автора (rowid = AvtorID)
+SQLITE_MATCH_AAUTHORS = """
+    SELECT ab.BookID, MAX(-f.rank) as Relevance
+    FROM libaannotations_fts f
+    JOIN libavtor ab ON ab.AvtorID = f.rowid
+    JOIN libbook_search bs ON bs.BookID = ab.BookID
+    WHERE libaannotations_fts MATCH %s
+      {sql_filter}
+    GROUP BY ab.BookID
+"""
+
+SELECT_SQLITE_MATCH = {
+    SETTING_SEARCH_AREA_B: SQLITE_MATCH_BOOKS,
+    SETTING_SEARCH_AREA_BA: SQLITE_MATCH_ABOOKS,
+    SETTING_SEARCH_AREA_AA: SQLITE_MATCH_AAUTHORS
+}
+
+SQLITE_QUERY_SERIES_INDEX = f"""
+    SELECT
+        sq.SeriesTitle,
+        sq.SeqID as SeriesID,
+        SUM(bs.BookCount) as book_count
+    FROM libseq_search_fts f
+    JOIN libseq_search sq ON sq.SeqID = f.rowid
+    JOIN libseq_stats bs ON bs.SeqID = sq.SeqID
+    WHERE libseq_search_fts MATCH %s
+      {{sql_filter}}
+    GROUP BY sq.SeqID, sq.SeriesTitle, sq.RateAvg
+    ORDER BY book_count DESC, sq.RateAvg DESC, sq.SeriesTitle
+    LIMIT {MAX_SERIES_SEARCH}
+"""
+
+SQLITE_QUERY_AUTHORS_INDEX = f"""
+    SELECT
+        au.AuthorName,
+        SUM(bs.BookCount) as book_count,
+        au.AvtorID as AuthorID
+    FROM {{sql_match}}
+    JOIN libavtor_stats bs ON bs.AvtorID = au.AvtorID
+    WHERE {{sql_where}}
+      {{sql_filter}}
+    GROUP BY au.AvtorID, au.AuthorName
+    ORDER BY book_count DESC, au.AuthorName
+    LIMIT {MAX_AUTHORS_SEARCH}
+"""
+
+SQLITE_AUTHORS_BY_NAME = ("libavtor_search_fts f JOIN libavtor_search au ON au.AvtorID = f.rowid",
+                          "libavtor_search_fts MATCH %s")
+
+SQLITE_AUTHORS_BY_BIO = ("libaannotations_fts f JOIN libavtor_search au ON au.AvtorID = f.rowid",
+                         "libaannotations_fts MATCH %s")
+
+# Авторы найденных по аннотации книг (имя - из libavtor_search, как в индексе авторов)
+SQLITE_QUERY_AUTHORS = f"""
+    SELECT
+        au.AuthorName,
+        COUNT(DISTINCT m.BookID) as book_count,
+        au.AvtorID as AuthorID
+    FROM ( {{sql_query_books}} ) m
+    JOIN libavtor a ON a.BookID = m.BookID
+    JOIN libavtor_search au ON au.AvtorID = a.AvtorID
+    GROUP BY au.AuthorName, au.AvtorID
+    ORDER BY book_count DESC, au.AuthorName
+    LIMIT {MAX_AUTHORS_SEARCH}
+"""
+
+SQLITE_QUERY_INDEX_VERSION = "SELECT Value FROM search_index_meta WHERE Key = 'ContentVersion'"
+
+# Слово выражения MATCH ... AGAINST (... IN BOOLEAN MODE) с оператором и признаком префикса
+BOOLEAN_TERM_RE = re.compile(r'([+\-]?)[~<>(]*"?(\w+)(\*?)')
+
+
+def normalize_text(text):
+    """Текст для индекса FTS5: "ё" как "е", как в запросах"""
+    return (text or '').replace('ё', 'е').replace('Ё', 'Е')
+
+
+def to_fts5_query(expression):
+    """
+    Переводит выражение полнотекстового поиска MariaDB в синтаксис MATCH FTS5:
+    "+война* +мир* -толстой" -> '"война"* AND "мир"* NOT ("толстой")'.
+    Без обязательных слов - любое из слов. Слова короче FT_MIN_TOKEN_SIZE MariaDB не индексирует - они пропускаются.
+    Возвращает None, если искать нечего
+    """
+    required, optional, excluded = [], [], []
+    for operator, word, prefix in BOOLEAN_TERM_RE.findall(expression or ''):
+        word = normalize_token(word)
+        if len(word) < FT_MIN_TOKEN_SIZE:
+            continue
+        term = f'"{word}"{prefix}'
+        {'+': required, '-': excluded}.get(operator, optional).append(term)
+
+    if required:
+        fts_query = ' AND '.join(required)
+    elif optional:
+        fts_query = ' OR '.join(optional)
+    else:
+        return None
+
+    if excluded:
+        fts_query = f"({fts_query}) NOT ({' OR '.join(excluded)})"
+    return fts_query
+
+
+def to_sqlite_sql(sql_query):
+    """Запросы собираются с параметрами в стиле MariaDB (%s), SQLite ждёт ?"""
+    return sql_query.replace('%s', '?')
+
+
+class SqliteSearchBooks:
+    """
+    Поиск книг, серий и авторов по индексу SQLite FTS5 (тот же интерфейс, что у DatabaseBooks).
+    Каждый поток исполнителя БД открывает своё соединение только на чтение
+    """
+
+    def __init__(self, db_path=SQLITE_SEARCH_PATH, mmap_size=SQLITE_MMAP_SIZE):
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._generation = 0  # меняется при замене файла индекса: потоки переоткрывают соединения
+
+    def connect(self):
+        """Соединение текущего потока (открывается при первом обращении и после reload)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+        if conn is not None:
+            conn.close()
+
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute("PRAGMA query_only = 1")
+        self._local.conn = conn
+        self._local.generation = self._generation
+        return conn
+
+    def reload(self):
+        """Переоткрывает индекс при следующем запросе каждого потока (после перестроения файла)"""
+        self._generation += 1
+
+    def _fetchall(self, sql_query, params=None):
+        return self.connect().execute(to_sqlite_sql(sql_query), params or ()).fetchall()
+
+    def _fetchone(self, sql_query, params=None):
+        return self.connect().execute(to_sqlite_sql(sql_query), params or ()).fetchone()
+
+    def get_index_version(self):
+        """Версия библиотеки (library_meta.ContentVersion), из которой построен индекс"""
+        row = self._fetchone(SQLITE_QUERY_INDEX_VERSION)
+        return row[0] if row else None
+
+    @classmethod
+    def build_books_match(cls, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Внутренний запрос поиска книг (BookID, Relevance) и его параметры; None - искать нечего"""
+        if series_id != 0:
+            sql_filter, filter_params = DatabaseBooks.build_sql_filter_search(lang, size_limit, rating_filter, author_id=author_id)
+            return SQL_MATCH_SERIES_BOOKS.format(sql_filter=sql_filter), [series_id] + filter_params
+
+        fts_query = to_fts5_query(query)
+        if fts_query is None:
+            return None, None
+        sql_filter, filter_params = DatabaseBooks.build_sql_filter_search(lang, size_limit, rating_filter, series_id, author_id)
+        return SELECT_SQLITE_MATCH.get(search_area).format(sql_filter=sql_filter), [fts_query] + filter_params
+
+    def search_books(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Ищем книги по запросу пользователя"""
+        books, _ = self.search_books_page(query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+        return books
+
+    def search_books_page(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B,
+                          series_id=0, author_id=0, page_size=MAX_BOOKS_SEARCH, after=None, offset=0, with_count=False):
+        """Ищем одну страницу книг: (книги страницы, число найденных книг или None), как DatabaseBooks.search_books_page"""
+        sql_query_match, params = self.build_books_match(query, lang, size_limit, rating_filter, search_area, series_id, author_id)
+        if sql_query_match is None:
+            return [], 0 if with_count else None
+
+        sql_keyset = ''
+        page_params = list(params)
+        if after is not None:
+            relevance, book_id = after
+            sql_keyset = "WHERE m.Relevance < %s OR (m.Relevance = %s AND bs.BookID < %s)"
+            page_params.extend([relevance, relevance, book_id])
+            offset = 0
+
+        sql_query = DatabaseBooks.build_sql_query_search_books(sql_query_match, 'desc', sql_keyset, page_size, offset)
+        books = [Book(*row) for row in self._fetchall(sql_query, page_params)]
+
+        found_count = None
+        if with_count and after is None and offset == 0 and len(books) < page_size:
+            found_count = len(books)
+        elif with_count:
+            found_count = min(self._fetchone(DatabaseBooks.build_sql_query_count_books(sql_query_match), params)[0],
+                              MAX_BOOKS_SEARCH)
+        return books, found_count
+
+    def search_series(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Ищет серии по запросу"""
+        fts_query = to_fts5_query(query)
+        if fts_query is None:
+            return []
+        sql_filter, filter_params = DatabaseBooks.build_sql_filter_search(lang, size_limit, rating_filter)
+
+        if search_area == SETTING_SEARCH_AREA_B:
+            sql_query = SQLITE_QUERY_SERIES_INDEX.format(sql_filter=sql_filter)
+        else:
+            sql_query = DatabaseBooks.build_sql_query_series(SELECT_SQLITE_MATCH[search_area].format(sql_filter=sql_filter))
+        return self._fetchall(sql_query, [fts_query] + filter_params)
+
+    def search_authors(self, query, lang, size_limit, rating_filter=None, search_area=SETTING_SEARCH_AREA_B, series_id=0, author_id=0):
+        """Ищет авторов по запросу"""
+        fts_query = to_fts5_query(query)
+        if fts_query is None:
+            return []
+        sql_filter, filter_params = DatabaseBooks.build_sql_filter_search(lang, size_limit, rating_filter)
+
+        if search_area == SETTING_SEARCH_AREA_BA:
+            sql_query = SQLITE_QUERY_AUTHORS.format(
+                sql_query_books=SQLITE_MATCH_ABOOKS.format(sql_filter=sql_filter))
+        else:
+            sql_match, sql_where = SQLITE_AUTHORS_BY_BIO if search_area == SETTING_SEARCH_AREA_AA else SQLITE_AUTHORS_BY_NAME
+            sql_query = SQLITE_QUERY_AUTHORS_INDEX.format(sql_match=sql_match, sql_where=sql_where, sql_filter=sql_filter)
+        return self._fetchall(sql_query, [fts_query] + filter_params)
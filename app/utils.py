@@ -38,9 +38,9 @@ def format_size(size_in_bytes):
 
 def form_header_books(page, max_books, found_count, search_type=SEARCH_TYPE_BOOKS, series_name=None, author_name=None,
                       search_area=SETTING_SEARCH_AREA_B, show_pop=None):
-    """ Оформление заголовка сообщения с результатом поиска книг """
+    """ Оформление заголовка сообщения с результатом поиска книг (found_count = None - найдено больше показанных) """
     start = max_books * page + 1
-    end = min(max_books * (page + 1), found_count)
+    end = max_books * (page + 1) if found_count is None else min(max_books * (page + 1), found_count)
 
     text = f"{HEADING_POP.get(show_pop)} " if show_pop else ''
 
@@ -51,7 +51,8 @@ def form_header_books(page, max_books, found_count, search_type=SEARCH_TYPE_BOOK
     elif search_type == SEARCH_TYPE_AUTHORS:
         text += 'авторов'
 
-    header = f"Показываю с {start} по {end} из {found_count} найденных {text}"
+    found_text = f"более чем {end}" if found_count is None else found_count
+    header = f"Показываю с {start} по {end} из {found_text} найденных {text}"
 
     header += f" в серии '{series_name}'" if series_name else ""
     header += f" автора '{author_name}'" if author_name else ""
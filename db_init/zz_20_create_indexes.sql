@@ -7,4 +7,15 @@ CREATE INDEX idx_libaannotations_avtorid ON libaannotations (AvtorId ASC); -- е
 -- Для libbannotations
 CREATE INDEX idx_libbannotations_bookid ON libbannotations (BookId ASC); -- есть дубликаты
 -- Для libbpics
-CREATE INDEX idx_libbpics_bookid ON libbpics (BookId ASC); -- есть дубликаты
\ No newline at end of file
+CREATE INDEX idx_libbpics_bookid ON libbpics (BookId ASC); -- есть дубликаты
+-- Для агрегатов book_stats и популярного за период
+CREATE INDEX idx_librate_bookid ON librate (BookId ASC);
+CREATE INDEX idx_librecs_bid ON librecs (bid ASC);
+CREATE INDEX idx_librecs_timestamp ON librecs (timestamp ASC);
+CREATE INDEX idx_libreviews_time ON libreviews (Time ASC);
+
+-- Дата последнего обновления библиотеки (проверка необходимости пересчёта рейтингов популярного)
+CREATE INDEX idx_libbook_time ON libbook (Time ASC);
+
+-- Книги серии по порядку номеров (поиск книг выбранной серии)
+CREATE INDEX idx_libseq_seqid_numb ON libseq (SeqId ASC, SeqNumb ASC);
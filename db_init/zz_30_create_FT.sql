@@ -7,6 +7,15 @@ CREATE TABLE libbook_fts (
     FULLTEXT idx_fts_search (FT)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
 
+-- Подписи исходных данных документов libbook_fts: книга, её авторы, серии и жанры
+-- (для инкрементального обновления, см. DatabaseBooks.refresh_fts)
+DROP TABLE IF EXISTS libbook_fts_sig;
+CREATE TABLE libbook_fts_sig (
+    BookID INT(10) UNSIGNED NOT NULL,
+    Sig INT(10) UNSIGNED NOT NULL,
+    PRIMARY KEY (BookID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
+
 -- -- ПОЛНЕТОКСТОВЫЙ ИНДЕКС ДЛЯ ПОИСКА ПО АННОТАЦИИ КНИГ
 CREATE FULLTEXT INDEX idx_annotations_body_ft ON libbannotations (Body);
 
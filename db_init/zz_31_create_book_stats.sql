@@ -0,0 +1,30 @@
+-- -- АГРЕГАТЫ ОЦЕНОК, РЕКОМЕНДАЦИЙ И ОТЗЫВОВ ПО КНИГАМ -- --
+-- Вместо GROUP BY по librate/librecs/libreviews в каждом запросе
+DROP TABLE IF EXISTS book_stats;
+CREATE TABLE book_stats (
+    BookID INT(10) UNSIGNED NOT NULL,
+    RateAvg DECIMAL(5,2),
+    LibRate TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    RateCount INT UNSIGNED NOT NULL DEFAULT 0,
+    RecsCount INT UNSIGNED NOT NULL DEFAULT 0,
+    ReviewsCount INT UNSIGNED NOT NULL DEFAULT 0,
+    PopCount INT UNSIGNED NOT NULL DEFAULT 0,
+    LastRecTime DATETIME,
+    LastReviewTime DATETIME,
+    LastActivity DATETIME,
+    PRIMARY KEY (BookID),
+    KEY idx_book_stats_pop (PopCount),
+    KEY idx_book_stats_activity (LastActivity)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
+
+-- Отметки, до которых book_stats учитывает librate, librecs и libreviews
+-- (для инкрементального обновления, см. DatabaseBooks.refresh_book_stats)
+DROP TABLE IF EXISTS book_stats_state;
+CREATE TABLE book_stats_state (
+    ID TINYINT UNSIGNED NOT NULL,
+    MaxRateID INT UNSIGNED NOT NULL DEFAULT 0,
+    MaxRecID INT UNSIGNED NOT NULL DEFAULT 0,
+    MaxReviewTime DATETIME,
+    UpdatedAt DATETIME,
+    PRIMARY KEY (ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
@@ -0,0 +1,27 @@
+-- -- ДЕНОРМАЛИЗОВАННАЯ ТАБЛИЦА ДЛЯ ПОИСКА КНИГ -- --
+-- Одна строка на книгу: первый автор, первый жанр, первая серия и средний рейтинг.
+-- Поиск книг = полнотекстовое совпадение + соединение по первичному ключу
+DROP TABLE IF EXISTS libbook_search;
+CREATE TABLE libbook_search (
+    BookID INT(10) UNSIGNED NOT NULL,
+    SearchLang VARCHAR(3) NOT NULL DEFAULT '',
+    Title VARCHAR(254) NOT NULL DEFAULT '',
+    BookSize INT(10) UNSIGNED,
+    SearchYear SMALLINT(6),
+    BookSizeCat VARCHAR(7),
+    AuthorID INT(10) UNSIGNED,
+    LastName VARCHAR(99),
+    FirstName VARCHAR(99),
+    MiddleName VARCHAR(99),
+    Genre VARCHAR(99),
+    SeriesID INT(10) UNSIGNED,
+    SeriesTitle VARCHAR(254),
+    LibRate TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (BookID),
+    -- Фильтры пользователя (язык, размер, рейтинг) для новинок и популярного
+    KEY idx_search_filters (SearchLang, BookSizeCat, LibRate),
+    -- Новинки на выбранном языке: порядок по BookID внутри языка
+    KEY idx_search_lang_book (SearchLang, BookID),
+    KEY idx_search_author (AuthorID),
+    KEY idx_search_series (SeriesID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
@@ -0,0 +1,23 @@
+-- -- ПОИСК АВТОРОВ ПО ИМЕНИ -- --
+-- Одна строка на автора с книгами в библиотеке: имя для вывода (AuthorName) и имя для поиска
+-- с записью другим алфавитом (SearchName, zz_39_create_translit.sql) с полнотекстовым индексом
+DROP TABLE IF EXISTS libavtor_search;
+CREATE TABLE libavtor_search (
+    AvtorID INT(10) UNSIGNED NOT NULL,
+    AuthorName VARCHAR(300) NOT NULL DEFAULT '',
+    SearchName VARCHAR(1000) NOT NULL DEFAULT '',
+    PRIMARY KEY (AvtorID),
+    FULLTEXT idx_avtor_search_ft (SearchName)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
+
+-- Число книг автора по значениям фильтров пользователя (язык, размер, рейтинг):
+-- книги автора с учётом фильтров = SUM(BookCount) по подходящим строкам
+DROP TABLE IF EXISTS libavtor_stats;
+CREATE TABLE libavtor_stats (
+    AvtorID INT(10) UNSIGNED NOT NULL,
+    SearchLang VARCHAR(3) NOT NULL DEFAULT '',
+    BookSizeCat VARCHAR(7) NOT NULL DEFAULT '',
+    LibRate TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    BookCount INT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (AvtorID, SearchLang, BookSizeCat, LibRate)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
@@ -0,0 +1,25 @@
+-- -- ПОИСК СЕРИЙ -- --
+-- Одна строка на серию с книгами в библиотеке: название, первый автор и средний рейтинг книг.
+-- Полнотекстовый индекс по названию и автору - серии находятся и по имени автора,
+-- в том числе записанному другим алфавитом (AuthorName дополнено транслитерацией, zz_39_create_translit.sql)
+DROP TABLE IF EXISTS libseq_search;
+CREATE TABLE libseq_search (
+    SeqID INT(10) UNSIGNED NOT NULL,
+    SeriesTitle VARCHAR(254) NOT NULL DEFAULT '',
+    AuthorName VARCHAR(1000) NOT NULL DEFAULT '',
+    RateAvg DECIMAL(5,2),
+    PRIMARY KEY (SeqID),
+    FULLTEXT idx_seq_search_ft (SeriesTitle, AuthorName)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
+
+-- Число книг серии по значениям фильтров пользователя (язык, размер, рейтинг):
+-- книги серии с учётом фильтров = SUM(BookCount) по подходящим строкам
+DROP TABLE IF EXISTS libseq_stats;
+CREATE TABLE libseq_stats (
+    SeqID INT(10) UNSIGNED NOT NULL,
+    SearchLang VARCHAR(3) NOT NULL DEFAULT '',
+    BookSizeCat VARCHAR(7) NOT NULL DEFAULT '',
+    LibRate TINYINT UNSIGNED NOT NULL DEFAULT 0,
+    BookCount INT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (SeqID, SearchLang, BookSizeCat, LibRate)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
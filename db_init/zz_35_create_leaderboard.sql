@@ -0,0 +1,24 @@
+-- -- ГОТОВЫЕ СПИСКИ НОВИНОК И ПОПУЛЯРНОГО -- --
+-- Board - период в днях, как в запросе популярного: 0 - новинки, 7, 30, 999 - за всё время.
+-- Для каждого языка свой список (SearchLang), '' - список по всем языкам;
+-- то же по каждому разделу жанров (GenreMeta), '' - по всем разделам.
+-- Заполняется и пересчитывается ботом (DatabaseBooks.refresh_leaderboards)
+DROP TABLE IF EXISTS book_leaderboard;
+CREATE TABLE book_leaderboard (
+    Board SMALLINT UNSIGNED NOT NULL,
+    SearchLang VARCHAR(3) NOT NULL DEFAULT '',
+    GenreMeta VARCHAR(99) NOT NULL DEFAULT '',
+    Position INT UNSIGNED NOT NULL,
+    BookID INT(10) UNSIGNED NOT NULL,
+    Relevance INT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (Board, SearchLang, GenreMeta, Position)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
+
+-- Версия данных, по которым построены списки: дата обновления библиотеки и отметки book_stats_state
+DROP TABLE IF EXISTS book_leaderboard_state;
+CREATE TABLE book_leaderboard_state (
+    ID TINYINT UNSIGNED NOT NULL,
+    SourceVersion VARCHAR(100) NOT NULL DEFAULT '',
+    UpdatedAt DATETIME,
+    PRIMARY KEY (ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
@@ -0,0 +1,22 @@
+-- -- ГОТОВЫЕ СЧЁТЧИКИ ЖАНРОВ И ЯЗЫКОВ -- --
+-- Число книг по жанрам на каждом языке. Как и в прежнем подсчёте по libbook + libgenre,
+-- книга учитывается в каждом своём жанре; книги без жанра - в разделе 'Неотсортированное' (GenreID = 0).
+-- Число книг раздела (GenreMeta) = SUM(BookCount) по его жанрам
+DROP TABLE IF EXISTS libgenre_stats;
+CREATE TABLE libgenre_stats (
+    SearchLang VARCHAR(3) NOT NULL DEFAULT '',
+    GenreMeta VARCHAR(99) NOT NULL DEFAULT '',
+    GenreID INT(10) UNSIGNED NOT NULL DEFAULT 0,
+    GenreDesc VARCHAR(99) NOT NULL DEFAULT '',
+    BookCount INT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (SearchLang, GenreMeta, GenreID),
+    KEY idx_genre_stats_meta (GenreMeta, GenreID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
+
+-- Число книг по языкам
+DROP TABLE IF EXISTS liblang_stats;
+CREATE TABLE liblang_stats (
+    Lang VARCHAR(3) NOT NULL DEFAULT '',
+    BookCount INT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (Lang)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
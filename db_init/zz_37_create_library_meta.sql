@@ -0,0 +1,17 @@
+-- -- СНИМОК СТАТИСТИКИ БИБЛИОТЕКИ -- --
+-- Одна строка (ID = 1), записывается при импорте базы (zz_46_fill_library_meta.sql).
+-- ContentVersion меняется при каждом импорте с изменениями: по нему бот определяет обновление библиотеки
+DROP TABLE IF EXISTS library_meta;
+CREATE TABLE library_meta (
+    ID TINYINT UNSIGNED NOT NULL,
+    LastUpdate DATE,
+    BooksCount INT UNSIGNED NOT NULL DEFAULT 0,
+    MaxBookID INT(10) UNSIGNED NOT NULL DEFAULT 0,
+    AuthorsCount INT UNSIGNED NOT NULL DEFAULT 0,
+    GenresCount INT UNSIGNED NOT NULL DEFAULT 0,
+    SeriesCount INT UNSIGNED NOT NULL DEFAULT 0,
+    LanguagesCount INT UNSIGNED NOT NULL DEFAULT 0,
+    ContentVersion CHAR(32) NOT NULL DEFAULT '',
+    UpdatedAt DATETIME,
+    PRIMARY KEY (ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
@@ -0,0 +1,23 @@
+-- -- ТРИГРАММНЫЙ ИНДЕКС СЛОВ ДЛЯ ИСПРАВЛЕНИЯ ОПЕЧАТОК ("Возможно, вы имели в виду") -- --
+-- Словарь нормализованных слов из названий книг, имён авторов и названий серий
+-- и их триграммы (как в pg_trgm: слово дополняется двумя пробелами слева и одним справа).
+-- Заполняется после импорта: python tools/build_fuzzy_index.py
+DROP TABLE IF EXISTS lib_fuzzy_words;
+CREATE TABLE lib_fuzzy_words (
+    WordID MEDIUMINT UNSIGNED NOT NULL,
+    Word VARCHAR(40) CHARACTER SET utf8mb3 COLLATE utf8mb3_bin NOT NULL,
+    Kinds TINYINT UNSIGNED NOT NULL,  -- где встречается: 1 - название книги, 2 - имя автора, 4 - название серии
+    TrigramCount TINYINT UNSIGNED NOT NULL,  -- число различных триграмм слова
+    Freq INT UNSIGNED NOT NULL DEFAULT 0,  -- число вхождений в каталоге
+    PRIMARY KEY (WordID),
+    UNIQUE KEY idx_fuzzy_word (Word)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
+
+-- Длина слова в ключе: кандидаты ищутся только среди слов близкой длины
+DROP TABLE IF EXISTS lib_fuzzy_trigrams;
+CREATE TABLE lib_fuzzy_trigrams (
+    Trigram CHAR(3) CHARACTER SET utf8mb3 COLLATE utf8mb3_bin NOT NULL,
+    Len TINYINT UNSIGNED NOT NULL,
+    WordID MEDIUMINT UNSIGNED NOT NULL,
+    PRIMARY KEY (Trigram, Len, WordID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci;
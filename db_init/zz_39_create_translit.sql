@@ -0,0 +1,43 @@
+-- -- ТРАНСЛИТЕРАЦИЯ ИМЁН АВТОРОВ ДЛЯ ПОЛНОТЕКСТОВОГО ПОИСКА -- --
+-- Вызываются при заполнении libbook_fts (zz_40_fill_FT.sql): к имени автора добавляется его запись
+-- другим алфавитом, и запросы "Tolstoy" и "Толстой", "Кинг" и "King" находят одни и те же книги.
+-- Текст на входе - в нижнем регистре; символы другого алфавита не меняются
+DROP FUNCTION IF EXISTS search_translit_lat;
+DROP FUNCTION IF EXISTS search_translit_cyr;
+
+DELIMITER //
+
+-- Кириллица -> латиница (упрощённая английская транскрипция: Толстой -> tolstoy, Щукин -> shchukin)
+CREATE FUNCTION search_translit_lat(s TEXT CHARSET utf8mb3) RETURNS TEXT CHARSET utf8mb3
+    DETERMINISTIC NO SQL
+BEGIN
+    SET s = REPLACE(s, 'щ', 'shch'); SET s = REPLACE(s, 'ж', 'zh'); SET s = REPLACE(s, 'х', 'kh'); SET s = REPLACE(s, 'ц', 'ts');
+    SET s = REPLACE(s, 'ч', 'ch'); SET s = REPLACE(s, 'ш', 'sh'); SET s = REPLACE(s, 'ю', 'yu'); SET s = REPLACE(s, 'я', 'ya');
+    SET s = REPLACE(s, 'а', 'a'); SET s = REPLACE(s, 'б', 'b'); SET s = REPLACE(s, 'в', 'v'); SET s = REPLACE(s, 'г', 'g');
+    SET s = REPLACE(s, 'д', 'd'); SET s = REPLACE(s, 'е', 'e'); SET s = REPLACE(s, 'ё', 'e'); SET s = REPLACE(s, 'з', 'z');
+    SET s = REPLACE(s, 'и', 'i'); SET s = REPLACE(s, 'й', 'y'); SET s = REPLACE(s, 'к', 'k'); SET s = REPLACE(s, 'л', 'l');
+    SET s = REPLACE(s, 'м', 'm'); SET s = REPLACE(s, 'н', 'n'); SET s = REPLACE(s, 'о', 'o'); SET s = REPLACE(s, 'п', 'p');
+    SET s = REPLACE(s, 'р', 'r'); SET s = REPLACE(s, 'с', 's'); SET s = REPLACE(s, 'т', 't'); SET s = REPLACE(s, 'у', 'u');
+    SET s = REPLACE(s, 'ф', 'f'); SET s = REPLACE(s, 'ъ', ''); SET s = REPLACE(s, 'ы', 'y'); SET s = REPLACE(s, 'ь', '');
+    SET s = REPLACE(s, 'э', 'e');
+    RETURN s;
+END //
+
+-- Латиница -> кириллица: сначала буквосочетания, затем отдельные буквы (King -> кинг, Stephen -> стефен)
+CREATE FUNCTION search_translit_cyr(s TEXT CHARSET utf8mb3) RETURNS TEXT CHARSET utf8mb3
+    DETERMINISTIC NO SQL
+BEGIN
+    SET s = REPLACE(s, 'shch', 'щ'); SET s = REPLACE(s, 'sch', 'ш'); SET s = REPLACE(s, 'zh', 'ж'); SET s = REPLACE(s, 'kh', 'х');
+    SET s = REPLACE(s, 'ts', 'ц'); SET s = REPLACE(s, 'ch', 'ч'); SET s = REPLACE(s, 'sh', 'ш'); SET s = REPLACE(s, 'yu', 'ю');
+    SET s = REPLACE(s, 'ya', 'я'); SET s = REPLACE(s, 'ph', 'ф'); SET s = REPLACE(s, 'th', 'т'); SET s = REPLACE(s, 'ck', 'к');
+    SET s = REPLACE(s, 'oo', 'у'); SET s = REPLACE(s, 'ee', 'и'); SET s = REPLACE(s, 'x', 'кс'); SET s = REPLACE(s, 'w', 'в');
+    SET s = REPLACE(s, 'q', 'к'); SET s = REPLACE(s, 'j', 'дж'); SET s = REPLACE(s, 'a', 'а'); SET s = REPLACE(s, 'b', 'б');
+    SET s = REPLACE(s, 'c', 'к'); SET s = REPLACE(s, 'd', 'д'); SET s = REPLACE(s, 'e', 'е'); SET s = REPLACE(s, 'f', 'ф');
+    SET s = REPLACE(s, 'g', 'г'); SET s = REPLACE(s, 'h', 'х'); SET s = REPLACE(s, 'i', 'и'); SET s = REPLACE(s, 'k', 'к');
+    SET s = REPLACE(s, 'l', 'л'); SET s = REPLACE(s, 'm', 'м'); SET s = REPLACE(s, 'n', 'н'); SET s = REPLACE(s, 'o', 'о');
+    SET s = REPLACE(s, 'p', 'п'); SET s = REPLACE(s, 'r', 'р'); SET s = REPLACE(s, 's', 'с'); SET s = REPLACE(s, 't', 'т');
+    SET s = REPLACE(s, 'u', 'у'); SET s = REPLACE(s, 'v', 'в'); SET s = REPLACE(s, 'y', 'й'); SET s = REPLACE(s, 'z', 'з');
+    RETURN s;
+END //
+
+DELIMITER ;
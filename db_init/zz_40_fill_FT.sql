@@ -1,25 +1,65 @@
+-- Документ полнотекстового поиска книги нормализован так же, как запросы (search_query.normalize_token):
+-- нижний регистр, "ё" как "е". Имена авторов дополнены записью другим алфавитом (zz_39_create_translit.sql)
 truncate table libbook_fts;
 INSERT INTO libbook_fts (BookID, FT)
 SELECT
-    b.BookID,
+    d.BookID,
     CONCAT_WS(' ',
-        b.Title,
-        -- b.Lang,
-        case when b.Year between 1600 and 2100 then b.`Year`
-             else ''
-        end,
-        GROUP_CONCAT(DISTINCT CONCAT_WS(' ', an.LastName, an.FirstName, an.MiddleName)),
-        GROUP_CONCAT(DISTINCT sn.SeqName),
-        GROUP_CONCAT(DISTINCT gl.GenreDesc)
+        d.FT,
+        NULLIF(search_translit_lat(d.Authors), d.Authors),
+        NULLIF(search_translit_cyr(d.Authors), d.Authors)
     ) as FT
-FROM libbook b
-LEFT JOIN libavtor a ON a.BookID = b.BookID
-LEFT JOIN libavtorname an ON a.AvtorID = an.AvtorID
-LEFT JOIN libseq s ON s.BookID = b.BookID
-LEFT JOIN libseqname sn ON s.SeqID = sn.SeqID
-LEFT JOIN libgenre g ON g.BookID = b.BookID
-LEFT JOIN libgenrelist gl ON g.GenreID = gl.GenreID
-WHERE b.Deleted = '0'
-GROUP BY b.BookID -- , b.Title, b.Lang, b.Year
+FROM (
+    SELECT
+        b.BookID,
+        REPLACE(LOWER(CONCAT_WS(' ',
+            b.Title,
+            -- b.Lang,
+            case when b.Year between 1600 and 2100 then b.`Year`
+                 else ''
+            end,
+            GROUP_CONCAT(DISTINCT CONCAT_WS(' ', an.LastName, an.FirstName, an.MiddleName)),
+            GROUP_CONCAT(DISTINCT sn.SeqName),
+            GROUP_CONCAT(DISTINCT gl.GenreDesc)
+        )), 'ё', 'е') as FT,
+        REPLACE(LOWER(GROUP_CONCAT(DISTINCT CONCAT_WS(' ', an.LastName, an.FirstName, an.MiddleName))), 'ё', 'е') as Authors
+    FROM libbook b
+    LEFT JOIN libavtor a ON a.BookID = b.BookID
+    LEFT JOIN libavtorname an ON a.AvtorID = an.AvtorID
+    LEFT JOIN libseq s ON s.BookID = b.BookID
+    LEFT JOIN libseqname sn ON s.SeqID = sn.SeqID
+    LEFT JOIN libgenre g ON g.BookID = b.BookID
+    LEFT JOIN libgenrelist gl ON g.GenreID = gl.GenreID
+    WHERE b.Deleted = '0'
+    GROUP BY b.BookID -- , b.Title, b.Lang, b.Year
+) d
 ON DUPLICATE KEY UPDATE FT = VALUES(FT);
 
+-- Подписи исходных данных документов: по ним DatabaseBooks.refresh_fts находит изменённые книги
+-- (выражение подписи то же, что в SQL_FILL_FTS_CHANGED в app/database.py)
+truncate table libbook_fts_sig;
+INSERT INTO libbook_fts_sig (BookID, Sig)
+SELECT
+    b.BookID,
+    CRC32(CONCAT_WS('|', b.Time, b.Title, b.Year, b.Lang, b.FileSize,
+                    COALESCE(a.Sig, ''), COALESCE(s.Sig, ''), COALESCE(g.Sig, ''))) as Sig
+FROM libbook b
+LEFT JOIN (
+    SELECT a.BookID, BIT_XOR(CRC32(CONCAT_WS('|', a.AvtorID, an.LastName, an.FirstName, an.MiddleName))) as Sig
+    FROM libavtor a
+    LEFT JOIN libavtorname an ON an.AvtorID = a.AvtorID
+    GROUP BY a.BookID
+) a ON a.BookID = b.BookID
+LEFT JOIN (
+    SELECT s.BookID, BIT_XOR(CRC32(CONCAT_WS('|', s.SeqID, sn.SeqName))) as Sig
+    FROM libseq s
+    LEFT JOIN libseqname sn ON sn.SeqID = s.SeqID
+    GROUP BY s.BookID
+) s ON s.BookID = b.BookID
+LEFT JOIN (
+    SELECT g.BookID, BIT_XOR(CRC32(CONCAT_WS('|', g.GenreID, gl.GenreDesc))) as Sig
+    FROM libgenre g
+    LEFT JOIN libgenrelist gl ON gl.GenreID = g.GenreID
+    GROUP BY g.BookID
+) g ON g.BookID = b.BookID
+WHERE b.Deleted = '0';
@@ -0,0 +1,44 @@
+truncate table book_stats;
+INSERT INTO book_stats (BookID, RateAvg, LibRate, RateCount, RecsCount, ReviewsCount, PopCount,
+                        LastRecTime, LastReviewTime, LastActivity)
+SELECT
+    b.BookID,
+    ra.RateAvg,
+    ROUND(COALESCE(ra.RateAvg, 0)),
+    COALESCE(ra.cnt, 0),
+    COALESCE(re.cnt, 0),
+    COALESCE(rv.cnt, 0),
+    COALESCE(ra.cnt, 0) + COALESCE(re.cnt, 0) + COALESCE(rv.cnt, 0),
+    re.last_time,
+    rv.last_time,
+    case
+      when re.last_time is null then rv.last_time
+      when rv.last_time is null then re.last_time
+      else GREATEST(re.last_time, rv.last_time)
+    end
+FROM libbook b
+LEFT JOIN (
+    SELECT BookId, AVG(CAST(Rate AS SIGNED)) as RateAvg, COUNT(DISTINCT ID) as cnt
+    FROM librate
+    GROUP BY BookId
+) ra ON ra.BookId = b.BookID
+LEFT JOIN (
+    SELECT bid as BookId, COUNT(DISTINCT id) as cnt, MAX(timestamp) as last_time
+    FROM librecs
+    GROUP BY bid
+) re ON re.BookId = b.BookID
+LEFT JOIN (
+    SELECT BookId, COUNT(DISTINCT Time) as cnt, MAX(Time) as last_time
+    FROM libreviews
+    GROUP BY BookId
+) rv ON rv.BookId = b.BookID
+WHERE ra.BookId IS NOT NULL OR re.BookId IS NOT NULL OR rv.BookId IS NOT NULL;
+
+REPLACE INTO book_stats_state (ID, MaxRateID, MaxRecID, MaxReviewTime, UpdatedAt)
+SELECT 1,
+       (SELECT COALESCE(MAX(ID), 0) FROM librate),
+       (SELECT COALESCE(MAX(id), 0) FROM librecs),
+       (SELECT MAX(Time) FROM libreviews),
+       NOW();
+
+ANALYZE TABLE book_stats;
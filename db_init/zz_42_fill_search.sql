@@ -0,0 +1,32 @@
+truncate table libbook_search;
+INSERT INTO libbook_search (BookID, SearchLang, Title, BookSize, SearchYear, BookSizeCat,
+                            AuthorID, LastName, FirstName, MiddleName, Genre, SeriesID, SeriesTitle, LibRate)
+SELECT
+    b.BookID,
+    upper(b.Lang),
+    b.Title,
+    b.FileSize,
+    b.Year,
+    case
+      when b.FileSize <= 800 * 1024 then 'less800'
+      when b.FileSize > 800 * 1024 then 'more800'
+    end,
+    an.AvtorID,
+    an.LastName,
+    an.FirstName,
+    an.MiddleName,
+    gl.GenreDesc,
+    sn.SeqID,
+    sn.SeqName,
+    COALESCE(st.LibRate, 0)
+FROM libbook b
+LEFT JOIN (select bookid, min(avtorid) as avtorid from libavtor group by bookid) a ON a.BookID = b.BookID
+LEFT JOIN libavtorname an ON an.AvtorID = a.AvtorID
+LEFT JOIN (select bookid, min(genreid) as genreid from libgenre group by bookid) g ON g.BookID = b.BookID
+LEFT JOIN libgenrelist gl ON gl.GenreID = g.GenreID
+LEFT JOIN (select bookid, min(seqid) as seqid from libseq group by bookid) s ON s.BookID = b.BookID
+LEFT JOIN libseqname sn ON sn.SeqID = s.SeqID
+LEFT JOIN book_stats st ON st.BookID = b.BookID
+WHERE b.Deleted = '0';
+
+ANALYZE TABLE libbook_search;
@@ -0,0 +1,36 @@
+-- Все авторы книги (не только первый, как в libbook_search)
+truncate table libavtor_stats;
+INSERT INTO libavtor_stats (AvtorID, SearchLang, BookSizeCat, LibRate, BookCount)
+SELECT
+    a.AvtorID,
+    bs.SearchLang,
+    COALESCE(bs.BookSizeCat, ''),
+    bs.LibRate,
+    COUNT(DISTINCT bs.BookID)
+FROM libavtor a
+JOIN libbook_search bs ON bs.BookID = a.BookID
+GROUP BY a.AvtorID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate;
+
+-- Имя для поиска дополнено записью другим алфавитом, как имена авторов в libbook_fts (zz_40_fill_FT.sql):
+-- "Tolstoy" находит Толстого и во вкладке авторов
+truncate table libavtor_search;
+INSERT IGNORE INTO libavtor_search (AvtorID, AuthorName, SearchName)
+SELECT
+    n.AvtorID,
+    n.AuthorName,
+    CONCAT_WS(' ',
+        n.AuthorName,
+        NULLIF(search_translit_lat(n.Authors), n.Authors),
+        NULLIF(search_translit_cyr(n.Authors), n.Authors)
+    )
+FROM (
+    SELECT
+        an.AvtorID,
+        CONCAT(COALESCE(an.LastName, ''), ' ', COALESCE(an.FirstName, ''), ' ', COALESCE(an.MiddleName, '')) as AuthorName,
+        REPLACE(LOWER(CONCAT_WS(' ', an.LastName, an.FirstName, an.MiddleName)), 'ё', 'е') as Authors
+    FROM libavtorname an
+    WHERE (an.LastName <> '' OR an.FirstName <> '' OR an.MiddleName <> '')
+      AND EXISTS (SELECT 1 FROM libavtor_stats st WHERE st.AvtorID = an.AvtorID)
+) n;
+
+ANALYZE TABLE libavtor_stats, libavtor_search;
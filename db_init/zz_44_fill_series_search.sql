@@ -0,0 +1,45 @@
+truncate table libseq_stats;
+INSERT INTO libseq_stats (SeqID, SearchLang, BookSizeCat, LibRate, BookCount)
+SELECT
+    s.SeqID,
+    bs.SearchLang,
+    COALESCE(bs.BookSizeCat, ''),
+    bs.LibRate,
+    COUNT(DISTINCT bs.BookID)
+FROM libseq s
+JOIN libbook_search bs ON bs.BookID = s.BookID
+GROUP BY s.SeqID, bs.SearchLang, COALESCE(bs.BookSizeCat, ''), bs.LibRate;
+
+-- Первый автор серии - первый автор её книги с наименьшим BookID;
+-- имя дополнено записью другим алфавитом, как имена авторов в libbook_fts (zz_40_fill_FT.sql)
+truncate table libseq_search;
+INSERT INTO libseq_search (SeqID, SeriesTitle, AuthorName, RateAvg)
+SELECT
+    n.SeqID,
+    n.SeriesTitle,
+    CONCAT_WS(' ',
+        n.AuthorName,
+        NULLIF(search_translit_lat(n.Authors), n.Authors),
+        NULLIF(search_translit_cyr(n.Authors), n.Authors)
+    ),
+    n.RateAvg
+FROM (
+    SELECT
+        sn.SeqID,
+        sn.SeqName as SeriesTitle,
+        CONCAT(COALESCE(fb.LastName, ''), ' ', COALESCE(fb.FirstName, ''), ' ', COALESCE(fb.MiddleName, '')) as AuthorName,
+        REPLACE(LOWER(CONCAT_WS(' ', fb.LastName, fb.FirstName, fb.MiddleName)), 'ё', 'е') as Authors,
+        r.RateAvg
+    FROM libseqname sn
+    JOIN (
+        SELECT s.SeqID, MIN(s.BookID) as FirstBookID, AVG(st.RateAvg) as RateAvg
+        FROM libseq s
+        JOIN libbook_search bs ON bs.BookID = s.BookID
+        LEFT JOIN book_stats st ON st.BookID = s.BookID
+        GROUP BY s.SeqID
+    ) r ON r.SeqID = sn.SeqID
+    LEFT JOIN libbook_search fb ON fb.BookID = r.FirstBookID
+    WHERE sn.SeqName <> ''
+) n;
+
+ANALYZE TABLE libseq_stats, libseq_search;
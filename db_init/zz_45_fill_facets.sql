@@ -0,0 +1,23 @@
+-- Счётчики меню жанров и выбора языка (читаются ботом вместо подсчёта по libbook)
+truncate table libgenre_stats;
+INSERT INTO libgenre_stats (SearchLang, GenreMeta, GenreID, GenreDesc, BookCount)
+SELECT
+    upper(COALESCE(b.Lang, '')),
+    COALESCE(gl.GenreMeta, 'Неотсортированное'),
+    COALESCE(gl.GenreId, 0),
+    COALESCE(MAX(gl.GenreDesc), ''),
+    COUNT(b.BookId)
+FROM libbook b
+LEFT JOIN libgenre g ON g.BookId = b.BookId
+LEFT JOIN libgenrelist gl ON gl.GenreId = g.GenreId
+WHERE b.Deleted = '0'
+GROUP BY upper(COALESCE(b.Lang, '')), COALESCE(gl.GenreMeta, 'Неотсортированное'), COALESCE(gl.GenreId, 0);
+
+truncate table liblang_stats;
+INSERT INTO liblang_stats (Lang, BookCount)
+SELECT b.Lang, COUNT(b.Lang)
+FROM libbook b
+WHERE b.Deleted = '0' AND b.Lang IS NOT NULL
+GROUP BY b.Lang;
+
+ANALYZE TABLE libgenre_stats, liblang_stats;
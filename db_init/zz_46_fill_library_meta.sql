@@ -0,0 +1,27 @@
+-- Статистика библиотеки для /about и дата обновления для запросов популярного.
+-- Число языков - из liblang_stats (zz_45_fill_facets.sql)
+REPLACE INTO library_meta (ID, LastUpdate, BooksCount, MaxBookID, AuthorsCount, GenresCount, SeriesCount,
+                           LanguagesCount, ContentVersion, UpdatedAt)
+SELECT
+    1,
+    DATE(b.MaxTime),
+    b.BooksCount,
+    b.MaxBookID,
+    c.AuthorsCount,
+    c.GenresCount,
+    c.SeriesCount,
+    c.LanguagesCount,
+    MD5(CONCAT_WS('|', b.MaxTime, b.BooksCount, b.MaxBookID, c.AuthorsCount, c.GenresCount, c.SeriesCount)),
+    NOW()
+FROM (
+    SELECT MAX(Time) as MaxTime, COUNT(*) as BooksCount, MAX(BookId) as MaxBookID
+    FROM libbook
+    WHERE Deleted = '0'
+) b
+CROSS JOIN (
+    SELECT
+        (SELECT COUNT(*) FROM libavtorname) as AuthorsCount,
+        (SELECT COUNT(*) FROM libgenrelist) as GenresCount,
+        (SELECT COUNT(*) FROM libseqname) as SeriesCount,
+        (SELECT COUNT(*) FROM liblang_stats) as LanguagesCount
+) c;
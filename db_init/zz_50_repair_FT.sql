@@ -1,3 +1,7 @@
 -- Перестроить FULLTEXT индексы
 REPAIR TABLE libbook_fts QUICK;
-OPTIMIZE TABLE libbook_fts;
\ No newline at end of file
+OPTIMIZE TABLE libbook_fts;
+REPAIR TABLE libavtor_search QUICK;
+OPTIMIZE TABLE libavtor_search;
+REPAIR TABLE libseq_search QUICK;
+OPTIMIZE TABLE libseq_search;
\ No newline at end of file
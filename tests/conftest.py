@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Модули бота импортируются так же, как при запуске из app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+
+@pytest.fixture
+def books_db():
+    """
+    DatabaseBooks без пула для интеграционных тестов: нужна MariaDB с загруженной библиотекой
+    и скриптами db_init (переменные окружения DB_* как у бота), иначе тест пропускается
+    """
+    pytest.importorskip('mysql.connector')
+    if not os.getenv('DB_HOST'):
+        pytest.skip("DB_HOST не задан - MariaDB для интеграционных тестов недоступна")
+    database = pytest.importorskip('database')
+    return database.DatabaseBooks(database.DB_BOOKS.db_config)
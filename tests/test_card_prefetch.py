@@ -0,0 +1,46 @@
+import asyncio
+
+from card_prefetch import CardPrefetcher
+
+
+class FakeConnection:
+    """
+    Единственное соединение пула, ведущее себя как соединение aiomysql: запрос, прерванный
+    до чтения ответа, оставляет непрочитанный ответ, и следующий запрос на соединении падает
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.unread = False
+        self.started = asyncio.Event()
+
+    async def query(self, result):
+        async with self._lock:
+            if self.unread:
+                raise RuntimeError("Command Out of Sync")
+            self.unread = True
+            self.started.set()
+            await asyncio.sleep(0.05)
+            self.unread = False
+            return result
+
+
+def test_cancelled_prefetch_does_not_break_next_query():
+    async def scenario():
+        conn = FakeConnection()
+        prefetcher = CardPrefetcher(enabled=True, max_size=10, ttl=60)
+
+        async def fetch_cards(book_ids):
+            return dict(await conn.query([(book_id, f"card {book_id}") for book_id in book_ids]))
+
+        prefetcher.schedule(1, [101, 102], fetch_cards)
+        await conn.started.wait()
+        prefetcher.cancel(1)
+
+        assert await conn.query('book 103') == 'book 103'
+        assert not conn.unread
+        # Результат отменённой загрузки отброшен
+        assert prefetcher.take(101) is None
+        assert prefetcher.get_stats()['cancelled'] == 1
+
+    asyncio.run(scenario())
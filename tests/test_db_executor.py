@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+
+from db_executor import DBLane, DatabaseBusyError
+
+
+def test_run_async_rejects_when_queue_is_full_and_forgets_cancelled():
+    async def scenario():
+        lane = DBLane('test', workers=1, max_queue=1)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def blocking():
+            started.set()
+            await release.wait()
+            return 'first'
+
+        async def quick():
+            return 'quick'
+
+        first = asyncio.create_task(lane.run_async(blocking))
+        await started.wait()
+        queued = asyncio.create_task(lane.run_async(quick))
+        await asyncio.sleep(0)
+        assert lane.get_stats()['queued'] == 1
+
+        with pytest.raises(DatabaseBusyError):
+            await lane.run_async(quick)
+        assert lane.get_stats()['rejected'] == 1
+
+        # Отменённый до начала выполнения запрос уходит из очереди
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert lane.get_stats()['queued'] == 0
+
+        release.set()
+        assert await first == 'first'
+        assert await lane.run_async(quick) == 'quick'
+        stats = lane.get_stats()
+        assert (stats['queued'], stats['running'], stats['completed']) == (0, 0, 2)
+
+    asyncio.run(scenario())
+
+
+def test_run_rejects_when_queue_is_full_and_forgets_cancelled():
+    async def scenario():
+        lane = DBLane('test', workers=1, max_queue=1)
+        started = threading.Event()
+        release = threading.Event()
+        called = []
+
+        def blocking():
+            started.set()
+            release.wait(5)
+            return 'first'
+
+        def quick():
+            called.append('quick')
+            return 'quick'
+
+        try:
+            first = asyncio.create_task(lane.run(blocking))
+            await asyncio.sleep(0)
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            queued = asyncio.create_task(lane.run(quick))
+            await asyncio.sleep(0)
+            assert lane.get_stats()['queued'] == 1
+
+            with pytest.raises(DatabaseBusyError):
+                await lane.run(quick)
+
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            assert lane.get_stats()['queued'] == 0
+        finally:
+            release.set()
+
+        assert await first == 'first'
+        assert await lane.run(quick) == 'quick'
+        # Отменённый запрос не выполнялся, когда освободился исполнитель
+        assert called == ['quick']
+        assert lane.get_stats()['queued'] == 0
+        lane.shutdown()
+
+    asyncio.run(scenario())
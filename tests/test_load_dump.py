@@ -0,0 +1,48 @@
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+
+# load_dump загружает таблицы через DatabaseBooks и без драйвера MariaDB не импортируется
+load_dump = pytest.importorskip('load_dump')
+
+
+def write_dump(tmp_path, text):
+    path = tmp_path / 'lib.libtest.sql.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+
+def test_read_statements_keeps_semicolon_inside_quoted_value(tmp_path):
+    path = write_dump(tmp_path, (
+        "-- MySQL dump\n"
+        "\n"
+        "CREATE TABLE `libtest` (\n"
+        "  `ID` int(10) NOT NULL\n"
+        ");\n"
+        "INSERT INTO `libtest` VALUES (1,'Первая строка;\n"
+        "вторая строка с \\'кавычкой\\';\n"
+        "конец;'),(2,'It''s;\n"
+        "done');\n"
+        "INSERT INTO `libtest` VALUES (3,\"a;\n"
+        "b\\\\\");\n"
+    ))
+
+    statements = list(load_dump.read_statements(path))
+
+    assert statements == [
+        "CREATE TABLE `libtest` (\n  `ID` int(10) NOT NULL\n)",
+        "INSERT INTO `libtest` VALUES (1,'Первая строка;\nвторая строка с \\'кавычкой\\';\nконец;'),(2,'It''s;\ndone')",
+        "INSERT INTO `libtest` VALUES (3,\"a;\nb\\\\\")",
+    ]
+
+
+def test_open_quote():
+    assert load_dump.open_quote("(1,'abc'),(2,'de") == "'"
+    assert load_dump.open_quote("f;'),(3,'x')", "'") is None
+    assert load_dump.open_quote("'a\\'b") == "'"
+    assert load_dump.open_quote('"it\'s";') is None
@@ -0,0 +1,47 @@
+import uuid
+
+from search_query import compile_query
+
+
+def add_book(db, title):
+    """Добавляет в libbook копию любой книги библиотеки с новым BookID и названием, возвращает BookID"""
+    with db.connect() as conn:
+        cursor = conn.cursor(buffered=True)
+        cursor.execute("SELECT MAX(BookID) + 1 FROM libbook")
+        book_id = cursor.fetchone()[0]
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS test_libbook")
+        cursor.execute("CREATE TEMPORARY TABLE test_libbook AS SELECT * FROM libbook WHERE Deleted = '0' LIMIT 1")
+        cursor.execute("UPDATE test_libbook SET BookID = %s, Title = %s", (book_id, title))
+        cursor.execute("INSERT INTO libbook SELECT * FROM test_libbook")
+        cursor.execute("DROP TEMPORARY TABLE test_libbook")
+        conn.commit()
+    return book_id
+
+
+def delete_book(db, book_id):
+    with db.connect() as conn:
+        cursor = conn.cursor(buffered=True)
+        cursor.execute("DELETE FROM libbook WHERE BookID = %s", (book_id,))
+        conn.commit()
+
+
+def find_book_ids(db, title):
+    books = db.search_books(compile_query(title).strict, lang='', size_limit='')
+    return [int(book.FileName) for book in books]
+
+
+def test_refresh_fts_makes_new_book_searchable(books_db):
+    title = f"refreshfts{uuid.uuid4().hex[:12]}"
+    book_id = add_book(books_db, title)
+    try:
+        assert find_book_ids(books_db, title) == []
+
+        updated, _ = books_db.refresh_fts()
+        assert updated >= 1
+        assert find_book_ids(books_db, title) == [book_id]
+    finally:
+        delete_book(books_db, book_id)
+        books_db.refresh_fts()
+
+    # Удалённая книга пропадает и из документов, и из таблицы поиска
+    assert find_book_ids(books_db, title) == []
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from result_cache import ResultCache
+
+
+class Loader:
+    """Загрузка с подсчётом вызовов, которую тест завершает сам (release)"""
+
+    def __init__(self, result='value', error=None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ResultCache(max_size=10, ttl=60)
+        loader = Loader()
+        waiters = [asyncio.create_task(cache.get_or_load('key', loader)) for _ in range(3)]
+        await loader.started.wait()
+        loader.release.set()
+
+        assert await asyncio.gather(*waiters) == ['value'] * 3
+        assert loader.calls == 1
+        assert await cache.get_or_load('key', loader) == 'value'
+        assert loader.calls == 1
+        stats = cache.get_stats()
+        assert (stats['misses'], stats['shared'], stats['hits']) == (1, 2, 1)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_load():
+    async def scenario():
+        cache = ResultCache(max_size=10, ttl=60)
+        loader = Loader()
+        cancelled = asyncio.create_task(cache.get_or_load('key', loader))
+        other = asyncio.create_task(cache.get_or_load('key', loader))
+        await loader.started.wait()
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        loader.release.set()
+
+        assert await other == 'value'
+        assert loader.calls == 1
+        assert cache.contains('key')
+
+    asyncio.run(scenario())
+
+
+def test_load_finished_after_invalidate_is_not_stored():
+    async def scenario():
+        cache = ResultCache(max_size=10, ttl=60)
+        stale = Loader(result='stale')
+        waiter = asyncio.create_task(cache.get_or_load('key', stale))
+        await stale.started.wait()
+
+        cache.invalidate()
+        stale.release.set()
+        # Ожидающий получает свой результат, но в кеш он не попадает
+        assert await waiter == 'stale'
+        await asyncio.sleep(0)
+        assert not cache.contains('key')
+
+        fresh = Loader(result='fresh')
+        fresh.release.set()
+        assert await cache.get_or_load('key', fresh) == 'fresh'
+        assert fresh.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_errors_are_not_cached():
+    async def scenario():
+        cache = ResultCache(max_size=10, ttl=60)
+        failing = Loader(error=RuntimeError("db error"))
+        failing.release.set()
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load('key', failing)
+        await asyncio.sleep(0)
+        assert not cache.contains('key')
+
+        loader = Loader()
+        loader.release.set()
+        assert await cache.get_or_load('key', loader) == 'value'
+        assert loader.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_entry_is_evicted_at_max_size():
+    async def scenario():
+        cache = ResultCache(max_size=2, ttl=60)
+
+        async def load(value):
+            return value
+
+        await cache.get_or_load('a', load, 1)
+        await cache.get_or_load('b', load, 2)
+        await asyncio.sleep(0)
+        # Обращение к 'a' делает давно не использованным 'b'
+        assert await cache.get_or_load('a', load, 100) == 1
+        await cache.get_or_load('c', load, 3)
+        await asyncio.sleep(0)
+
+        assert cache.contains('a') and cache.contains('c')
+        assert not cache.contains('b')
+        assert cache.get_stats()['evictions'] == 1
+        assert cache.get_stats()['size'] == 2
+
+    asyncio.run(scenario())
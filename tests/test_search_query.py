@@ -0,0 +1,55 @@
+from search_query import FT_MIN_TOKEN_SIZE, compile_query, fold_mixed_script, normalize_token, query_terms
+
+
+def test_stopwords_are_dropped_from_mixed_query():
+    compiled = compile_query("The Hobbit")
+    assert compiled.terms == ('hobbit',)
+    assert compiled.strict == '+hobbit*'
+
+
+def test_stopword_only_query_is_kept():
+    compiled = compile_query("The Who")
+    assert compiled.terms == ('the', 'who')
+    assert compiled.strict == '+the* +who*'
+    assert compiled.loose == 'the* who*'
+
+
+def test_russian_words_are_not_stopwords():
+    assert compile_query("Оно").strict == '+оно*'
+    assert query_terms("кто такой") == ['кто', 'такой']
+
+
+def test_short_tokens_are_dropped():
+    short = 'я' * (FT_MIN_TOKEN_SIZE - 1)
+    assert query_terms(f"{short} мир") == ['мир']
+    assert compile_query(short).terms == ()
+
+
+def test_empty_and_punctuation_only_input():
+    for text in ('', None, '   ', '+-*"()<>~@', '!!! ... ???'):
+        compiled = compile_query(text)
+        assert compiled.terms == ()
+        assert compiled.strict == ''
+        assert compiled.loose == ''
+        assert compiled.key == ''
+
+
+def test_yo_is_folded_to_ye():
+    assert normalize_token('Ёжик') == 'ежик'
+    assert compile_query("Ёлки-палки").terms == ('елки', 'палки')
+
+
+def test_mixed_script_tokens_use_majority_alphabet():
+    # "тoлстой" с латинской "o" - слово кириллицей
+    assert fold_mixed_script('тoлстой') == 'толстой'
+    # Латинское слово с кириллической "о"
+    assert fold_mixed_script('tоlkien') == 'tolkien'
+    assert fold_mixed_script('толстой') == 'толстой'
+    assert fold_mixed_script('tolkien') == 'tolkien'
+    assert compile_query("ТОЛСТOЙ").terms == ('толстой',)
+
+
+def test_key_does_not_depend_on_word_order_case_or_repeats():
+    keys = {compile_query(text).key for text in ("Война и мир", "мир ВОЙНА", "война, мир, война!")}
+    assert keys == {'война мир'}
+    assert compile_query("мир война").strict == '+война* +мир*'
@@ -0,0 +1,140 @@
+"""
+Сравнение бэкендов доступа к БД из event loop: executor (DatabaseBooks в пуле потоков)
+и aiomysql (AsyncDatabaseBooks).
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/bench_async_backend.py --query "толстой" --book-id 12345 --requests 500
+
+Для каждого бэкенда и уровня конкурентности печатаются p50/p95 латентности, RPS,
+число запросов, отклонённых переполненной очередью (DatabaseBusyError), и максимальная
+задержка event loop (насколько долго цикл не мог обработать другие задачи).
+
+Смешанный замер (mixed) запускает поток поисков с максимальной конкурентностью и
+одновременно измеряет латентность get_book_info - проверка изоляции очередей.
+
+Кеш результатов поиска (RESULT_CACHE) на время замера отключается, с --cache - включён
+(одинаковые поиски обслуживаются из кеша и одной общей загрузкой).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DB_BOOKS  # noqa: E402
+from database_async import ExecutorDatabaseBooks, AsyncDatabaseBooks  # noqa: E402
+from db_executor import DatabaseBusyError, DB_LANES  # noqa: E402
+from result_cache import RESULT_CACHE  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list, interval=0.01):
+    """Фоновая задача: насколько позже запланированного просыпается event loop"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run_case(db, method, args, concurrency, requests):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    rejected = 0
+
+    async def call():
+        nonlocal rejected
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await getattr(db, method)(*args)
+            except DatabaseBusyError:
+                rejected += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    lags = []
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lags))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await lag_task
+
+    return {
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'rps': len(latencies) / elapsed,
+        'rejected': rejected,
+        'max_lag_ms': max(lags, default=0) * 1000,
+    }
+
+
+def print_result(name, method, level, res):
+    print(f"{name:9} {method:14} c={level:<3} "
+          f"p50={res['p50_ms']:8.1f}ms p95={res['p95_ms']:8.1f}ms "
+          f"rps={res['rps']:7.1f} rejected={res['rejected']:<4} loop_lag_max={res['max_lag_ms']:6.1f}ms")
+
+
+async def main_async(args):
+    levels = [int(level) for level in args.concurrency.split(',')]
+    if not args.cache:
+        RESULT_CACHE.max_size = 0
+    cases = [
+        ('search_books', (args.query, args.lang, '', '')),
+        ('get_book_info', (args.book_id,)),
+    ]
+    backends = {
+        'executor': ExecutorDatabaseBooks(DB_BOOKS),
+        'aiomysql': AsyncDatabaseBooks(DB_BOOKS.db_config, DB_BOOKS.pool_config),
+    }
+
+    for name, db in backends.items():
+        for method, method_args in cases:
+            # Прогрев
+            await run_case(db, method, method_args, 1, 3)
+            for level in levels:
+                res = await run_case(db, method, method_args, level, args.requests)
+                print_result(name, method, level, res)
+
+        # Поток поисков и одновременно карточки книг
+        search_res, lookup_res = await asyncio.gather(
+            run_case(db, 'search_books', cases[0][1], max(levels), args.requests),
+            run_case(db, 'get_book_info', cases[1][1], 4, args.requests),
+        )
+        print_result(name, 'mixed:search', max(levels), search_res)
+        print_result(name, 'mixed:lookup', 4, lookup_res)
+
+        print(f"{name} pool stats: {db.get_pool_stats()}")
+        print(f"{name} lane stats: {DB_LANES.get_stats()}")
+        if args.cache:
+            print(f"{name} cache stats: {RESULT_CACHE.get_stats()}")
+            RESULT_CACHE.invalidate()
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', default='толстой', help='поисковый запрос для search_books')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--book-id', type=int, required=True, help='BookID для get_book_info')
+    parser.add_argument('--requests', type=int, default=500, help='число вызовов на один замер')
+    parser.add_argument('--concurrency', default='1,8,32,64', help='уровни конкурентности через запятую')
+    parser.add_argument('--cache', action='store_true', help='не отключать кеш результатов поиска')
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
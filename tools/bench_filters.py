@@ -0,0 +1,59 @@
+"""
+Замер поиска на самых частых сочетаниях фильтров из настроек пользователей
+(UserSettings: Lang, BookSize, Rating, SearchArea).
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/bench_filters.py --settings-db data/FlibustaSettings.sqlite --query "толстой" --top 10
+
+Для каждого сочетания выполняются search_books, search_series, search_authors
+и search_pop_books (за 30 дней); печатаются медиана и максимум латентности.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from constants import FLIBUSTA_DB_SETTINGS_PATH  # noqa: E402
+from bench_queries import measure  # noqa: E402
+
+SQL_QUERY_FILTER_COMBINATIONS = """
+    SELECT COALESCE(Lang, ''), COALESCE(BookSize, ''), COALESCE(Rating, ''), COALESCE(SearchArea, 'b'),
+           COUNT(*) as users_cnt
+    FROM UserSettings
+    GROUP BY 1, 2, 3, 4
+    ORDER BY users_cnt DESC
+    LIMIT ?
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings-db', default=FLIBUSTA_DB_SETTINGS_PATH, help='путь к SQLite с UserSettings')
+    parser.add_argument('--query', default='толстой', help='поисковый запрос')
+    parser.add_argument('--top', type=int, default=10, help='число самых частых сочетаний фильтров')
+    parser.add_argument('--runs', type=int, default=5, help='число повторов каждого случая')
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.settings_db) as conn:
+        combinations = conn.execute(SQL_QUERY_FILTER_COMBINATIONS, (args.top,)).fetchall()
+
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+    for lang, size_limit, rating, search_area, users_cnt in combinations:
+        print(f"=== lang={lang or '*'} size={size_limit or '*'} rating={rating or '*'} "
+              f"area={search_area} users={users_cnt}")
+        cases = [
+            ('search_books', (args.query, lang, size_limit, rating, search_area)),
+            ('search_series', (args.query, lang, size_limit, rating, search_area)),
+            ('search_authors', (args.query, lang, size_limit, rating, search_area)),
+            ('search_pop_books', (lang, size_limit, rating, 30)),
+        ]
+        for method, method_args in cases:
+            res = measure(db, method, method_args, args.runs)
+            print(f"  {method:18} p50={res['p50_ms']:9.1f}ms max={res['max_ms']:9.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
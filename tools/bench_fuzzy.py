@@ -0,0 +1,89 @@
+"""
+Замер подсказок исправления опечаток (DatabaseBooks.suggest_queries): латентность и точность.
+
+Запуск после tools/build_fuzzy_index.py (переменные окружения DB_* как у бота):
+    python tools/bench_fuzzy.py --words 200 --kinds authors
+
+Из словаря берутся --words случайных слов среди самых частых, в каждое вносится одна
+случайная опечатка (замена, пропуск, вставка или перестановка букв). Печатаются медиана,
+95-й перцентиль и максимум времени подбора, доля опечаток, для которых исходное слово
+попало в подсказки, и доля, для которых оно первое.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from search_fuzzy import FUZZY_KIND_AUTHOR, FUZZY_KINDS_BOOKS  # noqa: E402
+
+KINDS = {'books': FUZZY_KINDS_BOOKS, 'authors': FUZZY_KIND_AUTHOR}
+
+SQL_QUERY_FREQUENT_WORDS = """
+    SELECT CONVERT(Word USING utf8mb3)
+    FROM lib_fuzzy_words
+    WHERE Kinds & %s AND CHAR_LENGTH(Word) >= 5
+    ORDER BY Freq DESC
+    LIMIT %s
+"""
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def make_typo(word, rnd):
+    """Слово с одной случайной опечаткой"""
+    pos = rnd.randrange(len(word))
+    kind = rnd.choice(('replace', 'delete', 'insert', 'swap'))
+    if kind == 'replace':
+        return word[:pos] + rnd.choice(ALPHABET.replace(word[pos], '')) + word[pos + 1:]
+    if kind == 'delete':
+        return word[:pos] + word[pos + 1:]
+    if kind == 'insert':
+        return word[:pos] + rnd.choice(ALPHABET) + word[pos:]
+    pos = min(pos, len(word) - 2)
+    return word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=200, help='число слов с опечатками')
+    parser.add_argument('--top', type=int, default=20000, help='выбирать слова среди стольких самых частых')
+    parser.add_argument('--kinds', choices=KINDS, default='books', help='словарь: книги или авторы')
+    parser.add_argument('--seed', type=int, default=1, help='начальное значение генератора опечаток')
+    args = parser.parse_args()
+
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+    kinds = KINDS[args.kinds]
+    rnd = random.Random(args.seed)
+
+    frequent = [row[0] for row in db._fetchall(SQL_QUERY_FREQUENT_WORDS, (kinds, args.top))]
+    sample = rnd.sample(frequent, min(args.words, len(frequent)))
+
+    db.suggest_queries(sample[0], kinds)  # прогрев
+    latencies = []
+    found = first = 0
+    for word in sample:
+        typo = make_typo(word, rnd)
+        started = time.perf_counter()
+        suggestions = db.suggest_queries(typo, kinds)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found += word in suggestions
+        first += bool(suggestions) and suggestions[0] == word
+
+    print(f"Слов с опечатками: {len(sample)}")
+    print(f"  p50={statistics.median(latencies):.1f}ms p95={percentile(latencies, 0.95):.1f}ms "
+          f"max={max(latencies):.1f}ms")
+    print(f"  исходное слово в подсказках {found / len(sample):.0%}, первым {first / len(sample):.0%}")
+
+
+if __name__ == '__main__':
+    main()
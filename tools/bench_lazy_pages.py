@@ -0,0 +1,83 @@
+"""
+Сравнение режимов выдачи найденных книг (SEARCH_RESULTS_MODE): eager и lazy.
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/bench_lazy_pages.py --query "толстой" --query "война мир" --page-size 20 --runs 5
+
+Для каждого запроса печатаются:
+  - время до первой страницы: eager - search_books (все книги до MAX_BOOKS_SEARCH),
+    lazy - search_books_page первой страницы с подсчётом найденных книг;
+  - время перелистывания в lazy: следующая страница по ключу и последняя по смещению;
+  - объём данных поиска в сессии (размер pickle): страницы книг в eager и курсор в lazy.
+"""
+import argparse
+import os
+import pickle
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from constants import SETTING_SEARCH_AREA_B  # noqa: E402
+
+
+def timed(func, runs):
+    """Медиана времени вызова func (после прогрева) и результат последнего вызова"""
+    result = func()
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', action='append', help='поисковый запрос (можно несколько раз)')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--size', default='', help='фильтр размера: less800 / more800')
+    parser.add_argument('--rating', default='', help='фильтр рейтинга, например "4,5"')
+    parser.add_argument('--area', default=SETTING_SEARCH_AREA_B, help='область поиска')
+    parser.add_argument('--page-size', type=int, default=20, help='книг на странице (MaxBooks)')
+    parser.add_argument('--runs', type=int, default=5, help='число повторов каждого замера')
+    args = parser.parse_args()
+
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+    page_size = args.page_size
+    search_args = {
+        'lang': args.lang,
+        'size_limit': args.size,
+        'rating_filter': args.rating,
+        'search_area': args.area,
+    }
+
+    for query in args.query or ['толстой', 'война мир', 'фантастика']:
+        eager_ms, books = timed(lambda: db.search_books(query, **search_args), args.runs)
+        pages_of_books = [books[i:i + page_size] for i in range(0, len(books), page_size)]
+
+        lazy_ms, (first_page, found_count) = timed(
+            lambda: db.search_books_page(query, **search_args, page_size=page_size, with_count=True), args.runs)
+
+        cursor = {'args': dict(search_args, query=query, series_id=0, author_id=0), 'page_size': page_size, 'after': {}}
+        next_ms = last_ms = 0.0
+        if len(first_page) == page_size:
+            last_book = first_page[-1]
+            cursor['after'][1] = (last_book.Relevance, last_book.FileName)
+            next_ms, _ = timed(lambda: db.search_books_page(
+                query, **search_args, page_size=page_size, after=cursor['after'][1]), args.runs)
+            last_page = (found_count - 1) // page_size
+            last_ms, _ = timed(lambda: db.search_books_page(
+                query, **search_args, page_size=page_size, offset=last_page * page_size), args.runs)
+
+        print(f"=== {query!r}: найдено {len(books)} (lazy: {found_count})")
+        print(f"  первая страница: eager={eager_ms:8.1f}ms lazy={lazy_ms:8.1f}ms")
+        print(f"  перелистывание lazy: следующая={next_ms:8.1f}ms последняя={last_ms:8.1f}ms")
+        print(f"  данные в сессии: eager={len(pickle.dumps(pages_of_books))} байт "
+              f"lazy={len(pickle.dumps(cursor))} байт")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Сравнение открытия соединения на каждый запрос и пула соединений DatabaseBooks.
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/bench_pool.py --query "толстой" --book-id 12345 --requests 200
+
+Для каждого режима (connect / pool) и уровня конкурентности (1, 8, 32)
+выполняются search_books и get_book_info, печатаются p50/p95/max латентности и RPS.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_case(db, method, args, concurrency, requests):
+    """Выполняет requests вызовов method при заданной конкурентности"""
+    def call():
+        started = time.perf_counter()
+        getattr(db, method)(*args)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(lambda _: call(), range(requests)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'max_ms': max(latencies) * 1000,
+        'rps': requests / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', default='толстой', help='поисковый запрос для search_books')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--book-id', type=int, required=True,
+                        help='BookID для get_book_info')
+    parser.add_argument('--requests', type=int, default=200, help='число вызовов на один замер')
+    parser.add_argument('--concurrency', default='1,8,32', help='уровни конкурентности через запятую')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    cases = [
+        ('search_books', (args.query, args.lang, '', '')),
+        ('get_book_info', (args.book_id,)),
+    ]
+
+    for mode in ('connect', 'pool'):
+        pool_size = max(levels) if mode == 'pool' else 0
+        db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': pool_size})
+        for method, method_args in cases:
+            # Прогрев (заполнение пула и буферов InnoDB)
+            run_case(db, method, method_args, 1, 3)
+            for level in levels:
+                res = run_case(db, method, method_args, level, args.requests)
+                print(f"{mode:8} {method:14} c={level:<3} "
+                      f"p50={res['p50_ms']:8.1f}ms p95={res['p95_ms']:8.1f}ms "
+                      f"max={res['max_ms']:8.1f}ms rps={res['rps']:7.1f}")
+        if mode == 'pool':
+            print(f"pool stats: {db.get_pool_stats()}")
+
+
+if __name__ == '__main__':
+    main()
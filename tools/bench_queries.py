@@ -0,0 +1,87 @@
+"""
+Замер времени запросов DatabaseBooks: search_books, search_series, search_authors
+и search_pop_books.
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/bench_queries.py --query "толстой" --query "война мир" --save before.json
+    ... обновление кода / схемы БД ...
+    python tools/bench_queries.py --query "толстой" --query "война мир" --compare before.json
+
+Каждый случай выполняется --runs раз на одном соединении (после прогрева),
+печатаются медиана и максимум. С --compare рядом выводится медиана из сохранённого
+замера и отношение before/after.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+
+# Периоды популярного: новинки, 7 дней, 30 дней, всё время
+POP_PERIODS = (0, 7, 30, 999)
+
+
+def build_cases(args):
+    cases = []
+    for query in args.query or ['толстой', 'война мир', 'фантастика']:
+        cases.append((f"search_books {query!r}", 'search_books', (query, args.lang, args.size, args.rating)))
+        cases.append((f"search_series {query!r}", 'search_series', (query, args.lang, args.size, args.rating)))
+        cases.append((f"search_authors {query!r}", 'search_authors', (query, args.lang, args.size, args.rating)))
+    for days in POP_PERIODS:
+        cases.append((f"search_pop_books days={days}", 'search_pop_books', (args.lang, args.size, args.rating, days)))
+    return cases
+
+
+def measure(db, method, method_args, runs):
+    getattr(db, method)(*method_args)  # прогрев
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        getattr(db, method)(*method_args)
+        latencies.append(time.perf_counter() - started)
+    return {
+        'p50_ms': statistics.median(latencies) * 1000,
+        'max_ms': max(latencies) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', action='append', help='поисковый запрос (можно несколько раз)')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--size', default='', help='фильтр размера: less800 / more800')
+    parser.add_argument('--rating', default='', help='фильтр рейтинга, например "4,5"')
+    parser.add_argument('--runs', type=int, default=5, help='число повторов каждого случая')
+    parser.add_argument('--save', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', help='сравнить с результатами из JSON')
+    args = parser.parse_args()
+
+    before = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            before = json.load(f)
+
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+    results = {}
+    for name, method, method_args in build_cases(args):
+        res = measure(db, method, method_args, args.runs)
+        results[name] = res
+
+        line = f"{name:40} p50={res['p50_ms']:9.1f}ms max={res['max_ms']:9.1f}ms"
+        if name in before:
+            prev = before[name]['p50_ms']
+            line += f"  before p50={prev:9.1f}ms  x{prev / res['p50_ms']:.1f}" if res['p50_ms'] else ""
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
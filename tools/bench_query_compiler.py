@@ -0,0 +1,87 @@
+"""
+Повтор самых частых поисковых запросов из UserLog: сырой текст пользователя против
+выражения компилятора запросов (search_query.compile_query).
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/bench_query_compiler.py --logs-db data/FlibustaLogs.sqlite --top 50 --runs 3
+
+Для каждого запроса печатаются размер множества кандидатов полнотекстового поиска
+(число совпадений MATCH без фильтров) и медиана латентности search_books для сырого
+текста и для скомпилированного выражения (строгого или, если оно ничего не нашло,
+нестрогого). В конце - суммарные значения и число различных запросов до и после
+приведения к каноническому ключу.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from constants import FLIBUSTA_DB_LOGS_PATH, SETTING_SEARCH_AREA_B  # noqa: E402
+from search_query import compile_query  # noqa: E402
+from bench_queries import measure  # noqa: E402
+
+# Detail поиска в логе: "<запрос>; count:<число найденных>"
+SQL_QUERY_TOP_SEARCHES = """
+    SELECT substr(Detail, 1, instr(Detail, '; count:') - 1) as SearchQuery, COUNT(*) as SearchCount
+    FROM UserLog
+    WHERE Action LIKE 'searched for%' AND instr(Detail, '; count:') > 1
+    GROUP BY SearchQuery
+    ORDER BY SearchCount DESC
+    LIMIT ?
+"""
+
+
+def count_candidates(db, expression, search_area):
+    sql_query, params = DatabaseBooks.build_count_books(expression, '', '', None, search_area)
+    return db._fetchone(sql_query, params)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logs-db', default=FLIBUSTA_DB_LOGS_PATH, help='путь к SQLite с UserLog')
+    parser.add_argument('--top', type=int, default=50, help='число самых частых запросов')
+    parser.add_argument('--area', default=SETTING_SEARCH_AREA_B, help='область поиска')
+    parser.add_argument('--runs', type=int, default=3, help='число повторов каждого запроса')
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.logs_db) as conn:
+        top_searches = conn.execute(SQL_QUERY_TOP_SEARCHES, (args.top,)).fetchall()
+
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+    totals = {'raw_candidates': 0, 'compiled_candidates': 0, 'raw_ms': 0.0, 'compiled_ms': 0.0}
+    keys = set()
+
+    for query_text, search_count in top_searches:
+        compiled = compile_query(query_text)
+        keys.add(compiled.key)
+
+        expression = compiled.strict
+        compiled_candidates = count_candidates(db, expression, args.area)
+        if not compiled_candidates and len(compiled.terms) > 1:
+            expression = compiled.loose
+            compiled_candidates = count_candidates(db, expression, args.area)
+        raw_candidates = count_candidates(db, query_text, args.area)
+
+        raw_ms = measure(db, 'search_books', (query_text, '', '', '', args.area), args.runs)['p50_ms']
+        compiled_ms = measure(db, 'search_books', (expression, '', '', '', args.area), args.runs)['p50_ms']
+
+        totals['raw_candidates'] += raw_candidates
+        totals['compiled_candidates'] += compiled_candidates
+        totals['raw_ms'] += raw_ms
+        totals['compiled_ms'] += compiled_ms
+
+        print(f"{query_text[:40]!r:44} x{search_count:<5} -> {expression!r}")
+        print(f"    кандидатов {raw_candidates:8} -> {compiled_candidates:8}   "
+              f"p50 {raw_ms:9.1f}ms -> {compiled_ms:9.1f}ms")
+
+    print(f"\nИтого по {len(top_searches)} запросам:")
+    print(f"  кандидатов {totals['raw_candidates']} -> {totals['compiled_candidates']}")
+    print(f"  сумма p50 {totals['raw_ms']:.1f}ms -> {totals['compiled_ms']:.1f}ms")
+    print(f"  различных запросов {len(top_searches)} -> различных ключей {len(keys)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Нагрузочный замер DatabaseBooks на смеси запросов: search_books, search_series, search_authors,
+search_pop_books / search_pop_series / search_pop_authors, get_book_info и get_author_info.
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/bench_search_suite.py --logs-db data/FlibustaLogs.sqlite --concurrency 8 --save before.json
+    ... оптимизация ...
+    python tools/bench_search_suite.py --logs-db data/FlibustaLogs.sqlite --concurrency 8 --compare before.json
+
+Смесь запросов - из истории UserLog (--logs-db: поиски книг, серий и авторов и показы популярного
+с их частотами) или из файла (--mix-file, строки "метод<TAB>запрос или дни[<TAB>вес]", # - комментарий).
+Доли get_book_info и get_author_info задаются отдельно, идентификаторы - случайные из каталога.
+
+Запросы выбираются из смеси по весам и выполняются --requests раз в --concurrency потоков.
+По каждому методу печатаются p50/p95/p99/max латентности, пропускная способность и
+(с --rows-samples > 0) число прочитанных строк на вызов - прирост Handler_read_* сервера
+при отдельном последовательном прогоне метода (сервер не должен быть занят другими запросами).
+Результаты сохраняются в JSON (--save), с --compare рядом выводятся значения прежнего замера.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS, LEADERBOARD_BOARDS  # noqa: E402
+from constants import FLIBUSTA_DB_LOGS_PATH, SETTING_SEARCH_AREA_B  # noqa: E402
+from search_query import compile_query  # noqa: E402
+
+SEARCH_METHODS = ('search_books', 'search_series', 'search_authors')
+POP_METHODS = ('search_pop_books', 'search_pop_series', 'search_pop_authors')
+
+# Поиски и показы популярного из UserLog: действие, текст запроса или период, число повторов
+SQL_QUERY_LOGGED_SEARCHES = """
+    SELECT Action, Detail, COUNT(*) as SearchCount
+    FROM UserLog
+    WHERE (Action LIKE 'searched for %' AND Action NOT LIKE '%in group%' AND instr(Detail, '; count:') > 1)
+       OR Action = 'show populars'
+    GROUP BY Action, Detail
+    ORDER BY SearchCount DESC
+    LIMIT ?
+"""
+
+SQL_QUERY_RANDOM_BOOKS = "SELECT BookID FROM libbook_search ORDER BY RAND() LIMIT %s"
+SQL_QUERY_RANDOM_AUTHORS = "SELECT AvtorID FROM libavtor_search ORDER BY RAND() LIMIT %s"
+
+SQL_QUERY_HANDLER_READS = "SHOW GLOBAL STATUS LIKE 'Handler_read%'"
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def logged_method(action):
+    """Метод DatabaseBooks по действию UserLog"""
+    for method, prefix in (('search_books', 'searched for books'), ('search_series', 'searched for series'),
+                           ('search_authors', 'searched for authors')):
+        if action.startswith(prefix):
+            return method
+    return 'search_pop_books' if action == 'show populars' else None
+
+
+def load_logged_mix(logs_db, top):
+    """Смесь [(метод, аргумент, вес)] из истории UserLog"""
+    with sqlite3.connect(logs_db) as conn:
+        rows = conn.execute(SQL_QUERY_LOGGED_SEARCHES, (top,)).fetchall()
+    mix = []
+    for action, detail, count in rows:
+        method = logged_method(action)
+        if method == 'search_pop_books':
+            days = detail.removeprefix('show_pop_')
+            if days.isdigit():
+                mix.append((method, int(days), count))
+        elif method and compile_query(detail[:detail.index('; count:')]).terms:
+            mix.append((method, detail[:detail.index('; count:')], count))
+    return mix
+
+
+def load_file_mix(path):
+    """Смесь [(метод, аргумент, вес)] из файла"""
+    mix = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            parts = line.split('\t')
+            method, argument = parts[0].strip(), parts[1]
+            weight = float(parts[2]) if len(parts) > 2 else 1.0
+            mix.append((method, int(argument) if method in POP_METHODS else argument, weight))
+    return mix
+
+
+def default_mix():
+    mix = [(method, query, 1.0) for query in ('толстой', 'война мир', 'фантастика') for method in SEARCH_METHODS]
+    mix += [(method, days, 1.0) for days in LEADERBOARD_BOARDS for method in POP_METHODS]
+    return mix
+
+
+def make_call(db, args, method, argument):
+    """Вызов метода DatabaseBooks с фильтрами из аргументов замера"""
+    if method in SEARCH_METHODS:
+        expression = compile_query(argument).strict
+        return lambda: getattr(db, method)(expression, args.lang, args.size, args.rating, search_area=args.area)
+    if method in POP_METHODS:
+        return lambda: getattr(db, method)(args.lang, args.size, args.rating, argument)
+    return lambda: getattr(db, method)(argument)
+
+
+def build_workload(db, args, mix):
+    """Последовательность --requests вызовов [(метод, функция)] по весам смеси и долям get_*_info"""
+    rnd = random.Random(args.seed)
+    info_shares = {'get_book_info': args.book_info_share, 'get_author_info': args.author_info_share}
+    ids = {
+        'get_book_info': [row[0] for row in db._fetchall(SQL_QUERY_RANDOM_BOOKS, (args.sample_ids,))],
+        'get_author_info': [row[0] for row in db._fetchall(SQL_QUERY_RANDOM_AUTHORS, (args.sample_ids,))],
+    }
+    weights = [weight for _, _, weight in mix]
+
+    workload = []
+    for _ in range(args.requests):
+        point = rnd.random()
+        for method, share in info_shares.items():
+            if point < share and ids[method]:
+                argument = rnd.choice(ids[method])
+                break
+            point -= share
+        else:
+            method, argument, _ = rnd.choices(mix, weights)[0]
+        workload.append((method, make_call(db, args, method, argument)))
+    return workload
+
+
+def run_workload(workload, concurrency):
+    """Выполняет вызовы в concurrency потоках: {метод: [латентности]}, {метод: ошибки}, общее время"""
+    def timed(item):
+        method, call = item
+        started = time.perf_counter()
+        try:
+            call()
+            return method, time.perf_counter() - started, None
+        except Exception as e:
+            return method, time.perf_counter() - started, e
+
+    latencies, errors = {}, {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for method, latency, error in executor.map(timed, workload):
+            if error is None:
+                latencies.setdefault(method, []).append(latency)
+            else:
+                errors[method] = errors.get(method, 0) + 1
+                print(f"{method}: {error}")
+    return latencies, errors, time.perf_counter() - started
+
+
+def handler_reads(db):
+    return sum(int(value) for _, value in db._fetchall(SQL_QUERY_HANDLER_READS))
+
+
+def rows_per_call(db, workload, samples):
+    """{метод: строк, прочитанных сервером на вызов} по samples последовательным вызовам метода"""
+    by_method = {}
+    for method, call in workload:
+        by_method.setdefault(method, [])
+        if len(by_method[method]) < samples:
+            by_method[method].append(call)
+
+    rows = {}
+    for method, calls in by_method.items():
+        before = handler_reads(db)
+        for call in calls:
+            call()
+        rows[method] = (handler_reads(db) - before) / len(calls)
+    return rows
+
+
+def summarize(latencies, errors, elapsed, rows):
+    results = {}
+    for method in sorted(set(latencies) | set(errors)):
+        values = latencies.get(method, [])
+        results[method] = {
+            'calls': len(values),
+            'errors': errors.get(method, 0),
+            'p50_ms': statistics.median(values) * 1000 if values else 0.0,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': max(values, default=0.0) * 1000,
+            'rps': len(values) / elapsed,
+            'rows_per_call': rows.get(method),
+        }
+    all_values = [value for values in latencies.values() for value in values]
+    results['total'] = {
+        'calls': len(all_values),
+        'errors': sum(errors.values()),
+        'p50_ms': statistics.median(all_values) * 1000 if all_values else 0.0,
+        'p95_ms': percentile(all_values, 95) * 1000,
+        'p99_ms': percentile(all_values, 99) * 1000,
+        'max_ms': max(all_values, default=0.0) * 1000,
+        'rps': len(all_values) / elapsed,
+        'rows_per_call': None,
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logs-db', help=f'смесь из UserLog (например {FLIBUSTA_DB_LOGS_PATH})')
+    parser.add_argument('--mix-file', help='смесь из файла')
+    parser.add_argument('--top', type=int, default=500, help='число самых частых запросов из UserLog')
+    parser.add_argument('--book-info-share', type=float, default=0.15, help='доля вызовов get_book_info')
+    parser.add_argument('--author-info-share', type=float, default=0.05, help='доля вызовов get_author_info')
+    parser.add_argument('--sample-ids', type=int, default=1000, help='число случайных книг и авторов для get_*_info')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--size', default='', help='фильтр размера: less800 / more800')
+    parser.add_argument('--rating', default='', help='фильтр рейтинга, например "4,5"')
+    parser.add_argument('--area', default=SETTING_SEARCH_AREA_B, help='область поиска')
+    parser.add_argument('--requests', type=int, default=1000, help='число вызовов')
+    parser.add_argument('--concurrency', type=int, default=8, help='число параллельных потоков')
+    parser.add_argument('--rows-samples', type=int, default=10,
+                        help='вызовов каждого метода для подсчёта прочитанных строк (0 - не считать)')
+    parser.add_argument('--seed', type=int, default=1, help='начальное значение выбора запросов')
+    parser.add_argument('--save', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', help='сравнить с результатами из JSON')
+    args = parser.parse_args()
+
+    if args.mix_file:
+        mix = load_file_mix(args.mix_file)
+    elif args.logs_db:
+        mix = load_logged_mix(args.logs_db, args.top)
+    else:
+        mix = default_mix()
+
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': args.concurrency + 1})
+    workload = build_workload(db, args, mix)
+
+    # Прогрев: по одному вызову каждого метода, заполнение пула соединений
+    for method in {method for method, _ in workload}:
+        next(call for name, call in workload if name == method)()
+
+    latencies, errors, elapsed = run_workload(workload, args.concurrency)
+    rows = rows_per_call(db, workload, args.rows_samples) if args.rows_samples > 0 else {}
+    results = summarize(latencies, errors, elapsed, rows)
+
+    before = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            before = json.load(f).get('methods', {})
+
+    print(f"Смесь: {len(mix)} запросов, вызовов {args.requests}, потоков {args.concurrency}, {elapsed:.1f} с")
+    for method, res in results.items():
+        rows_text = f" rows={res['rows_per_call']:10.0f}" if res['rows_per_call'] is not None else ''
+        print(f"{method:20} n={res['calls']:<6} err={res['errors']:<3} p50={res['p50_ms']:8.1f}ms "
+              f"p95={res['p95_ms']:8.1f}ms p99={res['p99_ms']:8.1f}ms max={res['max_ms']:8.1f}ms "
+              f"rps={res['rps']:7.1f}{rows_text}")
+        if method in before:
+            prev = before[method]
+            print(f"{'  before':20} n={prev['calls']:<6} err={prev['errors']:<3} p50={prev['p50_ms']:8.1f}ms "
+                  f"p95={prev['p95_ms']:8.1f}ms p99={prev['p99_ms']:8.1f}ms max={prev['max_ms']:8.1f}ms "
+                  f"rps={prev['rps']:7.1f}")
+
+    if args.save:
+        meta = {key: value for key, value in vars(args).items() if key not in ('save', 'compare')}
+        meta['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'methods': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
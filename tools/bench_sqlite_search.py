@@ -0,0 +1,82 @@
+"""
+Латентность и память поиска по индексу SQLite FTS5 (SEARCH_BACKEND=sqlite) против MariaDB.
+
+Запуск (переменные окружения DB_* как у бота, индекс построен tools/build_sqlite_index.py):
+    python tools/bench_sqlite_search.py --query "толстой" --query "война мир" --runs 5
+
+Для каждого случая (вид поиска, область, запрос) печатаются медиана и максимум латентности
+обоих бэкендов. Память процесса (RSS из /proc/self/status) выводится до открытия индекса
+и после всех замеров: RssFile - страницы файла индекса, отображённого в память
+(общие для всех процессов бота), RssAnon - собственная память процесса.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from constants import SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA  # noqa: E402
+from search_query import compile_query  # noqa: E402
+from search_sqlite import SqliteSearchBooks, SQLITE_SEARCH_PATH  # noqa: E402
+from bench_queries import measure  # noqa: E402
+
+METHODS = ('search_books', 'search_series', 'search_authors')
+AREAS = (SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA)
+
+
+def read_rss():
+    """RSS процесса в МБ: {'VmRSS': .., 'RssAnon': .., 'RssFile': ..} (пусто вне Linux)"""
+    rss = {}
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in ('VmRSS', 'RssAnon', 'RssFile'):
+                    rss[name] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return rss
+
+
+def format_rss(rss):
+    return ' '.join(f"{name}={value:.1f}МБ" for name, value in rss.items()) or 'н/д'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', action='append', help='поисковый запрос (можно несколько раз)')
+    parser.add_argument('--index', default=SQLITE_SEARCH_PATH, help='файл индекса SQLite')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--size', default='', help='фильтр размера: less800 / more800')
+    parser.add_argument('--rating', default='', help='фильтр рейтинга, например "4,5"')
+    parser.add_argument('--runs', type=int, default=5, help='число повторов каждого случая')
+    args = parser.parse_args()
+
+    print(f"Память до открытия индекса: {format_rss(read_rss())}")
+    print(f"Размер индекса: {os.path.getsize(args.index) / 1024 ** 2:.1f} МБ")
+
+    backends = {
+        'mariadb': DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1}),
+        'sqlite': SqliteSearchBooks(args.index),
+    }
+    totals = dict.fromkeys(backends, 0.0)
+
+    for query_text in args.query or ['толстой', 'война мир', 'фантастика']:
+        expression = compile_query(query_text).strict
+        for area in AREAS:
+            for method in METHODS:
+                search_args = (expression, args.lang, args.size, args.rating, area)
+                line = f"{method:15} {area:3} {query_text[:24]!r:28}"
+                for name, db in backends.items():
+                    res = measure(db, method, search_args, args.runs)
+                    totals[name] += res['p50_ms']
+                    line += f" {name} p50={res['p50_ms']:8.1f}ms max={res['max_ms']:8.1f}ms"
+                print(line)
+
+    print("\nСумма p50: " + ' '.join(f"{name}={total:.1f}ms" for name, total in totals.items()))
+    print(f"Память после замеров: {format_rss(read_rss())}")
+
+
+if __name__ == '__main__':
+    main()
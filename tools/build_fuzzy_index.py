@@ -0,0 +1,107 @@
+"""
+Построение триграммного индекса слов для подсказок "Возможно, вы имели в виду"
+(таблицы lib_fuzzy_words и lib_fuzzy_trigrams, db_init/zz_38_create_fuzzy.sql).
+
+Запуск после импорта базы (db_init) и заполнения таблиц поиска (переменные окружения DB_* как у бота):
+    python tools/build_fuzzy_index.py
+
+Словарь - нормализованные слова (как в search_query: регистр, ё -> е) из названий книг,
+имён авторов и названий серий длиной от 4 букв. С --min-freq редкие слова не попадают в индекс.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from search_fuzzy import FUZZY_KIND_TITLE, FUZZY_KIND_AUTHOR, FUZZY_KIND_SERIES, fuzzy_words, trigrams  # noqa: E402
+
+BATCH_SIZE = 10000
+
+# Источники слов: (вид слова, запрос текста)
+SOURCES = [
+    (FUZZY_KIND_TITLE, "SELECT Title FROM libbook_search"),
+    (FUZZY_KIND_AUTHOR, "SELECT AuthorName FROM libavtor_search"),
+    (FUZZY_KIND_SERIES, "SELECT SeriesTitle FROM libseq_search"),
+]
+
+SQL_INSERT_WORD = "INSERT INTO lib_fuzzy_words (WordID, Word, Kinds, TrigramCount, Freq) VALUES (%s, %s, %s, %s, %s)"
+SQL_INSERT_TRIGRAM = "INSERT INTO lib_fuzzy_trigrams (Trigram, Len, WordID) VALUES (%s, %s, %s)"
+
+
+def stream_texts(db, sql_query):
+    """Тексты запроса к MariaDB порциями, без загрузки всей таблицы в память"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql_query)
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0]
+
+
+def collect_words(db):
+    """Словарь {слово: [виды, частота]} по всем источникам"""
+    words = {}
+    for kind, sql_query in SOURCES:
+        for text in stream_texts(db, sql_query):
+            for word in fuzzy_words(text):
+                entry = words.setdefault(word, [0, 0])
+                entry[0] |= kind
+                entry[1] += 1
+    return words
+
+
+def insert_batches(cursor, sql_insert, rows):
+    """Вставляет строки порциями, возвращает их число"""
+    count = 0
+    while batch := list(itertools.islice(rows, BATCH_SIZE)):
+        cursor.executemany(sql_insert, batch)
+        count += len(batch)
+    return count
+
+
+def build_fuzzy_index(db, min_freq=1):
+    """Перестраивает lib_fuzzy_words и lib_fuzzy_trigrams базы db"""
+    started = time.perf_counter()
+
+    words = collect_words(db)
+    vocabulary = sorted((word, kinds, freq) for word, (kinds, freq) in words.items() if freq >= min_freq)
+    print(f"Слов в каталоге {len(words)}, в индексе {len(vocabulary)}")
+
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("TRUNCATE TABLE lib_fuzzy_trigrams")
+        cursor.execute("TRUNCATE TABLE lib_fuzzy_words")
+
+        words_count = insert_batches(cursor, SQL_INSERT_WORD, (
+            (word_id, word, kinds, len(trigrams(word)), freq)
+            for word_id, (word, kinds, freq) in enumerate(vocabulary, start=1)
+        ))
+        trigrams_count = insert_batches(cursor, SQL_INSERT_TRIGRAM, (
+            (trigram, len(word), word_id)
+            for word_id, (word, _, _) in enumerate(vocabulary, start=1)
+            for trigram in trigrams(word)
+        ))
+        conn.commit()
+
+    print(f"lib_fuzzy_words    {words_count:10} строк")
+    print(f"lib_fuzzy_trigrams {trigrams_count:10} строк")
+    print(f"Готово за {time.perf_counter() - started:.0f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--min-freq', type=int, default=1, help='минимальное число вхождений слова в каталоге')
+    args = parser.parse_args()
+
+    build_fuzzy_index(DatabaseBooks(DB_BOOKS.db_config), args.min_freq)
+
+
+if __name__ == '__main__':
+    main()
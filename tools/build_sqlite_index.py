@@ -0,0 +1,134 @@
+"""
+Построение индекса SQLite FTS5 для поиска по каталогу (SEARCH_BACKEND=sqlite) из таблиц MariaDB.
+
+Запуск после импорта базы (db_init) и заполнения таблиц поиска (переменные окружения DB_* как у бота):
+    python tools/build_sqlite_index.py --output data/FlibustaSearch.sqlite
+
+Индекс собирается во временном файле рядом с --output и заменяет его атомарно:
+запущенные боты продолжают читать прежний файл до проверки обновления библиотеки.
+Рейтинг книг (фильтр рейтинга) берётся на момент построения.
+"""
+import argparse
+import itertools
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from search_sqlite import SQLITE_SCHEMA, SQLITE_INDEXES, SQLITE_SEARCH_PATH, normalize_text  # noqa: E402
+
+BATCH_SIZE = 10000
+
+# Таблицы, копируемые как есть: (таблица SQLite, запрос в MariaDB с теми же столбцами)
+COPY_TABLES = [
+    ("libbook_search", """
+        SELECT BookID, SearchLang, Title, BookSize, SearchYear, BookSizeCat, AuthorID,
+               LastName, FirstName, MiddleName, Genre, SeriesID, SeriesTitle, LibRate
+        FROM libbook_search"""),
+    ("libavtor", "SELECT a.BookID, a.AvtorID FROM libavtor a JOIN libbook_search bs ON bs.BookID = a.BookID"),
+    ("libseq", "SELECT s.BookID, s.SeqID, s.SeqNumb FROM libseq s JOIN libbook_search bs ON bs.BookID = s.BookID"),
+    ("libseqname", "SELECT SeqID, SeqName FROM libseqname"),
+    ("libavtor_search", "SELECT AvtorID, AuthorName FROM libavtor_search"),
+    ("libavtor_stats", "SELECT AvtorID, SearchLang, BookSizeCat, LibRate, BookCount FROM libavtor_stats"),
+    ("libseq_search", "SELECT SeqID, SeriesTitle, AuthorName, RateAvg FROM libseq_search"),
+    ("libseq_stats", "SELECT SeqID, SearchLang, BookSizeCat, LibRate, BookCount FROM libseq_stats"),
+]
+
+# Полнотекстовые индексы без хранения текста: (таблица FTS5, столбец, запрос (id, текст) по возрастанию id).
+# Несколько строк с одним id (аннотации) объединяются в одну строку индекса
+FTS_TABLES = [
+    ("libbook_fts", "FT", "SELECT BookId, FT FROM libbook_fts ORDER BY BookId"),
+    ("libbannotations_fts", "Body",
+     "SELECT ba.BookID, ba.Body FROM libbannotations ba JOIN libbook_search bs ON bs.BookID = ba.BookID ORDER BY ba.BookID"),
+    ("libaannotations_fts", "Body", "SELECT AvtorId, Body FROM libaannotations ORDER BY AvtorId"),
+    ("libavtor_search_fts", "AuthorName", "SELECT AvtorID, SearchName FROM libavtor_search ORDER BY AvtorID"),
+    ("libseq_search_fts", "SeriesText",
+     "SELECT SeqID, CONCAT_WS(' ', SeriesTitle, AuthorName) FROM libseq_search ORDER BY SeqID"),
+]
+
+
+def stream_rows(db, sql_query):
+    """Строки запроса к MariaDB порциями, без загрузки всей таблицы в память"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql_query)
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+
+
+def insert_batches(target, sql_insert, rows):
+    """Вставляет строки в SQLite порциями, возвращает их число"""
+    count = 0
+    while batch := list(itertools.islice(rows, BATCH_SIZE)):
+        target.executemany(sql_insert, batch)
+        count += len(batch)
+    return count
+
+
+def copy_table(db, target, table, sql_query):
+    rows = stream_rows(db, sql_query)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    placeholders = ', '.join(['?'] * len(first))
+    return insert_batches(target, f"INSERT OR IGNORE INTO {table} VALUES ({placeholders})",
+                          itertools.chain([first], rows))
+
+
+def fill_fts(db, target, fts_table, column, sql_query):
+    documents = (
+        (row_id, normalize_text(' '.join(text or '' for _, text in group)))
+        for row_id, group in itertools.groupby(stream_rows(db, sql_query), key=lambda row: row[0])
+    )
+    return insert_batches(target, f"INSERT INTO {fts_table} (rowid, {column}) VALUES (?, ?)", documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=SQLITE_SEARCH_PATH, help='файл индекса')
+    args = parser.parse_args()
+
+    db = DatabaseBooks(DB_BOOKS.db_config)
+    tmp_path = f"{args.output}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    started = time.perf_counter()
+    target = sqlite3.connect(tmp_path)
+    target.execute("PRAGMA journal_mode = OFF")
+    target.execute("PRAGMA synchronous = OFF")
+    target.executescript(SQLITE_SCHEMA)
+
+    for table, sql_query in COPY_TABLES:
+        print(f"{table:24} {copy_table(db, target, table, sql_query):10} строк")
+    for fts_table, column, sql_query in FTS_TABLES:
+        print(f"{fts_table:24} {fill_fts(db, target, fts_table, column, sql_query):10} строк")
+
+    # Версия библиотеки, из которой построен индекс
+    version = db._fetchone("SELECT ContentVersion FROM library_meta WHERE ID = 1")
+    target.executemany("INSERT INTO search_index_meta VALUES (?, ?)", [
+        ('ContentVersion', version[0] if version else ''),
+        ('BuiltAt', time.strftime('%Y-%m-%d %H:%M:%S')),
+    ])
+
+    target.executescript(SQLITE_INDEXES)
+    for fts_table, _, _ in FTS_TABLES:
+        target.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('optimize')")
+    target.commit()
+    target.execute("ANALYZE")
+    target.execute("VACUUM")
+    target.close()
+
+    os.replace(tmp_path, args.output)
+    print(f"Индекс {args.output}: {os.path.getsize(args.output) / 1024 ** 2:.1f} МБ "
+          f"за {time.perf_counter() - started:.0f} с")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Проверка планов запросов DatabaseBooks: EXPLAIN FORMAT=JSON (или ANALYZE FORMAT=JSON) по всем
+шаблонам запросов database.py с типичными параметрами, базовые планы и поиск регрессий,
+подсказки составных индексов для libavtor, libseq, libgenre и librate.
+
+Запуск (переменные окружения DB_* как у бота):
+    python tools/check_query_plans.py --save plans.json
+    ... изменение запросов / схемы БД ...
+    python tools/check_query_plans.py --compare plans.json
+
+Без --compare печатаются все находки: полный просмотр таблиц, сортировка (filesort) и
+временные таблицы на больших числах строк (--large-rows). С --compare - только новые
+относительно базовых планов, а также смена индекса и рост числа строк больше --growth раз;
+при регрессиях код возврата 1. С --analyze запросы выполняются (ANALYZE), и вместо оценки
+числа строк используется фактическое.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS, LEADERBOARD_BOARDS, SQL_QUERY_PARENT_GENRES_COUNT, \
+    SQL_QUERY_CHILDREN_GENRES_COUNT, SQL_QUERY_LANGS, SQL_QUERY_LIBRARY_META, SQL_QUERY_LIBRARY_VERSION, \
+    SQL_QUERY_LIBRARY_STATS, SQL_QUERY_LIBRARY_COUNTS, SQL_QUERY_BOOK_INFO, SQL_QUERY_BOOK_DETAILS, \
+    SQL_QUERY_BOOK_AUTHORS_ID, SQL_QUERY_AUTHOR_NAME, SQL_QUERY_AUTHOR_PHOTO, SQL_QUERY_AUTHOR_ANNOTATION, \
+    SQL_QUERY_BOOK_REVIEWS, SQL_QUERY_FUZZY_CANDIDATES  # noqa: E402
+from constants import SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA  # noqa: E402
+from search_fuzzy import FUZZY_KINDS_BOOKS, trigrams  # noqa: E402
+from search_query import compile_query  # noqa: E402
+from legacy_search import build_sql_where_ft, build_sql_query_books  # noqa: E402
+
+# Таблицы, для которых подбираются составные индексы
+ADVISE_TABLES = ('libavtor', 'libseq', 'libgenre', 'librate')
+
+# Типичные значения параметров: последние добавленные книга, автор и серия, первый раздел жанров
+SQL_QUERY_SAMPLE_IDS = """
+    SELECT
+        (SELECT MAX(BookID) FROM libbook_search),
+        (SELECT MAX(AvtorID) FROM libavtor_search),
+        (SELECT MAX(SeqID) FROM libseq_search),
+        (SELECT MIN(GenreMeta) FROM libgenre_stats)
+"""
+
+# Таблица и псевдоним в FROM / JOIN
+TABLE_ALIAS_RE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|INNER\b|CROSS\b|GROUP\b|ORDER\b|LIMIT\b|HAVING\b|UNION\b)(\w+))?',
+                            re.IGNORECASE)
+
+
+def build_cases(db, args):
+    """[(имя случая, запрос, параметры)] по всем шаблонам запросов"""
+    book_id, author_id, series_id, genre_meta = db._fetchone(SQL_QUERY_SAMPLE_IDS)
+    current_date = db.lib_last_update
+    compiled = compile_query(args.query)
+    expression = compiled.strict
+    lang, size, rating = args.lang, args.size, args.rating
+
+    cases = []
+    for area in (SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA):
+        filters = (expression, lang, size, rating, area)
+        cases += [
+            (f"search_books area={area}", *DatabaseBooks.build_search_books(*filters)),
+            (f"search_books_page area={area}", *DatabaseBooks.build_search_books_page(*filters, page_size=20)),
+            (f"search_books_page after area={area}",
+             *DatabaseBooks.build_search_books_page(*filters, page_size=20, after=(1.0, book_id))),
+            (f"count_books area={area}", *DatabaseBooks.build_count_books(*filters)),
+            (f"search_series area={area}", *DatabaseBooks.build_search_series(*filters)),
+            (f"search_authors area={area}", *DatabaseBooks.build_search_authors(*filters)),
+        ]
+    cases += [
+        ("search_books series", *DatabaseBooks.build_search_books('', lang, size, rating, series_id=series_id)),
+        ("search_books author", *DatabaseBooks.build_search_books('', lang, size, rating, author_id=author_id)),
+        # Прежний поиск по BASE_JOINS
+        ("search_books base_joins",
+         build_sql_query_books(build_sql_where_ft(lang, size, rating)), [expression] * 2),
+    ]
+
+    # Популярное: по исходным таблицам и по готовым спискам book_leaderboard
+    leaderboard_version = DatabaseBooks._class_leaderboard_version
+    try:
+        for source, version in (('live', None), ('leaderboard', 'check_query_plans')):
+            DatabaseBooks._class_leaderboard_version = version
+            for days in LEADERBOARD_BOARDS:
+                pop_args = (lang, size, rating, days, current_date)
+                cases += [
+                    (f"search_pop_books {source} days={days}", *DatabaseBooks.build_search_pop_books(*pop_args)),
+                    (f"search_pop_series {source} days={days}", *DatabaseBooks.build_search_pop_series(*pop_args)),
+                    (f"search_pop_authors {source} days={days}", *DatabaseBooks.build_search_pop_authors(*pop_args)),
+                ]
+    finally:
+        DatabaseBooks._class_leaderboard_version = leaderboard_version
+
+    lang_param = (lang or '').upper()
+    word = compiled.terms[0] if compiled.terms else 'толстой'
+    word_trigrams = sorted(trigrams(word))
+    cases += [
+        ("parent_genres", SQL_QUERY_PARENT_GENRES_COUNT, (lang_param, lang_param)),
+        ("children_genres", SQL_QUERY_CHILDREN_GENRES_COUNT, (genre_meta, lang_param, lang_param)),
+        ("langs", SQL_QUERY_LANGS, None),
+        ("library_meta", SQL_QUERY_LIBRARY_META, None),
+        ("library_version", SQL_QUERY_LIBRARY_VERSION, None),
+        ("library_stats", SQL_QUERY_LIBRARY_STATS, None),
+        ("library_counts", SQL_QUERY_LIBRARY_COUNTS, None),
+        ("book_info", SQL_QUERY_BOOK_INFO, (book_id,)),
+        ("book_details", SQL_QUERY_BOOK_DETAILS, (book_id,)),
+        ("book_authors_id", SQL_QUERY_BOOK_AUTHORS_ID, (book_id,)),
+        ("author_name", SQL_QUERY_AUTHOR_NAME, (author_id,)),
+        ("author_photo", SQL_QUERY_AUTHOR_PHOTO, (author_id,)),
+        ("author_annotation", SQL_QUERY_AUTHOR_ANNOTATION, (author_id,)),
+        ("book_reviews", SQL_QUERY_BOOK_REVIEWS, (book_id,)),
+        ("fuzzy_candidates",
+         SQL_QUERY_FUZZY_CANDIDATES.format(placeholders=', '.join(['%s'] * len(word_trigrams))),
+         (*word_trigrams, len(word) - 2, len(word) + 2, FUZZY_KINDS_BOOKS, 1, 50)),
+    ]
+    return cases
+
+
+def explain(cursor, sql_query, params, analyze):
+    """План запроса в виде JSON"""
+    statement = 'ANALYZE' if analyze else 'EXPLAIN'
+    cursor.execute(f"{statement} FORMAT=JSON {sql_query.strip().rstrip(';')}", params)
+    return json.loads(cursor.fetchone()[0])
+
+
+def table_rows(node):
+    """Фактическое (ANALYZE) или оценочное число строк таблицы плана"""
+    return node.get('r_rows', node.get('rows')) or 0
+
+
+def walk_plan(node, tables, sorts, temporary):
+    """Собирает из плана таблицы, сортировки (с числом строк) и временные таблицы"""
+    if isinstance(node, list):
+        for item in node:
+            walk_plan(item, tables, sorts, temporary)
+        return
+    if not isinstance(node, dict):
+        return
+    for key, value in node.items():
+        if key == 'table' and isinstance(value, dict) and 'table_name' in value:
+            tables.append(value)
+        elif key == 'filesort':
+            sub_tables = []
+            walk_plan(value, sub_tables, [], [])
+            sorts.append(max((table_rows(table) for table in sub_tables), default=0))
+        elif key in ('temporary_table', 'using_temporary_table') and value:
+            temporary.append(key)
+        walk_plan(value, tables, sorts, temporary)
+
+
+def summarize(plan):
+    """Сводка плана: доступ к таблицам, сортировки и временные таблицы"""
+    tables, sorts, temporary = [], [], []
+    walk_plan(plan, tables, sorts, temporary)
+    return {
+        'tables': [{
+            'table': table['table_name'],
+            'access_type': table.get('access_type'),
+            'key': table.get('key'),
+            'rows': table_rows(table),
+            'covering': bool(table.get('using_index')),
+            'ref': table.get('ref'),
+            'used_key_parts': table.get('used_key_parts'),
+            'condition': table.get('attached_condition'),
+        } for table in tables],
+        'filesort_rows': sorts,
+        'temporary': len(temporary),
+    }
+
+
+def find_issues(summary, large_rows):
+    """Находки плана: {(вид, таблица): описание}"""
+    issues = {}
+    for table in summary['tables']:
+        if table['access_type'] == 'ALL' and table['rows'] >= large_rows:
+            issues[('full_scan', table['table'])] = f"полный просмотр {table['table']} ({table['rows']} строк)"
+    sort_rows = max(summary['filesort_rows'], default=0)
+    if sort_rows >= large_rows:
+        issues[('filesort', '')] = f"filesort по {sort_rows} строкам"
+    if summary['temporary']:
+        issues[('temporary', '')] = f"временных таблиц: {summary['temporary']}"
+    return issues
+
+
+def compare(summary, baseline, large_rows, growth):
+    """Регрессии плана относительно базового: новые находки, смена индекса, рост числа строк"""
+    baseline_issues = find_issues(baseline, large_rows)
+    regressions = [text for key, text in find_issues(summary, large_rows).items() if key not in baseline_issues]
+    before = {table['table']: table for table in baseline['tables']}
+    for table in summary['tables']:
+        prev = before.get(table['table'])
+        if prev is None:
+            continue
+        if table['key'] != prev['key']:
+            regressions.append(f"{table['table']}: индекс {prev['key']} -> {table['key']}")
+        if table['rows'] > max(prev['rows'], 1) * growth and table['rows'] >= large_rows:
+            regressions.append(f"{table['table']}: строк {prev['rows']} -> {table['rows']}")
+    return regressions
+
+
+def table_aliases(sql_query):
+    """{псевдоним: таблица} из FROM и JOIN запроса"""
+    return {(alias or table): table for table, alias in TABLE_ALIAS_RE.findall(sql_query)}
+
+
+def condition_columns(condition, alias):
+    """Столбцы таблицы alias в условии: сначала из равенств, затем остальные"""
+    if not condition:
+        return []
+    column_re = rf'`?\b{re.escape(alias)}`?\.`?(\w+)`?'
+    equal = re.findall(rf'{column_re}\s*=|=\s*{column_re}', condition)
+    columns = [column for pair in equal for column in pair if column]
+    columns += re.findall(column_re, condition)
+    return list(dict.fromkeys(columns))
+
+
+def existing_indexes(cursor, table):
+    """Столбцы индексов таблицы по порядку: [[столбец, ...], ...]"""
+    cursor.execute(f"SHOW INDEX FROM {table}")
+    columns = [column[0] for column in cursor.description]
+    indexes = {}
+    for row in cursor.fetchall():
+        row = dict(zip(columns, row))
+        indexes.setdefault(row['Key_name'], []).append((row['Seq_in_index'], row['Column_name'].lower()))
+    return [[column for _, column in sorted(parts)] for parts in indexes.values()]
+
+
+def advise_indexes(cursor, plans):
+    """
+    Подсказки составных индексов для ADVISE_TABLES: для доступа без индекса или с индексом,
+    не покрывающим условие, - столбцы равенств, затем остальные столбцы условия.
+    Возвращает {(таблица, столбцы): [случаи]}
+    """
+    advice = {}
+    indexes = {}
+    for name, sql_query, summary in plans:
+        aliases = table_aliases(sql_query)
+        for table in summary['tables']:
+            real_table = aliases.get(table['table'], table['table']).lower()
+            if real_table not in ADVISE_TABLES or table['covering']:
+                continue
+            key_columns = [column.lower() for column in table['used_key_parts'] or []]
+            columns = key_columns + [column.lower() for column in condition_columns(table['condition'], table['table'])
+                                     if column.lower() not in key_columns]
+            if len(columns) < 2 and table['access_type'] != 'ALL':
+                continue
+            if real_table not in indexes:
+                indexes[real_table] = existing_indexes(cursor, real_table)
+            if any(index[:len(columns)] == columns for index in indexes[real_table]):
+                continue
+            advice.setdefault((real_table, tuple(columns)), []).append(name)
+    return advice
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', default='толстой', help='поисковый запрос')
+    parser.add_argument('--lang', default='ru', help='фильтр языка')
+    parser.add_argument('--size', default='', help='фильтр размера: less800 / more800')
+    parser.add_argument('--rating', default='', help='фильтр рейтинга, например "4,5"')
+    parser.add_argument('--analyze', action='store_true', help='выполнять запросы (ANALYZE FORMAT=JSON)')
+    parser.add_argument('--large-rows', type=int, default=10000, help='порог числа строк для находок')
+    parser.add_argument('--growth', type=float, default=10, help='порог роста числа строк относительно базового')
+    parser.add_argument('--save', help='сохранить планы как базовые в JSON')
+    parser.add_argument('--compare', help='сравнить с базовыми планами из JSON')
+    args = parser.parse_args()
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+    results, plans = {}, []
+    regressions_count = 0
+    with db.connect() as conn:
+        cursor = conn.cursor(buffered=True)
+        for name, sql_query, params in build_cases(db, args):
+            try:
+                plan = explain(cursor, sql_query, params, args.analyze)
+            except Exception as e:
+                print(f"{name:45} ошибка: {e}")
+                continue
+            summary = summarize(plan)
+            results[name] = {'sql': sql_query, 'plan': plan, 'summary': summary}
+            plans.append((name, sql_query, summary))
+
+            if name in baselines:
+                findings = compare(summary, baselines[name]['summary'], args.large_rows, args.growth)
+                regressions_count += len(findings)
+            else:
+                findings = list(find_issues(summary, args.large_rows).values())
+            access = ', '.join(f"{t['table']}:{t['access_type']}/{t['key'] or '-'}" for t in summary['tables'])
+            print(f"{name:45} {'!' if findings else 'ok'}  {access}")
+            for finding in findings:
+                print(f"    {finding}")
+
+        advice = advise_indexes(cursor, plans)
+
+    if advice:
+        print("\nПодсказки индексов:")
+        for (table, columns), names in sorted(advice.items()):
+            print(f"  CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)});")
+            print(f"      запросы: {', '.join(names)}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+
+    if args.compare:
+        print(f"\nРегрессий относительно {args.compare}: {regressions_count}")
+        sys.exit(1 if regressions_count else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Сверка результатов поиска по индексу SQLite FTS5 (SEARCH_BACKEND=sqlite) с поиском MariaDB.
+
+Запуск (переменные окружения DB_* как у бота, индекс построен tools/build_sqlite_index.py):
+    python tools/check_search_parity.py --query "толстой" --query "война мир"
+    python tools/check_search_parity.py --logs-db data/FlibustaLogs.sqlite --top 100
+
+Запросы компилируются так же, как в боте (search_query.compile_query, строгое выражение).
+Для каждого запроса, области поиска и вида поиска (книги, серии, авторы) сравниваются
+множества найденных ID. Если хотя бы один из результатов упёрся в лимит выдачи, сравнивается
+только число найденного. Расхождения печатаются с примерами ID; код возврата 1, если они есть.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from constants import MAX_BOOKS_SEARCH, MAX_SERIES_SEARCH, MAX_AUTHORS_SEARCH, \
+    SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA  # noqa: E402
+from search_query import compile_query  # noqa: E402
+from search_sqlite import SqliteSearchBooks, SQLITE_SEARCH_PATH  # noqa: E402
+from bench_query_compiler import SQL_QUERY_TOP_SEARCHES  # noqa: E402
+
+# Вид поиска: (метод, ID в строке результата, лимит выдачи)
+SEARCH_KINDS = [
+    ('search_books', lambda row: row.FileName, MAX_BOOKS_SEARCH),
+    ('search_series', lambda row: row[1], MAX_SERIES_SEARCH),
+    ('search_authors', lambda row: row[2], MAX_AUTHORS_SEARCH),
+]
+
+AREAS = (SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, SETTING_SEARCH_AREA_AA)
+
+
+def compare(mariadb_rows, sqlite_rows, get_id, limit):
+    """Возвращает описание расхождения или None"""
+    mariadb_ids = {get_id(row) for row in mariadb_rows}
+    sqlite_ids = {get_id(row) for row in sqlite_rows}
+    if len(mariadb_rows) >= limit or len(sqlite_rows) >= limit:
+        return None if len(mariadb_rows) == len(sqlite_rows) else \
+            f"в лимите: mariadb={len(mariadb_rows)} sqlite={len(sqlite_rows)}"
+    if mariadb_ids == sqlite_ids:
+        return None
+    missing = sorted(mariadb_ids - sqlite_ids)[:5]
+    extra = sorted(sqlite_ids - mariadb_ids)[:5]
+    return (f"mariadb={len(mariadb_ids)} sqlite={len(sqlite_ids)} "
+            f"нет в sqlite: {missing} лишние в sqlite: {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', action='append', help='поисковый запрос (можно несколько раз)')
+    parser.add_argument('--logs-db', help='взять самые частые запросы из UserLog (SQLite)')
+    parser.add_argument('--top', type=int, default=50, help='число запросов из UserLog')
+    parser.add_argument('--index', default=SQLITE_SEARCH_PATH, help='файл индекса SQLite')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--size', default='', help='фильтр размера: less800 / more800')
+    parser.add_argument('--rating', default='', help='фильтр рейтинга, например "4,5"')
+    args = parser.parse_args()
+
+    queries = list(args.query or [])
+    if args.logs_db:
+        with sqlite3.connect(args.logs_db) as conn:
+            queries += [row[0] for row in conn.execute(SQL_QUERY_TOP_SEARCHES, (args.top,))]
+    queries = queries or ['толстой', 'война мир', 'фантастика']
+
+    mariadb = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+    sqlite_db = SqliteSearchBooks(args.index)
+    print(f"Индекс построен по версии библиотеки {sqlite_db.get_index_version()!r}")
+
+    checks = mismatches = 0
+    for query_text in queries:
+        expression = compile_query(query_text).strict
+        if not expression:
+            continue
+        for area in AREAS:
+            for method, get_id, limit in SEARCH_KINDS:
+                search_args = (expression, args.lang, args.size, args.rating, area)
+                diff = compare(getattr(mariadb, method)(*search_args), getattr(sqlite_db, method)(*search_args),
+                               get_id, limit)
+                checks += 1
+                if diff:
+                    mismatches += 1
+                    print(f"≠ {method:15} {area:3} {expression!r}: {diff}")
+
+    print(f"\nСовпало {checks - mismatches} из {checks} сравнений")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Сравнение запроса поиска книг по BASE_JOINS (tools/legacy_search.py) и по
+денормализованной таблице libbook_search (build_sql_query_search_books).
+
+Запуск (переменные окружения DB_* как у бота, таблица libbook_search заполнена
+скриптами db_init/zz_32_create_search.sql и db_init/zz_42_fill_search.sql):
+    python tools/explain_search.py --query "толстой" --query "война мир" --lang ru --runs 5
+
+Для каждого запроса печатаются планы EXPLAIN обоих вариантов, медиана и максимум
+латентности, число найденных книг и расхождение множеств найденных BookID.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from constants import SETTING_SEARCH_AREA_B  # noqa: E402
+from legacy_search import build_sql_where_ft, build_sql_query_books  # noqa: E402
+
+
+def build_old(query, lang, size_limit, rating_filter, search_area):
+    sql_where = build_sql_where_ft(lang, size_limit, rating_filter)
+    return build_sql_query_books(sql_where, 'desc', search_area), [query] * 2
+
+
+def build_new(query, lang, size_limit, rating_filter, search_area):
+    return DatabaseBooks.build_search_books(query, lang, size_limit, rating_filter, search_area)
+
+
+def explain(db, sql_query, params):
+    with db.connect() as conn:
+        cursor = conn.cursor(buffered=True)
+        cursor.execute(f"EXPLAIN {sql_query}", params)
+        columns = [column[0] for column in cursor.description]
+        return columns, cursor.fetchall()
+
+
+def measure(db, sql_query, params, runs):
+    latencies = []
+    rows = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = db._fetchall(sql_query, params)
+        latencies.append(time.perf_counter() - started)
+    return latencies, rows
+
+
+def print_explain(columns, rows):
+    print('  ' + ' | '.join(columns))
+    for row in rows:
+        print('  ' + ' | '.join('' if value is None else str(value) for value in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--query', action='append', help='поисковый запрос (можно несколько раз)')
+    parser.add_argument('--lang', default='', help='фильтр языка')
+    parser.add_argument('--size', default='', help='фильтр размера: less800 / more800')
+    parser.add_argument('--rating', default='', help='фильтр рейтинга, например "4,5"')
+    parser.add_argument('--area', default=SETTING_SEARCH_AREA_B, help='область поиска')
+    parser.add_argument('--runs', type=int, default=5, help='число повторов каждого запроса')
+    args = parser.parse_args()
+
+    queries = args.query or ['толстой', 'война мир', 'фантастика']
+    db = DatabaseBooks(DB_BOOKS.db_config, pool_config={'size': 1})
+
+    for query in queries:
+        print(f"=== {query!r}")
+        results = {}
+        for name, builder in (('base_joins', build_old), ('libbook_search', build_new)):
+            sql_query, params = builder(query, args.lang, args.size, args.rating, args.area)
+            columns, plan = explain(db, sql_query, params)
+            latencies, rows = measure(db, sql_query, params, args.runs)
+            results[name] = {row[0] for row in rows}
+
+            print(f"--- {name}: p50={statistics.median(latencies) * 1000:.1f}ms "
+                  f"max={max(latencies) * 1000:.1f}ms books={len(rows)}")
+            print_explain(columns, plan)
+
+        old_ids, new_ids = results['base_joins'], results['libbook_search']
+        print(f"--- только base_joins: {len(old_ids - new_ids)}, только libbook_search: {len(new_ids - old_ids)}\n")
+
+
+if __name__ == '__main__':
+    main()
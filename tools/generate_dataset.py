@@ -0,0 +1,478 @@
+"""
+Генератор синтетической базы в схеме дампа Флибусты для нагрузочных замеров без настоящего дампа.
+
+Пишет по файлу lib.<таблица>.sql.gz на таблицу (libbook, libavtor, libavtorname, libseq,
+libseqname, libgenre, libgenrelist, librate, librecs, libreviews, libbannotations,
+libaannotations, libbpics, libapics и пустые таблицы дампа, которые ожидает db_init)
+с DROP/CREATE TABLE и INSERT - как файлы настоящего дампа в db_init/sql.
+
+Запуск:
+    python tools/generate_dataset.py --books 500000 --output db_init/sql
+    python tools/generate_dataset.py --books 10000 --langs ru=60,en=30,uk=10 --seed 7 --output db_init
+
+Дальше как с настоящим дампом: deploy.sh распаковывает db_init/sql/*.sql.gz в db_init,
+а локально MariaDB при первом запуске (docker-compose up) загружает *.sql.gz из db_init
+(--output db_init) и выполняет скрипты zz_*.sql. После импорта - инструменты tools/bench_*.py.
+
+При одинаковых параметрах и --seed данные совпадают. Распределения: популярность авторов,
+слов и оценок - степенные (немногие частые, длинный хвост), размеры файлов - логнормальные,
+новые книги - с большими BookId и более поздним Time.
+"""
+import argparse
+import bisect
+import datetime
+import gzip
+import itertools
+import math
+import os
+import random
+import time
+
+BATCH_SIZE = 1000
+
+# Частые слова с начала распределения Ципфа; хвост словаря - синтетические слова из слогов
+RU_WORDS = """
+    война мир жизнь любовь время дом ночь день человек дорога город земля море звезда тайна
+    история сердце путь тень свет огонь небо судьба дело последний новый старый чёрный белый
+    красный тёмный большой маленький первый долгий лето зима весна осень книга сказка песня
+    девушка король принц империя ветер камень лес река остров берег магия охота игра смерть
+    правда ошибка память враг друг брат сестра отец мать сын дочь хозяин академия школа
+    дракон волк ворон кот пёс призрак убийство следствие расследование приключения странник
+""".split()
+EN_WORDS = """
+    the of and a in to is was for on with his her that by at from as time night day life love
+    war world house home man woman city star shadow light fire dark black white red blood
+    king queen prince empire dragon magic game death truth secret lost last first new old
+    road sea river island winter summer heart story book song stone wind wolf raven dream
+""".split()
+RU_SYLLABLES = """
+    ка ро ва ни ле то ма са де ли но ра та ко ре ми по ла ве ди бо го жи зо мо ну ча шу щи
+    кра сла тро пре сто гра бла дро зве кры смо ту фе хо це ю я ё ол ан ен ин ов ой ар ис
+""".split()
+EN_SYLLABLES = """
+    ba be bi bo ca ce co da de di do fa fe fi ga ge go ha he hi ho la le li lo ma me mi mo na
+    ne ni no pa pe pi po ra re ri ro sa se si so ta te ti to va ve wa we wi ar er or an en in
+""".split()
+
+RU_FIRST_NAMES = """
+    Александр Алексей Андрей Борис Василий Виктор Владимир Дмитрий Евгений Иван Игорь Константин
+    Лев Михаил Николай Олег Павел Роман Сергей Юрий Анна Елена Мария Наталья Ольга Татьяна
+    Юлия Ирина Светлана Екатерина
+""".split()
+RU_MIDDLE_NAMES = """
+    Александрович Алексеевич Андреевич Борисович Васильевич Викторович Владимирович Иванович
+    Михайлович Николаевич Петрович Сергеевич Александровна Ивановна Михайловна Сергеевна
+""".split()
+RU_LAST_NAMES = """
+    Иванов Смирнов Кузнецов Попов Васильев Петров Соколов Михайлов Новиков Фёдоров Морозов
+    Волков Алексеев Лебедев Семёнов Егоров Павлов Козлов Степанов Николаев Орлов Андреев
+    Макаров Никитин Захаров Зайцев Соловьёв Борисов Яковлев Григорьев Толстой Лукьяненко
+""".split()
+RU_NAME_SUFFIXES = ['ов', 'ев', 'ин', 'ский', 'енко', 'ович', 'ук']
+EN_FIRST_NAMES = """
+    James John Robert Michael William David Richard Joseph Thomas Charles Stephen George Paul
+    Mary Patricia Jennifer Linda Elizabeth Susan Margaret Sarah Karen Agatha Ursula
+""".split()
+EN_LAST_NAMES = """
+    Smith Johnson Williams Brown Jones Miller Davis Wilson Anderson Taylor Thomas Moore Martin
+    Jackson Thompson White Harris Clark Lewis Walker King Christie Tolkien Gaiman Pratchett
+""".split()
+EN_NAME_SUFFIXES = ['son', 'ton', 'ley', 'er', 'man', 'ford']
+
+# Жанры: (код, название, раздел)
+GENRES = [
+    ('sf', 'Научная фантастика', 'Фантастика'),
+    ('sf_fantasy', 'Фэнтези', 'Фантастика'),
+    ('sf_action', 'Боевая фантастика', 'Фантастика'),
+    ('sf_space', 'Космическая фантастика', 'Фантастика'),
+    ('popadanec', 'Попаданцы', 'Фантастика'),
+    ('det_classic', 'Классический детектив', 'Детективы и Триллеры'),
+    ('det_police', 'Полицейский детектив', 'Детективы и Триллеры'),
+    ('thriller', 'Триллер', 'Детективы и Триллеры'),
+    ('det_irony', 'Иронический детектив', 'Детективы и Триллеры'),
+    ('prose_classic', 'Классическая проза', 'Проза'),
+    ('prose_contemporary', 'Современная проза', 'Проза'),
+    ('prose_history', 'Историческая проза', 'Проза'),
+    ('love_contemporary', 'Современные любовные романы', 'Любовные романы'),
+    ('love_history', 'Исторические любовные романы', 'Любовные романы'),
+    ('adv_history', 'Исторические приключения', 'Приключения'),
+    ('adventure', 'Приключения', 'Приключения'),
+    ('child_tale', 'Сказка', 'Детское'),
+    ('child_prose', 'Детская проза', 'Детское'),
+    ('poetry', 'Поэзия', 'Поэзия'),
+    ('sci_history', 'История', 'Наука, Образование'),
+    ('sci_psychology', 'Психология', 'Наука, Образование'),
+    ('comp_programming', 'Программирование', 'Компьютеры и Интернет'),
+    ('nonf_biography', 'Биографии и Мемуары', 'Документальная литература'),
+    ('nonf_publicism', 'Публицистика', 'Документальная литература'),
+    ('home_cooking', 'Кулинария', 'Дом и семья'),
+    ('religion', 'Религия', 'Религия и духовность'),
+]
+
+# Схема таблиц дампа (столбцы, используемые ботом и скриптами db_init, и основные ключи)
+SCHEMA = {
+    'libbook': """
+        BookId INT(10) UNSIGNED NOT NULL AUTO_INCREMENT,
+        FileSize INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        Time DATETIME NOT NULL,
+        Title VARCHAR(254) NOT NULL DEFAULT '',
+        Title1 VARCHAR(254) NOT NULL DEFAULT '',
+        Lang VARCHAR(3) NOT NULL DEFAULT 'ru',
+        SrcLang VARCHAR(3) NOT NULL DEFAULT '',
+        FileType CHAR(4) NOT NULL DEFAULT 'fb2',
+        Year SMALLINT(6) NOT NULL DEFAULT 0,
+        Deleted CHAR(1) NOT NULL DEFAULT '0',
+        Ver VARCHAR(8) NOT NULL DEFAULT '',
+        FileAuthor VARCHAR(64) NOT NULL DEFAULT '',
+        N INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        keywords VARCHAR(255) NOT NULL DEFAULT '',
+        md5 CHAR(32) NOT NULL DEFAULT '',
+        Pages INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        Chars INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (BookId),
+        KEY Title (Title),
+        KEY Lang (Lang),
+        KEY Deleted (Deleted)""",
+    'libavtor': """
+        BookId INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        AvtorId INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        Pos TINYINT(4) NOT NULL DEFAULT 0,
+        PRIMARY KEY (BookId, AvtorId),
+        KEY iav (AvtorId)""",
+    'libavtorname': """
+        AvtorId INT(10) UNSIGNED NOT NULL AUTO_INCREMENT,
+        FirstName VARCHAR(99) NOT NULL DEFAULT '',
+        MiddleName VARCHAR(99) NOT NULL DEFAULT '',
+        LastName VARCHAR(99) NOT NULL DEFAULT '',
+        NickName VARCHAR(33) NOT NULL DEFAULT '',
+        Gender CHAR(1) NOT NULL DEFAULT '',
+        MasterId INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (AvtorId),
+        KEY FullName (LastName, FirstName, MiddleName)""",
+    'libseq': """
+        BookId INT(10) UNSIGNED NOT NULL,
+        SeqId INT(10) UNSIGNED NOT NULL,
+        SeqNumb INT(10) NOT NULL DEFAULT 0,
+        Level TINYINT(4) NOT NULL DEFAULT 0,
+        Type TINYINT(4) NOT NULL DEFAULT 0,
+        PRIMARY KEY (BookId, SeqId),
+        KEY SeqId (SeqId)""",
+    'libseqname': """
+        SeqId INT(10) UNSIGNED NOT NULL AUTO_INCREMENT,
+        SeqName VARCHAR(254) NOT NULL DEFAULT '',
+        PRIMARY KEY (SeqId),
+        KEY SeqName (SeqName)""",
+    'libgenre': """
+        Id INT(10) UNSIGNED NOT NULL AUTO_INCREMENT,
+        BookId INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        GenreId INT(10) UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (Id),
+        UNIQUE KEY u (BookId, GenreId),
+        KEY igenre (GenreId)""",
+    'libgenrelist': """
+        GenreId INT(10) UNSIGNED NOT NULL AUTO_INCREMENT,
+        GenreCode VARCHAR(45) NOT NULL DEFAULT '',
+        GenreDesc VARCHAR(99) NOT NULL DEFAULT '',
+        GenreMeta VARCHAR(45) NOT NULL DEFAULT '',
+        PRIMARY KEY (GenreId),
+        UNIQUE KEY GenreCode (GenreCode)""",
+    'librate': """
+        ID INT(11) NOT NULL AUTO_INCREMENT,
+        BookId INT(11) NOT NULL,
+        UserId INT(11) NOT NULL,
+        Rate CHAR(1) NOT NULL,
+        PRIMARY KEY (ID),
+        UNIQUE KEY BookId (BookId, UserId)""",
+    'librecs': """
+        id INT(11) NOT NULL AUTO_INCREMENT,
+        uid INT(11) NOT NULL,
+        bid INT(11) NOT NULL,
+        timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id)""",
+    'libreviews': """
+        Name VARCHAR(255) NOT NULL,
+        Time DATETIME NOT NULL,
+        BookId INT(11) NOT NULL,
+        Text TEXT NOT NULL""",
+    'libbannotations': """
+        BookId INT(11) NOT NULL,
+        nid INT(11) NOT NULL,
+        Title VARCHAR(255) NOT NULL DEFAULT '',
+        Body TEXT,
+        PRIMARY KEY (nid)""",
+    'libaannotations': """
+        AvtorId INT(11) NOT NULL,
+        nid INT(11) NOT NULL,
+        Title VARCHAR(255) NOT NULL DEFAULT '',
+        Body TEXT,
+        PRIMARY KEY (nid)""",
+    'libbpics': """
+        BookId INT(11) NOT NULL,
+        File VARCHAR(255) NOT NULL""",
+    'libapics': """
+        AvtorId INT(11) NOT NULL,
+        nid INT(11) NOT NULL,
+        File VARCHAR(255) NOT NULL""",
+    # Таблицы дампа, которые бот не читает: нужны только для zz_10_convert_charset.sql
+    'libgenretranslate': """
+        GenreCode VARCHAR(45) NOT NULL DEFAULT '',
+        Lang CHAR(2) NOT NULL DEFAULT '',
+        GenreDesc VARCHAR(99) NOT NULL DEFAULT ''""",
+    'libtranslator': """
+        BookId INT(10) UNSIGNED NOT NULL,
+        TranslatorId INT(10) UNSIGNED NOT NULL,
+        Pos TINYINT(4) NOT NULL DEFAULT 0""",
+    'libfilename': """
+        BookId INT(10) UNSIGNED NOT NULL,
+        FileName VARCHAR(255) NOT NULL,
+        PRIMARY KEY (BookId)""",
+    'libjoinedbooks': """
+        Id INT(11) NOT NULL AUTO_INCREMENT,
+        Time DATETIME NOT NULL,
+        BadId INT(11) NOT NULL,
+        GoodId INT(11) NOT NULL,
+        PRIMARY KEY (Id)""",
+}
+
+
+class ZipfSampler:
+    """Случайный выбор из списка с весами 1 / rank ** exponent (первые элементы - самые частые)"""
+
+    def __init__(self, items, exponent=1.0):
+        self.items = items
+        self.cum_weights = list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, len(items) + 1)))
+
+    def choice(self, rnd):
+        return self.items[bisect.bisect(self.cum_weights, rnd.random() * self.cum_weights[-1])]
+
+    def sample(self, rnd, k):
+        return rnd.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+
+class DumpWriter:
+    """Файл lib.<таблица>.sql.gz: схема таблицы и многострочные INSERT порциями по BATCH_SIZE"""
+
+    def __init__(self, output, table):
+        self.table = table
+        self.rows = 0
+        self._batch = []
+        self._file = gzip.open(os.path.join(output, f"lib.{table}.sql.gz"), 'wt', encoding='utf-8', compresslevel=3)
+        self._file.write(f"DROP TABLE IF EXISTS `{table}`;\n")
+        self._file.write(f"CREATE TABLE `{table}` ({SCHEMA[table]}\n) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;\n")
+
+    def write(self, *values):
+        self._batch.append(f"({','.join(sql_value(value) for value in values)})")
+        self.rows += 1
+        if len(self._batch) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._batch:
+            self._file.write(f"INSERT INTO `{self.table}` VALUES {','.join(self._batch)};\n")
+            self._batch = []
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def sql_value(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return f"'{value:%Y-%m-%d %H:%M:%S}'"
+    escaped = str(value).replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n')
+    return f"'{escaped}'"
+
+
+def parse_langs(text):
+    """"ru=70,en=20" -> ([языки], [веса])"""
+    pairs = [item.split('=') for item in text.split(',') if item]
+    return [lang.strip() for lang, _ in pairs], [float(weight) for _, weight in pairs]
+
+
+def is_cyrillic_lang(lang):
+    return lang in ('ru', 'uk', 'be', 'bg')
+
+
+class TextModel:
+    """Словари и имена на русском и английском: частые настоящие слова и хвост синтетических"""
+
+    def __init__(self, rnd, vocabulary_size):
+        self.ru_words = ZipfSampler(self._vocabulary(rnd, RU_WORDS, RU_SYLLABLES, vocabulary_size))
+        self.en_words = ZipfSampler(self._vocabulary(rnd, EN_WORDS, EN_SYLLABLES, vocabulary_size))
+        self.ru_first = ZipfSampler(RU_FIRST_NAMES, 0.7)
+        self.ru_middle = ZipfSampler(RU_MIDDLE_NAMES, 0.7)
+        self.en_first = ZipfSampler(EN_FIRST_NAMES, 0.7)
+        self.ru_last = ZipfSampler(self._vocabulary(rnd, RU_LAST_NAMES, RU_SYLLABLES, vocabulary_size // 2,
+                                                    RU_NAME_SUFFIXES, capitalize=True), 0.8)
+        self.en_last = ZipfSampler(self._vocabulary(rnd, EN_LAST_NAMES, EN_SYLLABLES, vocabulary_size // 2,
+                                                    EN_NAME_SUFFIXES, capitalize=True), 0.8)
+
+    @staticmethod
+    def _vocabulary(rnd, words, syllables, size, suffixes=('',), capitalize=False):
+        vocabulary = list(dict.fromkeys(words))
+        known = set(vocabulary)
+        while len(vocabulary) < size:
+            word = ''.join(rnd.choices(syllables, k=rnd.choice((2, 2, 3, 3, 4)))) + rnd.choice(suffixes)
+            word = word.capitalize() if capitalize else word
+            if word not in known:
+                known.add(word)
+                vocabulary.append(word)
+        return vocabulary
+
+    def words(self, rnd, lang, count):
+        sampler = self.ru_words if is_cyrillic_lang(lang) else self.en_words
+        return sampler.sample(rnd, count)
+
+    def title(self, rnd, lang):
+        return ' '.join(self.words(rnd, lang, rnd.choice((1, 2, 2, 3, 3, 4, 5)))).capitalize()
+
+    def text(self, rnd, lang, words):
+        sentences = []
+        while words > 0:
+            length = min(words, rnd.randint(5, 15))
+            sentences.append(' '.join(self.words(rnd, lang, length)).capitalize() + '.')
+            words -= length
+        return ' '.join(sentences)
+
+    def author(self, rnd, lang):
+        """(имя, отчество, фамилия)"""
+        if is_cyrillic_lang(lang):
+            middle = self.ru_middle.choice(rnd) if rnd.random() < 0.5 else ''
+            return self.ru_first.choice(rnd), middle, self.ru_last.choice(rnd)
+        return self.en_first.choice(rnd), '', self.en_last.choice(rnd)
+
+
+def skewed_index(rnd, count, skew):
+    """Индекс 0..count-1, малые индексы чаще (skew > 1 - сильнее перекос)"""
+    return min(count - 1, int(count * rnd.random() ** skew))
+
+
+def activity_count(rnd, mean, popularity):
+    """Число оценок / рекомендаций / отзывов книги: в среднем mean, больше у популярных"""
+    if mean <= 0:
+        return 0
+    return int(rnd.expovariate(1 / (mean * popularity)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=10000, help='число книг (10000 ... 5000000)')
+    parser.add_argument('--output', default=os.path.join('db_init', 'sql'), help='каталог файлов lib.*.sql.gz')
+    parser.add_argument('--seed', type=int, default=1, help='начальное значение генератора')
+    parser.add_argument('--langs', default='ru=75,en=15,uk=5,de=3,fr=2', help='доли языков книг')
+    parser.add_argument('--books-per-author', type=float, default=5, help='книг на автора в среднем')
+    parser.add_argument('--coauthor-share', type=float, default=0.1, help='доля книг с несколькими авторами')
+    parser.add_argument('--author-skew', type=float, default=2.5,
+                        help='перекос популярности авторов (1 - равномерно)')
+    parser.add_argument('--series-share', type=float, default=0.35, help='доля книг в сериях')
+    parser.add_argument('--books-per-series', type=float, default=6, help='книг в серии в среднем')
+    parser.add_argument('--rates-per-book', type=float, default=3, help='оценок на книгу в среднем')
+    parser.add_argument('--recs-per-book', type=float, default=0.5, help='рекомендаций на книгу в среднем')
+    parser.add_argument('--reviews-per-book', type=float, default=0.3, help='отзывов на книгу в среднем')
+    parser.add_argument('--annotation-share', type=float, default=0.7, help='доля книг с аннотацией')
+    parser.add_argument('--annotation-words', type=int, default=60, help='слов в аннотации в среднем')
+    parser.add_argument('--author-annotation-share', type=float, default=0.2, help='доля авторов с биографией')
+    parser.add_argument('--pics-share', type=float, default=0.5, help='доля книг с обложкой')
+    parser.add_argument('--deleted-share', type=float, default=0.03, help='доля удалённых книг')
+    parser.add_argument('--days', type=int, default=15 * 365, help='период поступления книг, дней')
+    parser.add_argument('--vocabulary', type=int, default=30000, help='размер словаря каждого языка')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    os.makedirs(args.output, exist_ok=True)
+    started = time.perf_counter()
+    langs, lang_weights = parse_langs(args.langs)
+    text = TextModel(rnd, args.vocabulary)
+
+    writers = {table: DumpWriter(args.output, table) for table in SCHEMA}
+    end_time = datetime.datetime.now().replace(microsecond=0)
+    start_time = end_time - datetime.timedelta(days=args.days)
+
+    for genre_id, (code, desc, meta) in enumerate(GENRES, start=1):
+        writers['libgenrelist'].write(genre_id, code, desc, meta)
+    genre_sampler = ZipfSampler(list(range(1, len(GENRES) + 1)), 0.8)
+
+    # Авторы: язык автора определяет алфавит имени и язык большинства его книг
+    authors_count = max(1, int(args.books * (1 + args.coauthor_share) / args.books_per_author))
+    author_langs = []
+    for avtor_id in range(1, authors_count + 1):
+        lang = rnd.choices(langs, lang_weights)[0]
+        author_langs.append(lang)
+        first, middle, last = text.author(rnd, lang)
+        writers['libavtorname'].write(avtor_id, first, middle, last, '', rnd.choice('MF'), 0)
+        if rnd.random() < args.author_annotation_share:
+            writers['libaannotations'].write(avtor_id, avtor_id, f"{first} {last}",
+                                             text.text(rnd, lang, args.annotation_words))
+        if rnd.random() < args.pics_share / 2:
+            writers['libapics'].write(avtor_id, avtor_id, f"{avtor_id}.jpg")
+
+    # Открытые серии авторов: автор -> (SeqId, номер следующей книги)
+    open_series = {}
+    series_lang = {}
+    rate_id = rec_id = 0
+    for book_id in range(1, args.books + 1):
+        avtor_id = skewed_index(rnd, authors_count, args.author_skew) + 1
+        lang = author_langs[avtor_id - 1] if rnd.random() < 0.9 else rnd.choices(langs, lang_weights)[0]
+        book_time = start_time + (end_time - start_time) * ((book_id - 1 + rnd.random()) / args.books)
+        book_time = book_time.replace(microsecond=0)
+        file_size = int(min(50 * 1024 ** 2, rnd.lognormvariate(math.log(500 * 1024), 0.9)))
+        year = min(end_time.year, int(rnd.triangular(1850, end_time.year + 1, end_time.year - 5)))
+        deleted = '1' if rnd.random() < args.deleted_share else '0'
+        writers['libbook'].write(
+            book_id, file_size, book_time, text.title(rnd, lang), '', lang, '', 'fb2', year, deleted, '1.0',
+            '', 0, '', f"{rnd.getrandbits(128):032x}", file_size // 2500, file_size // 2)
+
+        # Авторы книги
+        coauthors = {avtor_id}
+        if rnd.random() < args.coauthor_share:
+            coauthors.update(rnd.randint(1, authors_count) for _ in range(rnd.randint(1, 2)))
+        for pos, coauthor_id in enumerate(sorted(coauthors)):
+            writers['libavtor'].write(book_id, coauthor_id, pos)
+
+        # Серия: книги одного автора подряд, серия закрывается в среднем через books_per_series книг
+        if rnd.random() < args.series_share:
+            seq_id, numb = open_series.get(avtor_id, (None, 1))
+            if seq_id is None or rnd.random() < 1 / args.books_per_series:
+                seq_id, numb = len(series_lang) + 1, 1
+                series_lang[seq_id] = lang
+            writers['libseq'].write(book_id, seq_id, numb, 0, 0)
+            open_series[avtor_id] = (seq_id, numb + 1)
+
+        for genre_id in sorted({genre_sampler.choice(rnd) for _ in range(rnd.choice((1, 1, 2, 3)))}):
+            writers['libgenre'].write(writers['libgenre'].rows + 1, book_id, genre_id)
+
+        if rnd.random() < args.annotation_share:
+            words = max(5, int(rnd.gauss(args.annotation_words, args.annotation_words / 3)))
+            writers['libbannotations'].write(book_id, book_id, '', text.text(rnd, lang, words))
+        if rnd.random() < args.pics_share:
+            writers['libbpics'].write(book_id, f"{book_id}.jpg")
+
+        # Активность читателей: больше у популярных авторов, отметки времени - после поступления книги
+        popularity = 3 if avtor_id <= authors_count * 0.05 else 1
+        for user_id in sorted({rnd.randint(1, 1000000) for _ in range(activity_count(rnd, args.rates_per_book, popularity))}):
+            rate_id += 1
+            writers['librate'].write(rate_id, book_id, user_id, str(rnd.choices('12345', (1, 1, 2, 4, 5))[0]))
+        for _ in range(activity_count(rnd, args.recs_per_book, popularity)):
+            rec_id += 1
+            writers['librecs'].write(rec_id, rnd.randint(1, 1000000), book_id,
+                                     book_time + (end_time - book_time) * rnd.random() ** 2)
+        for _ in range(activity_count(rnd, args.reviews_per_book, popularity)):
+            review_time = book_time + (end_time - book_time) * rnd.random() ** 2
+            writers['libreviews'].write(f"user{rnd.randint(1, 1000000)}", review_time.replace(microsecond=0),
+                                        book_id, text.text(rnd, lang, rnd.randint(10, 80)))
+
+    for seq_id, lang in series_lang.items():
+        writers['libseqname'].write(seq_id, text.title(rnd, lang))
+
+    for table, writer in writers.items():
+        writer.close()
+        print(f"{table:18} {writer.rows:10} строк")
+    print(f"Готово за {time.perf_counter() - started:.0f} с: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
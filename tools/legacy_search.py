@@ -0,0 +1,157 @@
+"""
+Прежний поиск книг по BASE_JOINS с фильтрами во внешнем запросе - только для сравнения планов
+и времени с поиском по libbook_search в tools/explain_search.py и tools/check_query_plans.py.
+Бот этими запросами не пользуется.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import Book  # noqa: E402
+from constants import MAX_BOOKS_SEARCH, SETTING_SEARCH_AREA_B, SETTING_SEARCH_AREA_BA, \
+    SETTING_SEARCH_AREA_AA  # noqa: E402
+
+# Базовые поля для SELECT
+BASE_FIELDS = """
+    b.BookID as FileName,
+    upper(b.Lang) as SearchLang,
+    b.Title,
+    b.FileSize as BookSize,
+    b.Year as SearchYear,
+    case 
+      when b.FileSize <= 800 * 1024 then 'less800'
+      when b.FileSize > 800 * 1024 then 'more800'
+    end as BookSizeCat,  
+    an.LastName,
+    an.FirstName, 
+    an.MiddleName,
+    an.AvtorId as AuthorID,
+    gl.GenreDesc AS Genre,
+    sn.SeqName as SeriesTitle, 
+    sn.SeqId as SeriesID, 
+    COALESCE(r.LibRate, 0) as LibRate
+"""
+
+# Базовые JOIN (БЕЗ FROM)
+BASE_JOINS = """
+-- LEFT JOIN (select bookid, min(avtorid) as avtorid from libavtor group by bookid) a ON a.BookID = b.BookID
+LEFT JOIN libavtor a ON a.BookID = b.BookID
+LEFT JOIN libavtorname an ON an.AvtorID = a.AvtorID
+LEFT JOIN (select bookid, min(genreid) as genreid from libgenre group by bookid) g ON g.BookID = b.BookID
+-- LEFT JOIN libgenre g ON g.BookID = b.BookID
+LEFT JOIN libgenrelist gl ON gl.GenreID = g.GenreID
+LEFT JOIN libseq s ON s.BookID = b.BookID
+LEFT JOIN libseqname sn on sn.SeqID = s.SeqID
+LEFT JOIN book_stats r ON r.BookId = b.BookId
+"""
+
+# Основной полнотекстовый поиск
+SQL_QUERY_BOOKS = f"""
+select * from (
+SELECT 
+    {BASE_FIELDS},
+    MATCH(fts.FT) AGAINST(%s IN BOOLEAN MODE) as Relevance
+FROM libbook_fts fts
+JOIN libbook b ON b.BookID = fts.BookID
+{BASE_JOINS}
+WHERE b.Deleted = '0'
+  AND MATCH(fts.FT) AGAINST(%s IN BOOLEAN MODE)
+) as subq 
+"""
+
+# Поиск по аннотациям книг
+SQL_QUERY_ABOOKS = f"""
+select * from (
+SELECT 
+    {BASE_FIELDS},
+    MATCH(ba.Body) AGAINST(%s IN BOOLEAN MODE) as Relevance
+FROM libbannotations ba
+JOIN libbook b ON b.BookID = ba.BookID
+{BASE_JOINS}
+WHERE b.Deleted = '0'
+  AND MATCH(ba.Body) AGAINST(%s IN BOOLEAN MODE)
+) as subq2
+"""
+
+# Поиск по аннотациям книг
+SQL_QUERY_AAUTHORS = f"""
+select * from (
+SELECT 
+    {BASE_FIELDS},
+    MATCH(aa.Body) AGAINST(%s IN BOOLEAN MODE) as Relevance
+FROM libaannotations aa
+JOIN libavtor ab ON ab.AvtorId = aa.AvtorId
+JOIN libbook b ON b.BookID = ab.BookID
+{BASE_JOINS}
+WHERE b.Deleted = '0'
+  AND MATCH(aa.Body) AGAINST(%s IN BOOLEAN MODE)
+) as subq2
+"""
+
+SELECT_SQL_QUERY = {
+    SETTING_SEARCH_AREA_B: SQL_QUERY_BOOKS,
+    SETTING_SEARCH_AREA_BA: SQL_QUERY_ABOOKS,
+    SETTING_SEARCH_AREA_AA: SQL_QUERY_AAUTHORS
+}
+
+
+def build_sql_where_ft(lang, size_limit, rating_filter=None, series_id=0, author_id=0):
+    """Создает SQL-условие WHERE на основе списка слов и их операторов."""
+    conditions = []
+
+    # Добавляем условие по языку, если задан в настройках пользователя
+    if lang:
+        conditions.append(f"SearchLang = '{lang.upper()}'")
+
+    # Добавляем ограничение по размеру книг, если задан в настройках пользователя
+    if size_limit:
+        conditions.append(f"BookSizeCat = '{size_limit}'")
+
+    # ДОБАВЛЯЕМ ФИЛЬТРАЦИЮ ПО РЕЙТИНГУ
+    if rating_filter and rating_filter != '':
+        rating_condition = f"LibRate IN ({rating_filter})"
+        conditions.append(rating_condition)
+
+    # Добавляем условие по серии в поиске книг по сериям
+    if series_id != 0:
+        conditions.append(f"SeriesID = {series_id}")
+
+    # Добавляем условие по автору в поиске книг по авторам
+    if author_id != 0:
+        conditions.append(f"AuthorID = {author_id}")
+
+    # в соновном sql вконце уже есть where, поэтому заменяем его на and
+    sql_where = "WHERE " + " AND ".join(conditions) if conditions else "WHERE 1=1"
+    return sql_where #, params
+
+
+def build_sql_query_books(sql_where, sort_order='desc', search_area=SETTING_SEARCH_AREA_B):
+    fields = Book._fields
+
+    # Всегда используем sum для Relevance
+    processed_fields = []
+    for field in fields:
+        # processed_fields.append(f"max({field})")
+        processed_fields.append(f"{field}")
+
+    select_fields = ', '.join(processed_fields)
+
+    sql_query_nested = SELECT_SQL_QUERY.get(search_area)
+    from_clause = f"FROM ( {sql_query_nested} {sql_where} ) as subquery"
+
+    sql_query = f"""
+        select {select_fields} from (
+        SELECT {select_fields},
+          ROW_NUMBER() OVER (PARTITION BY FileName ORDER BY FileName) AS rn 
+        {from_clause}
+        -- GROUP BY {fields[0]}
+        ORDER BY Relevance DESC, FileName {sort_order}
+        LIMIT {MAX_BOOKS_SEARCH}
+        ) as ranked
+        where rn = 1
+        ORDER BY Relevance DESC, FileName {sort_order}
+        -- LIMIT {MAX_BOOKS_SEARCH}
+    """
+
+    return sql_query
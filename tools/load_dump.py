@@ -0,0 +1,257 @@
+"""
+Параллельная загрузка дампа Флибусты (lib.<таблица>.sql.gz) в MariaDB вместо gunzip -c | mysql по файлам.
+
+Запуск (переменные окружения DB_* как у бота, пользователь с правами на создание таблиц):
+    python tools/load_dump.py --dir db_init/sql --workers 4
+    python tools/load_dump.py --dir db_init/sql --tables libbook,libavtor --restart
+
+Файлы читаются потоком без распаковки на диск, таблицы загружаются параллельно в --workers процессах.
+Определение таблицы из дампа приводится к InnoDB и utf8mb3_unicode_ci (кодировка меняется сразу
+при загрузке, отдельный ALTER TABLE ... CONVERT из db_init/zz_10_convert_charset.sql не нужен),
+символы вне utf8mb3 заменяются на U+FFFD. Вторичные индексы убираются из CREATE TABLE и строятся
+одним ALTER TABLE после загрузки данных (FULLTEXT - по одному).
+
+Загруженная таблица отмечается в dump_import_state вместе с размером и временем изменения файла:
+прерванную загрузку можно запустить снова, готовые таблицы с тем же файлом пропускаются,
+недогруженные загружаются заново (--restart - загрузить всё заново). По каждой таблице печатаются
+число строк, время загрузки, строк в секунду и время построения индексов.
+
+После загрузки - скрипты db_init/zz_20_*.sql и далее, как при первом запуске MariaDB.
+"""
+import argparse
+import functools
+import gzip
+import os
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+
+DUMP_FILE_RE = re.compile(r'^lib\.(\w+)\.sql\.gz$')
+# Фиксация транзакции через столько INSERT (в дампе каждый INSERT - порция строк)
+COMMIT_EVERY = 50
+
+# Кавычки строковых литералов и экранирующий обратный слэш (разбор операторов в read_statements)
+QUOTE_RE = re.compile(r"[\\'\"]")
+
+SECONDARY_KEY_RE = re.compile(r'^(?:(UNIQUE|FULLTEXT|SPATIAL)\s+)?(?:KEY|INDEX)\s', re.IGNORECASE)
+COLUMN_CHARSET_RE = re.compile(r'\s+(?:CHARACTER SET|CHARSET)\s+\w+|\s+COLLATE\s+\w+', re.IGNORECASE)
+TABLE_OPTION_RE = re.compile(r'\s*\b(?:ENGINE|(?:DEFAULT\s+)?(?:CHARSET|CHARACTER SET)|(?:DEFAULT\s+)?COLLATE'
+                             r'|ROW_FORMAT|PACK_KEYS)\s*=?\s*\w+', re.IGNORECASE)
+NON_BMP_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+TABLE_OPTIONS = "ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci"
+
+SQL_CREATE_IMPORT_STATE = """
+    CREATE TABLE IF NOT EXISTS dump_import_state (
+        TableName VARCHAR(64) NOT NULL,
+        FileSize BIGINT UNSIGNED NOT NULL,
+        FileTime INT UNSIGNED NOT NULL,
+        RowsLoaded BIGINT UNSIGNED NOT NULL,
+        LoadSeconds DECIMAL(10,1) NOT NULL,
+        IndexSeconds DECIMAL(10,1) NOT NULL,
+        FinishedAt DATETIME NOT NULL,
+        PRIMARY KEY (TableName)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3 COLLATE=utf8mb3_unicode_ci
+"""
+
+SQL_QUERY_IMPORT_STATE = "SELECT TableName, FileSize, FileTime FROM dump_import_state"
+
+SQL_DELETE_IMPORT_STATE = "DELETE FROM dump_import_state WHERE TableName = %s"
+
+SQL_UPDATE_IMPORT_STATE = """
+    REPLACE INTO dump_import_state (TableName, FileSize, FileTime, RowsLoaded, LoadSeconds, IndexSeconds, FinishedAt)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+"""
+
+SQL_ALTER_DATABASE_CHARSET = "ALTER DATABASE `{database}` CHARACTER SET utf8mb3 COLLATE utf8mb3_unicode_ci"
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, int(stat.st_mtime)
+
+
+def open_quote(line, quote=None):
+    """
+    Незакрытая в конце строки дампа кавычка (None - строка кончается вне строкового литерала).
+    quote - кавычка, открытая в начале строки. Внутри литерала '\\' экранирует следующий символ
+    """
+    escaped = -1
+    for match in QUOTE_RE.finditer(line):
+        char, pos = match.group(), match.start()
+        if pos == escaped:
+            continue
+        if quote is None:
+            if char != '\\':
+                quote = char
+        elif char == '\\':
+            escaped = pos + 1
+        elif char == quote:
+            quote = None
+    return quote
+
+
+def read_statements(path):
+    """
+    Операторы SQL файла дампа: многострочный оператор заканчивается строкой с ';' в конце
+    вне строкового литерала (значение в кавычках может занимать несколько строк и кончаться на ';')
+    """
+    lines = []
+    quote = None
+    with gzip.open(path, 'rt', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not lines and (not line.strip() or line.startswith('--') or line.startswith('/*')):
+                continue
+            lines.append(line)
+            quote = open_quote(line, quote)
+            if quote is None and line.rstrip().endswith(';'):
+                yield ''.join(lines).strip().rstrip(';')
+                lines = []
+
+
+def rewrite_create(statement):
+    """CREATE TABLE дампа без вторичных индексов, с InnoDB и utf8mb3. Возвращает (CREATE TABLE, [индексы])"""
+    lines = statement.splitlines()
+    columns, indexes = [], []
+    for line in lines[1:-1]:
+        clause = line.strip().rstrip(',')
+        if SECONDARY_KEY_RE.match(clause):
+            indexes.append(clause)
+        else:
+            columns.append(COLUMN_CHARSET_RE.sub('', clause))
+
+    options = TABLE_OPTION_RE.sub('', lines[-1].strip().lstrip(')'))
+    create = f"{lines[0]}\n  " + ',\n  '.join(columns) + f"\n) {TABLE_OPTIONS}{options}"
+    return create, indexes
+
+
+def build_indexes(cursor, table, indexes):
+    """Вторичные индексы одним ALTER TABLE, FULLTEXT - отдельными (InnoDB строит их по одному)"""
+    fulltext = [index for index in indexes if index.upper().startswith('FULLTEXT')]
+    regular = [index for index in indexes if index not in fulltext]
+    if regular:
+        cursor.execute(f"ALTER TABLE `{table}` " + ', '.join(f"ADD {index}" for index in regular))
+    for index in fulltext:
+        cursor.execute(f"ALTER TABLE `{table}` ADD {index}")
+
+
+def load_table(path, db_config=None):
+    """Загружает один файл дампа (выполняется в процессе-исполнителе). Возвращает статистику таблицы"""
+    table = DUMP_FILE_RE.match(os.path.basename(path)).group(1)
+    stats = {'table': table, 'rows': 0, 'load': 0.0, 'index': 0.0, 'error': None}
+    db = DatabaseBooks(db_config or DB_BOOKS.db_config, pool_config={'size': 0})
+    try:
+        with db.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SQL_DELETE_IMPORT_STATE, (table,))
+            conn.commit()
+            cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+            conn.autocommit = False
+
+            started = time.perf_counter()
+            indexes, inserts = [], 0
+            for statement in read_statements(path):
+                keyword = statement[:12].upper()
+                if keyword.startswith('INSERT'):
+                    cursor.execute(NON_BMP_RE.sub('\ufffd', statement))
+                    stats['rows'] += cursor.rowcount
+                    inserts += 1
+                    if inserts % COMMIT_EVERY == 0:
+                        conn.commit()
+                elif keyword.startswith('CREATE TABLE'):
+                    create, indexes = rewrite_create(statement)
+                    cursor.execute(create)
+                elif keyword.startswith('DROP TABLE'):
+                    cursor.execute(statement)
+                # SET, LOCK/UNLOCK TABLES, ALTER TABLE ... DISABLE KEYS дампа не нужны
+            conn.commit()
+            stats['load'] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            build_indexes(cursor, table, indexes)
+            stats['index'] = time.perf_counter() - started
+
+            cursor.execute(SQL_UPDATE_IMPORT_STATE, (table, *file_signature(path), stats['rows'],
+                                                     round(stats['load'], 1), round(stats['index'], 1)))
+            conn.commit()
+    except Exception as e:
+        stats['error'] = str(e)
+    return stats
+
+
+def find_dumps(directory, tables):
+    """Файлы дампа каталога, самые большие первыми: они дольше всех грузятся"""
+    paths = []
+    for name in os.listdir(directory):
+        match = DUMP_FILE_RE.match(name)
+        if match and (not tables or match.group(1) in tables):
+            paths.append(os.path.join(directory, name))
+    return sorted(paths, key=os.path.getsize, reverse=True)
+
+
+def load_dumps(directory, workers, tables=(), restart=False, db_config=None):
+    """
+    Загружает файлы дампа каталога в базу db_config (по умолчанию - базу бота).
+    Возвращает список незагруженных таблиц, None - если файлов дампа нет
+    """
+    db_config = db_config or DB_BOOKS.db_config
+    paths = find_dumps(directory, tables)
+    if not paths:
+        print(f"Нет файлов lib.*.sql.gz в {directory}")
+        return None
+
+    db = DatabaseBooks(db_config, pool_config={'size': 0})
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_ALTER_DATABASE_CHARSET.format(database=db_config['database']))
+        cursor.execute(SQL_CREATE_IMPORT_STATE)
+    done = {table: (size, mtime) for table, size, mtime in db._fetchall(SQL_QUERY_IMPORT_STATE)}
+
+    pending = []
+    for path in paths:
+        table = DUMP_FILE_RE.match(os.path.basename(path)).group(1)
+        if not restart and done.get(table) == file_signature(path):
+            print(f"{table:20} уже загружена")
+        else:
+            pending.append(path)
+
+    started = time.perf_counter()
+    total_rows, failed = 0, []
+    with Pool(processes=min(workers, len(pending)) or 1) as pool:
+        for stats in pool.imap_unordered(functools.partial(load_table, db_config=db_config), pending):
+            if stats['error']:
+                failed.append(stats['table'])
+                print(f"{stats['table']:20} ошибка: {stats['error']}")
+                continue
+            total_rows += stats['rows']
+            rate = stats['rows'] / stats['load'] if stats['load'] > 0 else 0.0
+            print(f"{stats['table']:20} rows={stats['rows']:<10} load={stats['load']:8.1f}s "
+                  f"rows/s={rate:10.0f} index={stats['index']:8.1f}s")
+
+    elapsed = time.perf_counter() - started
+    print(f"Загружено таблиц: {len(pending) - len(failed)}, строк: {total_rows}, {elapsed:.1f} с")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default='db_init/sql', help='каталог с файлами lib.*.sql.gz')
+    parser.add_argument('--workers', type=int, default=4, help='число параллельно загружаемых таблиц')
+    parser.add_argument('--tables', default='', help='только эти таблицы, через запятую')
+    parser.add_argument('--restart', action='store_true', help='загрузить заново и уже загруженные таблицы')
+    args = parser.parse_args()
+
+    tables = {table.strip() for table in args.tables.split(',') if table.strip()}
+    failed = load_dumps(args.dir, args.workers, tables, args.restart)
+    if failed:
+        print(f"Не загружены: {', '.join(failed)} - запустите снова для продолжения")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
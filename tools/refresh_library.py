@@ -0,0 +1,219 @@
+"""
+Обновление библиотеки без простоя: новая база строится в теневой схеме и подменяет рабочую
+одним RENAME TABLE.
+
+Запуск (переменные окружения DB_* как у бота; пользователю нужны права на создание схем
+<DB_NAME>_shadow и <DB_NAME>_prev и на таблицы всех трёх схем):
+    python tools/refresh_library.py --dir db_init/sql --workers 4
+    python tools/refresh_library.py --no-swap          # только построить и проверить
+    python tools/refresh_library.py --rollback         # вернуть предыдущее поколение
+
+Шаги:
+  1. Загрузка файлов дампа в теневую схему (tools/load_dump.py; прерванная загрузка продолжается,
+     --restart - построить теневую схему заново).
+  2. Скрипты db_init/zz_*.sql в теневой схеме: индексы, полнотекстовый поиск, производные таблицы
+     (zz_10 не нужен - кодировка приводится при загрузке). Хранимые функции принадлежат схеме
+     и не переносятся RENAME TABLE, поэтому скрипты с CREATE FUNCTION выполняются и в рабочей схеме.
+  3. Готовые списки новинок и популярного и индекс подсказок опечаток в теневой схеме.
+  4. Проверка числа строк: основные таблицы не пусты и уменьшились не больше чем на --max-shrink
+     по сравнению с рабочей схемой.
+  5. Подмена одним RENAME TABLE: таблицы рабочей схемы переносятся в <DB_NAME>_prev, теневой -
+     в рабочую. Таблицы рабочей схемы, которых нет в теневой, не трогаются.
+
+Бот замечает обновление по library_meta.ContentVersion (проверка LIBRARY_CHECK_INTERVAL) и сбрасывает
+кеши. --rollback так же одним RENAME TABLE возвращает таблицы из <DB_NAME>_prev, а отменённое
+поколение переносит в теневую схему. Индекс SQLite (SEARCH_BACKEND=sqlite) после подмены
+перестраивается tools/build_sqlite_index.py.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from database import DatabaseBooks, DB_BOOKS  # noqa: E402
+from build_fuzzy_index import build_fuzzy_index  # noqa: E402
+from load_dump import load_dumps  # noqa: E402
+
+DB_INIT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'db_init')
+# Скрипты db_init, не нужные при загрузке через load_dump
+SKIP_SCRIPTS = ('zz_10_convert_charset.sql',)
+
+# Таблицы, которые не могут быть пустыми в новой базе
+REQUIRED_TABLES = (
+    'libbook', 'libavtor', 'libavtorname', 'libgenre', 'libgenrelist',
+    'libbook_fts', 'libbook_search', 'libavtor_search', 'library_meta',
+)
+
+DELIMITER_RE = re.compile(r'^\s*DELIMITER\s+(\S+)\s*$', re.IGNORECASE)
+TRAILING_COMMENT_RE = re.compile(r'(^|\s)--\s.*$')
+
+SQL_QUERY_TABLES = """
+    SELECT TABLE_NAME FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+"""
+
+
+def schema_config(database):
+    return {**DB_BOOKS.db_config, 'database': database}
+
+
+def read_script(path):
+    """Операторы скрипта SQL с учётом DELIMITER (как клиент mysql)"""
+    delimiter, lines = ';', []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = DELIMITER_RE.match(line)
+            if match and not lines:
+                delimiter = match.group(1)
+                continue
+            if not lines and (not line.strip() or line.lstrip().startswith('--')):
+                continue
+            lines.append(line)
+            code = TRAILING_COMMENT_RE.sub('', line.rstrip('\n')).rstrip()
+            if code.endswith(delimiter):
+                statement = ''.join(lines[:-1]) + code[:-len(delimiter)]
+                lines = []
+                if statement.strip():
+                    yield statement.strip()
+
+
+def run_script(db, path):
+    with db.connect() as conn:
+        cursor = conn.cursor(buffered=True)
+        for statement in read_script(path):
+            cursor.execute(statement)
+        conn.commit()
+
+
+def run_scripts(shadow_db, live_db):
+    for path in sorted(glob.glob(os.path.join(DB_INIT_DIR, 'zz_*.sql'))):
+        name = os.path.basename(path)
+        if name in SKIP_SCRIPTS:
+            continue
+        started = time.perf_counter()
+        run_script(shadow_db, path)
+        with open(path, encoding='utf-8') as f:
+            if 'CREATE FUNCTION' in f.read().upper():
+                run_script(live_db, path)
+        print(f"{name:36} {time.perf_counter() - started:8.1f}s")
+
+
+def list_tables(db, schema):
+    return {row[0] for row in db._fetchall(SQL_QUERY_TABLES, (schema,))}
+
+
+def count_rows(db, schema, tables):
+    return {table: db._fetchone(f"SELECT COUNT(*) FROM `{schema}`.`{table}`")[0] for table in sorted(tables)}
+
+
+def validate(db, live, shadow, max_shrink):
+    """Сравнивает число строк таблиц теневой и рабочей схем. Возвращает список проблем"""
+    shadow_counts = count_rows(db, shadow, list_tables(db, shadow))
+    live_counts = count_rows(db, live, list_tables(db, live) & set(shadow_counts))
+
+    problems = []
+    for table, rows in shadow_counts.items():
+        before = live_counts.get(table)
+        print(f"{table:28} {rows:12} {'' if before is None else f'(было {before})'}")
+        if table in REQUIRED_TABLES and rows == 0:
+            problems.append(f"{table}: нет строк")
+        elif before and rows < before * (1 - max_shrink):
+            problems.append(f"{table}: {rows} строк вместо {before}")
+    problems.extend(f"{table}: нет таблицы" for table in REQUIRED_TABLES if table not in shadow_counts)
+    return problems
+
+
+def swap(db, live, incoming, outgoing, tables):
+    """
+    Одним RENAME TABLE переносит таблицы tables рабочей схемы в outgoing, а схемы incoming - в рабочую.
+    Схема outgoing создаётся заново
+    """
+    live_tables = list_tables(db, live)
+    renames = []
+    for table in sorted(tables):
+        if table in live_tables:
+            renames.append(f"`{live}`.`{table}` TO `{outgoing}`.`{table}`")
+        renames.append(f"`{incoming}`.`{table}` TO `{live}`.`{table}`")
+
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{outgoing}`")
+        cursor.execute(f"CREATE DATABASE `{outgoing}` CHARACTER SET utf8mb3 COLLATE utf8mb3_unicode_ci")
+        cursor.execute("RENAME TABLE " + ', '.join(renames))
+    return len(tables)
+
+
+def build_shadow(args, db, shadow):
+    """Шаги 1-3: загрузка дампа, скрипты db_init, списки популярного и индекс опечаток. Возвращает True при успехе"""
+    with db.connect() as conn:
+        cursor = conn.cursor()
+        if args.restart:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{shadow}`")
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{shadow}` CHARACTER SET utf8mb3 COLLATE utf8mb3_unicode_ci")
+
+    failed = load_dumps(args.dir, args.workers, db_config=schema_config(shadow))
+    if failed is None or failed:
+        print(f"Не загружены: {', '.join(failed or [])} - запустите снова для продолжения")
+        return False
+
+    shadow_db = DatabaseBooks(schema_config(shadow))
+    run_scripts(shadow_db, db)
+    shadow_db.refresh_leaderboards(force=True)
+    if not args.skip_fuzzy:
+        build_fuzzy_index(shadow_db)
+    return True
+
+
+def main():
+    live = DB_BOOKS.db_config['database']
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default='db_init/sql', help='каталог с файлами lib.*.sql.gz')
+    parser.add_argument('--workers', type=int, default=4, help='число параллельно загружаемых таблиц')
+    parser.add_argument('--shadow', default=f"{live}_shadow", help='теневая схема')
+    parser.add_argument('--previous', default=f"{live}_prev", help='схема предыдущего поколения')
+    parser.add_argument('--max-shrink', type=float, default=0.1,
+                        help='допустимое уменьшение числа строк таблицы, доля')
+    parser.add_argument('--restart', action='store_true', help='построить теневую схему заново')
+    parser.add_argument('--skip-build', action='store_true', help='не строить, проверить и подменить готовую')
+    parser.add_argument('--skip-fuzzy', action='store_true', help='не строить индекс подсказок опечаток')
+    parser.add_argument('--no-swap', action='store_true', help='только построить и проверить')
+    parser.add_argument('--rollback', action='store_true', help='вернуть предыдущее поколение')
+    args = parser.parse_args()
+
+    db = DatabaseBooks(DB_BOOKS.db_config)
+    started = time.perf_counter()
+
+    if args.rollback:
+        tables = list_tables(db, args.previous)
+        if not tables:
+            print(f"Нет предыдущего поколения в {args.previous}")
+            sys.exit(1)
+        swapped = swap(db, live, args.previous, args.shadow, tables)
+        print(f"Возвращено таблиц: {swapped}, отменённое поколение - в {args.shadow}")
+        return
+
+    if not args.skip_build and not build_shadow(args, db, args.shadow):
+        sys.exit(1)
+
+    problems = validate(db, live, args.shadow, args.max_shrink)
+    if problems:
+        print("Проверка не пройдена, рабочая схема не изменена:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+    if args.no_swap:
+        print(f"Теневая схема {args.shadow} готова, {time.perf_counter() - started:.0f} с")
+        return
+
+    swapped = swap(db, live, args.shadow, args.previous, list_tables(db, args.shadow))
+    print(f"Подменено таблиц: {swapped}, предыдущее поколение - в {args.previous}, "
+          f"{time.perf_counter() - started:.0f} с")
+
+
+if __name__ == '__main__':
+    main()